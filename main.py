@@ -5,9 +5,11 @@ from pygame.sprite import Sprite, RenderUpdates
 from pygame.rect import Rect
 from enum import Enum
 import sys
-# from python.game_modes.one_player import one_player
+from functools import lru_cache
+from python.assets import get_display, get_font, get_gradient
+from python.game_modes.one_player import one_player
 from python.game_modes.two_player import two_player
-# from python.game_modes.puzzle_mode import puzzle_mode
+from python.game_modes.puzzles import puzzle_mode
 
 # Colors
 BLUE = (106, 159, 181)
@@ -18,16 +20,18 @@ PURPLE = (128, 0, 128)
 RED = (220, 20, 60)
 LIGHT_GRAY = (200, 200, 200)
 
+MENU_CAPTION = "Chess Game - Main Menu"
+
 class GameState(Enum):
     QUIT = -1
     TITLE = 0
     TWO_PLAYER = 1
-    # VS_AI = 2
-    # PUZZLES = 3
+    VS_AI = 2
+    PUZZLES = 3
 
 def create_surface_with_text(text, font_size, text_rgb, bg_rgb):
     """Returns surface with text written on"""
-    font = pygame.freetype.SysFont("Pixel", font_size, bold=True)
+    font = get_font("Pixel", font_size, bold=True)
     surface, _ = font.render(text=text, fgcolor=text_rgb, bgcolor=bg_rgb)
     return surface.convert_alpha()
 
@@ -93,21 +97,56 @@ class UIElement(Sprite):
 
 def create_gradient_background(screen, color1, color2):
     """Create a gradient background"""
-    height = screen.get_height()
-    for y in range(height):
-        ratio = y / height
-        r = int(color1[0] * (1 - ratio) + color2[0] * ratio)
-        g = int(color1[1] * (1 - ratio) + color2[1] * ratio)
-        b = int(color1[2] * (1 - ratio) + color2[2] * ratio)
-        pygame.draw.line(screen, (r, g, b), (0, y), (screen.get_width(), y))
+    screen.blit(get_gradient(screen.get_size(), color1, color2), (0, 0))
+
+@lru_cache(maxsize=None)
+def create_menu_background(size, title_text):
+    """Returns the menu's static background, rendered once: gradient, subtitle and shortcuts"""
+    width, height = size
+    background = pygame.Surface(size)
+    create_gradient_background(background, (240, 248, 255), (200, 220, 240))
+
+    # Draw title if provided
+    if title_text:
+        
+        # Draw subtitle
+        subtitle_font = get_font("Arial", 32)
+        subtitle_surface, _ = subtitle_font.render("Choose Your Game Mode", (100, 100, 100))
+        subtitle_rect = subtitle_surface.get_rect(center=(width // 2, 160))
+        background.blit(subtitle_surface, subtitle_rect)
+
+    # Draw keyboard shortcuts
+    shortcut_font = get_font("Arial", 18)
+    shortcuts = [
+        "Keyboard Shortcuts:",
+        "Press 1 - Two Players",
+        "Press 2 - VS Computer",
+        "Press 3 - Chess Puzzles",
+        "Press ESC/Q - Quit"
+    ]
+    
+    y_start = height - 110
+    for i, shortcut in enumerate(shortcuts):
+        color = (50, 50, 50) if i == 0 else (100, 100, 100)
+        shortcut_surface, _ = shortcut_font.render(shortcut, color)
+        shortcut_rect = shortcut_surface.get_rect(center=(width // 2, y_start + i * 20))
+        background.blit(shortcut_surface, shortcut_rect)
+
+    return background
 
 def game_loop(screen, buttons, title_text=None):
     """Handles game loop until an action is returned by a button"""
     clock = pygame.time.Clock()
+    background = create_menu_background(screen.get_size(), title_text)
+    first_frame = True
     
     while True:
         mouse_up = False
-        for event in pygame.event.get():
+        # Draw the first frame straight away, then sleep until something happens
+        events = pygame.event.get() if first_frame else [pygame.event.wait()] + pygame.event.get()
+        first_frame = False
+
+        for event in events:
             if event.type == pygame.QUIT:
                 return GameState.QUIT
             if event.type == pygame.MOUSEBUTTONUP and event.button == 1:
@@ -117,18 +156,13 @@ def game_loop(screen, buttons, title_text=None):
                     return GameState.QUIT
                 elif event.key == pygame.K_1:
                     return GameState.TWO_PLAYER
+                elif event.key == pygame.K_2:
+                    return GameState.VS_AI
+                elif event.key == pygame.K_3:
+                    return GameState.PUZZLES
         
-        # Create gradient background
-        create_gradient_background(screen, (240, 248, 255), (200, 220, 240))
-        
-        # Draw title if provided
-        if title_text:
-            
-            # Draw subtitle
-            subtitle_font = pygame.freetype.SysFont("Arial", 32)
-            subtitle_surface, _ = subtitle_font.render("Choose Your Game Mode", (100, 100, 100))
-            subtitle_rect = subtitle_surface.get_rect(center=(screen.get_width() // 2, 160))
-            screen.blit(subtitle_surface, subtitle_rect)
+        # The gradient, subtitle and shortcuts are pre-rendered into one surface
+        screen.blit(background, (0, 0))
 
         # Update and check buttons
         for button in buttons:
@@ -139,21 +173,6 @@ def game_loop(screen, buttons, title_text=None):
         # Draw buttons
         buttons.draw(screen)
         
-        # Draw keyboard shortcuts
-        shortcut_font = pygame.freetype.SysFont("Arial", 18)
-        shortcuts = [
-            "Keyboard Shortcuts:",
-            "Press 1 - Two Players",
-            "Press ESC/Q - Quit"
-        ]
-        
-        y_start = screen.get_height() - 80
-        for i, shortcut in enumerate(shortcuts):
-            color = (50, 50, 50) if i == 0 else (100, 100, 100)
-            shortcut_surface, _ = shortcut_font.render(shortcut, color)
-            shortcut_rect = shortcut_surface.get_rect(center=(screen.get_width() // 2, y_start + i * 20))
-            screen.blit(shortcut_surface, shortcut_rect)
-        
         pygame.display.flip()
         clock.tick(60)
 
@@ -161,7 +180,7 @@ def title_screen(screen):
     """Display the main menu title screen"""
     # Create buttons
     start_btn = UIElement(
-        center_position=(screen.get_width() // 2, 280),
+        center_position=(screen.get_width() // 2, 220),
         font_size=32,
         bg_rgb=BLUE,
         text_rgb=WHITE,
@@ -169,27 +188,26 @@ def title_screen(screen):
         action=GameState.TWO_PLAYER,
     )
     
-    # Commented out other game modes
-    # vs_ai_btn = UIElement(
-    #     center_position=(screen.get_width() // 2, 360),
-    #     font_size=32,
-    #     bg_rgb=GREEN,
-    #     text_rgb=WHITE,
-    #     text="VS Computer",
-    #     action=GameState.VS_AI,
-    # )
-    
-    # puzzle_btn = UIElement(
-    #     center_position=(screen.get_width() // 2, 440),
-    #     font_size=32,
-    #     bg_rgb=PURPLE,
-    #     text_rgb=WHITE,
-    #     text="Chess Puzzles",
-    #     action=GameState.PUZZLES,
-    # )
+    vs_ai_btn = UIElement(
+        center_position=(screen.get_width() // 2, 265),
+        font_size=32,
+        bg_rgb=GREEN,
+        text_rgb=WHITE,
+        text="VS Computer",
+        action=GameState.VS_AI,
+    )
+
+    puzzle_btn = UIElement(
+        center_position=(screen.get_width() // 2, 310),
+        font_size=32,
+        bg_rgb=PURPLE,
+        text_rgb=WHITE,
+        text="Chess Puzzles",
+        action=GameState.PUZZLES,
+    )
     
     quit_btn = UIElement(
-        center_position=(screen.get_width() // 2, 380),
+        center_position=(screen.get_width() // 2, 355),
         font_size=32,
         bg_rgb=RED,
         text_rgb=WHITE,
@@ -197,54 +215,48 @@ def title_screen(screen):
         action=GameState.QUIT,
     )
 
-    # buttons = RenderUpdates(start_btn, vs_ai_btn, puzzle_btn, quit_btn)
-    buttons = RenderUpdates(start_btn, quit_btn)
+    buttons = RenderUpdates(start_btn, vs_ai_btn, puzzle_btn, quit_btn)
 
     return game_loop(screen, buttons, "Python Chess")
 
 def play_two_player(screen):
     """Launch two player mode and handle return"""
-    pygame.quit()
     try:
         two_player()
     except Exception as e:
         print(f"Error starting two player game: {e}")
     
-    # Reinitialize pygame after returning from game
-    pygame.init()
+    # The game shares the menu's window, so only the caption needs restoring
+    pygame.display.set_caption(MENU_CAPTION)
+    return GameState.TITLE
+
+def play_vs_ai(screen):
+    """Launch AI mode and handle return"""
+    try:
+        one_player(threads=os.cpu_count() or 1)
+    except Exception as e:
+        print(f"Error starting AI game: {e}")
+
+    pygame.display.set_caption(MENU_CAPTION)
     return GameState.TITLE
 
-# Commented out other game modes
-# def play_vs_ai(screen):
-#     """Launch AI mode and handle return"""
-#     pygame.quit()
-#     try:
-#         one_player()
-#     except Exception as e:
-#         print(f"Error starting AI game: {e}")
-#     
-#     pygame.init()
-#     return GameState.TITLE
-
-# def play_puzzles(screen):
-#     """Launch puzzle mode and handle return"""
-#     pygame.quit()
-#     try:
-#         puzzle_mode()
-#     except Exception as e:
-#         print(f"Error starting puzzle mode: {e}")
-#     
-#     pygame.init()
-#     return GameState.TITLE
+def play_puzzles(screen):
+    """Launch puzzle mode and handle return"""
+    try:
+        puzzle_mode()
+    except Exception as e:
+        print(f"Error starting puzzle mode: {e}")
+
+    pygame.display.set_caption(MENU_CAPTION)
+    return GameState.TITLE
 
 def main():
     """Main game loop handling different states"""
     # Set working directory
     os.chdir(os.path.dirname(os.path.abspath(__file__)))
     
-    pygame.init()
-    screen = pygame.display.set_mode((512, 512))
-    pygame.display.set_caption("Chess Game - Main Menu")
+    # One window serves the menu and every game mode
+    screen = get_display((512, 512), MENU_CAPTION)
     
     game_state = GameState.TITLE
 
@@ -255,11 +267,11 @@ def main():
         elif game_state == GameState.TWO_PLAYER:
             game_state = play_two_player(screen)
 
-        # elif game_state == GameState.VS_AI:
-        #     game_state = play_vs_ai(screen)
+        elif game_state == GameState.VS_AI:
+            game_state = play_vs_ai(screen)
 
-        # elif game_state == GameState.PUZZLES:
-        #     game_state = play_puzzles(screen)
+        elif game_state == GameState.PUZZLES:
+            game_state = play_puzzles(screen)
 
         elif game_state == GameState.QUIT:
             pygame.quit()
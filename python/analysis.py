@@ -0,0 +1,265 @@
+import argparse
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from python.pgn import Pgn_Game, move_from_san, move_to_san, open_pgn, read_games, START_FEN
+from python.game_state import Game_State
+from python.search import MATE_SCORE, Search
+
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Headers copied from each game into its analysis record
+KEPT_HEADERS = ("Event", "Date", "White", "Black", "Result", "WhiteElo", "BlackElo", "ECO")
+
+# The per-process searcher, created once by init_worker
+worker_search: Optional[Search] = None
+
+
+def init_worker(hash_size_mb: float) -> None:
+    global worker_search
+    worker_search = Search(hash_size_mb=hash_size_mb)
+
+
+def probe(search: Search, game_state: Game_State, depth: int) -> Tuple[int, List[int]]:
+    """
+    Score a position with a fixed-depth search from the side to move's point of view.
+
+    Parameters:
+    search (Search): The searcher to use.
+    game_state (Game_State): The position to score.
+    depth (int): The search depth in plies.
+
+    Returns:
+    Tuple[int, List[int]]: The score in centipawns and the legal moves of the position.
+    """
+    moves = game_state.generate_legal_moves()
+
+    if not moves:
+        in_check = game_state.is_in_check()
+        return (-MATE_SCORE if in_check else 0), moves
+
+    # Search.search does not search a forced move, so score the position after it instead
+    if len(moves) == 1:
+        game_state.make_move(moves[0])
+        score, _ = probe(search, game_state, max(1, depth - 1))
+        game_state.unmake_move()
+        return -score, moves
+
+    return search.search(game_state, max_depth=depth).score, moves
+
+
+def analyse_game(game: Pgn_Game, depth: int, blunder_threshold: int) -> Dict:
+    """
+    Replay a game, checking every move and scoring every position.
+
+    A move is marked as a blunder when it loses at least blunder_threshold centipawns
+    compared with the probe score of the position it was played from.
+
+    Parameters:
+    game (Pgn_Game): The game to analyse.
+    depth (int): The probe search depth in plies.
+    blunder_threshold (int): The score loss, in centipawns, that makes a move a blunder.
+
+    Returns:
+    Dict: The game's analysis record.
+    """
+    record = {
+        "headers": {tag: game.headers[tag] for tag in KEPT_HEADERS if tag in game.headers},
+        "error": None,
+        "moves": [],
+    }
+
+    try:
+        game_state = Game_State(game.headers.get("FEN", START_FEN))
+    except ValueError as error:
+        record["error"] = str(error)
+        return record
+
+    score, legal_moves = probe(worker_search, game_state, depth)
+
+    for ply, text in enumerate(game.moves):
+        try:
+            move = move_from_san(game_state, text, legal_moves)
+        except ValueError as error:
+            record["error"] = f"ply {ply + 1}: {error}"
+            break
+
+        entry = {
+            "ply": ply + 1,
+            "san": move_to_san(game_state, move, legal_moves),
+            "material": game_state.white_material - game_state.black_material,
+            "mobility": len(legal_moves),
+            "score": score,
+        }
+
+        game_state.make_move(move)
+        next_score, legal_moves = probe(worker_search, game_state, depth)
+
+        # score is from the mover's side and next_score from the opponent's, so their sum is what the move lost
+        entry["loss"] = max(0, score + next_score)
+        entry["blunder"] = entry["loss"] >= blunder_threshold
+        record["moves"].append(entry)
+        score = next_score
+
+    moves = record["moves"]
+    record["stats"] = {
+        "plies": len(moves),
+        "blunders": sum(entry["blunder"] for entry in moves),
+        "average_mobility": round(sum(entry["mobility"] for entry in moves) / len(moves), 2) if moves else 0,
+        "final_material": moves[-1]["material"] if moves else 0,
+    }
+
+    return record
+
+
+def analyse_chunk(games: List[Pgn_Game], depth: int, blunder_threshold: int) -> Tuple[List[Dict], int]:
+    records = [analyse_game(game, depth, blunder_threshold) for game in games]
+    # Every game scores its start position plus one position per move
+    return records, sum(len(record["moves"]) + 1 for record in records)
+
+
+def chunk_games(games: Iterator[Pgn_Game], chunk_size: int) -> Iterator[List[Pgn_Game]]:
+    chunk = []
+    for game in games:
+        chunk.append(game)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def load_checkpoint(path: str) -> Tuple[int, int]:
+    """
+    Read how many games were written, and the output size after them, from a checkpoint file.
+
+    Parameters:
+    path (str): The checkpoint file.
+
+    Returns:
+    Tuple[int, int]: The number of games done and the output file offset, or (0, 0).
+    """
+    if not os.path.exists(path):
+        return 0, 0
+
+    with open(path, "r") as file:
+        checkpoint = json.load(file)
+
+    return checkpoint["games"], checkpoint["offset"]
+
+
+def save_checkpoint(path: str, games: int, offset: int) -> None:
+    # Write then rename so an interruption never leaves a half-written checkpoint
+    temporary_path = path + ".tmp"
+    with open(temporary_path, "w") as file:
+        json.dump({"games": games, "offset": offset}, file)
+    os.replace(temporary_path, path)
+
+
+def run_analysis(
+    pgn_path: str,
+    output_path: str,
+    workers: int,
+    depth: int,
+    blunder_threshold: int,
+    chunk_size: int,
+    checkpoint_path: Optional[str],
+    hash_size_mb: float = 4,
+) -> None:
+    """
+    Analyse every game of a PGN file into a JSON Lines output file.
+
+    Games are read as a stream and sent to a process pool in chunks. At most two chunks
+    per worker are in flight, so memory stays bounded however large the archive is, and
+    results are written in the order of the input. With a checkpoint file, an interrupted
+    run resumes after the last chunk that was written.
+
+    Parameters:
+    pgn_path (str): The PGN archive to read.
+    output_path (str): The JSON Lines file to write, one record per game.
+    workers (int): The number of worker processes.
+    depth (int): The probe search depth in plies.
+    blunder_threshold (int): The score loss, in centipawns, that makes a move a blunder.
+    chunk_size (int): The number of games sent to a worker at once.
+    checkpoint_path (Optional[str]): The checkpoint file, or None to always start over.
+    hash_size_mb (float): The transposition table size of each worker.
+
+    Returns:
+    None
+    """
+    games_done, offset = load_checkpoint(checkpoint_path) if checkpoint_path else (0, 0)
+
+    # A checkpoint is only good with the output it describes; without it start over
+    if games_done and (not os.path.exists(output_path) or os.path.getsize(output_path) < offset):
+        print(f"Checkpoint {checkpoint_path} does not match {output_path}, starting over")
+        games_done, offset = 0, 0
+
+    output = open(output_path, "r+" if games_done else "w")
+    # Drop anything written after the checkpoint, such as a partly written chunk
+    output.seek(offset)
+    output.truncate()
+
+    if games_done:
+        print(f"Resuming after {games_done} games")
+
+    games = read_games(open_pgn(pgn_path))
+    for _ in range(games_done):
+        next(games, None)
+
+    start_time = time.perf_counter()
+    positions = 0
+    game_index = games_done
+    max_in_flight = workers * 2
+    pending = deque()
+
+    def write_next() -> None:
+        nonlocal positions, game_index
+        records, chunk_positions = pending.popleft().result()
+
+        for record in records:
+            record["game"] = game_index
+            output.write(json.dumps(record) + "\n")
+            game_index += 1
+
+        output.flush()
+        positions += chunk_positions
+        if checkpoint_path:
+            save_checkpoint(checkpoint_path, game_index, output.tell())
+
+        elapsed = time.perf_counter() - start_time
+        print(f"games {game_index}  positions {positions}  {positions / max(elapsed, 1e-9):.0f} positions/s")
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(hash_size_mb,)) as pool:
+        for chunk in chunk_games(games, chunk_size):
+            if len(pending) >= max_in_flight:
+                write_next()
+            pending.append(pool.submit(analyse_chunk, chunk, depth, blunder_threshold))
+
+        while pending:
+            write_next()
+
+    output.close()
+
+    elapsed = time.perf_counter() - start_time
+    print(f"Analysed {game_index - games_done} games, {positions} positions in {elapsed:.1f}s, {positions / max(elapsed, 1e-9):.0f} positions/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay and analyse the games of a PGN archive.")
+    parser.add_argument("pgn", help="PGN file to read (.pgn, .pgn.gz or .pgn.bz2)")
+    parser.add_argument("--output", default="analysis.jsonl", help="JSON Lines file to write")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="number of worker processes")
+    parser.add_argument("--depth", type=int, default=2, help="probe search depth in plies")
+    parser.add_argument("--blunder", type=int, default=200, help="score loss in centipawns that counts as a blunder")
+    parser.add_argument("--chunk-size", type=int, default=8, help="games sent to a worker at once")
+    parser.add_argument("--checkpoint", help="checkpoint file used to resume an interrupted run")
+    args = parser.parse_args()
+
+    run_analysis(args.pgn, args.output, max(1, args.workers), args.depth, args.blunder, args.chunk_size, args.checkpoint)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+import argparse
+import os
+import time
+
+import pygame as p
+import pygame.freetype
+import pygame.mixer as pm
+
+from typing import Dict, Tuple
+
+ASSETS_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets")
+IMAGES_DIRECTORY = os.path.join(ASSETS_DIRECTORY, "images")
+SOUNDS_DIRECTORY = os.path.join(ASSETS_DIRECTORY, "sounds")
+
+PIECES = ["bR", "bN", "bB", "bQ", "bK", "bP", "wR", "wN", "wB", "wQ", "wK", "wP"]
+
+SOUND_FILES = {"click": "click1.wav", "error": "click2Error.wav"}
+SOUND_VOLUME = 0.3
+
+# (size, converted) -> piece images; converted is False when loaded before a display existed
+_piece_images: Dict[int, Tuple[Dict[str, p.Surface], bool]] = {}
+_fonts: Dict[Tuple[str, int, bool], pygame.freetype.Font] = {}
+_backgrounds: Dict[Tuple, p.Surface] = {}
+
+
+def atlas_path(size: int) -> str:
+    return os.path.join(IMAGES_DIRECTORY, f"pieces_{size}.png")
+
+
+def build_atlas(size: int) -> p.Surface:
+    """
+    Scale the twelve piece images to one size and lay them out in a single row.
+
+    Parameters:
+    size (int): The width and height of each piece.
+
+    Returns:
+    pygame.Surface: The atlas, pieces in PIECES order.
+    """
+    atlas = p.Surface((size * len(PIECES), size), p.SRCALPHA)
+    for index, piece in enumerate(PIECES):
+        image = p.image.load(os.path.join(IMAGES_DIRECTORY, f"{piece}.png"))
+        # Adding onto the transparent atlas copies the pixels exactly, where a normal blit would blend their edges
+        atlas.blit(p.transform.scale(image, (size, size)), (index * size, 0), special_flags=p.BLEND_RGBA_ADD)
+
+    return atlas
+
+
+def get_piece_images(size: int) -> Dict[str, p.Surface]:
+    """
+    Return the piece images at a square size, loading them once per process.
+
+    The images come from the pre-scaled atlas assets/images/pieces_<size>.png when it
+    exists, otherwise from the individual PNGs. They are converted to the display format
+    as soon as a display exists, so blitting them needs no conversion.
+
+    Parameters:
+    size (int): The width and height of a board square.
+
+    Returns:
+    Dict[str, pygame.Surface]: The image of each piece, keyed like "wK".
+    """
+    images, converted = _piece_images.get(size, (None, False))
+    has_display = p.display.get_surface() is not None
+
+    if images is None:
+        path = atlas_path(size)
+        atlas = p.image.load(path) if os.path.exists(path) else build_atlas(size)
+        images = {piece: atlas.subsurface((index * size, 0, size, size)) for index, piece in enumerate(PIECES)}
+        converted = False
+
+    if has_display and not converted:
+        images = {piece: image.convert_alpha() for piece, image in images.items()}
+        converted = True
+
+    _piece_images[size] = (images, converted)
+
+    return images
+
+
+class Silent_Sound:
+
+    def play(self) -> None:
+        pass
+
+
+class Sound_Cache:
+    """
+    The game sounds, each loaded the first time it is played.
+
+    Indexed like a dictionary, e.g. SOUNDS["click"].play(). Without an audio device a
+    silent stand-in is returned so the game still runs.
+    """
+
+    def __init__(self) -> None:
+        self.sounds: Dict[str, object] = {}
+
+    def __getitem__(self, name: str):
+        if name not in self.sounds:
+            try:
+                if not pm.get_init():
+                    pm.init()
+                sound = pm.Sound(os.path.join(SOUNDS_DIRECTORY, SOUND_FILES[name]))
+                sound.set_volume(SOUND_VOLUME)
+            except p.error:
+                sound = Silent_Sound()
+            self.sounds[name] = sound
+
+        return self.sounds[name]
+
+
+SOUNDS = Sound_Cache()
+
+
+def get_font(name: str, size: int, bold: bool = False) -> pygame.freetype.Font:
+    key = (name, size, bold)
+    if key not in _fonts:
+        if not pygame.freetype.get_init():
+            pygame.freetype.init()
+        _fonts[key] = pygame.freetype.SysFont(name, size, bold=bold)
+
+    return _fonts[key]
+
+
+def get_gradient(size: Tuple[int, int], top_colour: Tuple[int, int, int], bottom_colour: Tuple[int, int, int]) -> p.Surface:
+    """
+    Return a vertical gradient, rendered once per size and colours.
+
+    Parameters:
+    size (Tuple[int, int]): The width and height.
+    top_colour (Tuple[int, int, int]): The colour of the top row.
+    bottom_colour (Tuple[int, int, int]): The colour of the bottom row.
+
+    Returns:
+    pygame.Surface: The gradient. Callers draw on a copy if they need to change it.
+    """
+    key = ("gradient", size, top_colour, bottom_colour)
+    if key not in _backgrounds:
+        width, height = size
+        surface = p.Surface(size)
+        for y in range(height):
+            ratio = y / height
+            colour = tuple(int(top * (1 - ratio) + bottom * ratio) for top, bottom in zip(top_colour, bottom_colour))
+            p.draw.line(surface, colour, (0, y), (width, y))
+        _backgrounds[key] = surface
+
+    return _backgrounds[key]
+
+
+def get_display(size: Tuple[int, int], caption: str) -> p.Surface:
+    """
+    Return the game window, opening it only if no window of this size is open.
+
+    Every game mode draws on the same window, so switching modes does not close and
+    reopen it.
+
+    Parameters:
+    size (Tuple[int, int]): The window width and height.
+    caption (str): The window caption.
+
+    Returns:
+    pygame.Surface: The display surface.
+    """
+    if not p.get_init():
+        p.init()
+
+    screen = p.display.get_surface()
+    if screen is None or screen.get_size() != size:
+        screen = p.display.set_mode(size)
+
+    p.display.set_caption(caption)
+
+    return screen
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build the pre-scaled piece atlas and time asset loading.")
+    parser.add_argument("--size", type=int, default=64, help="square size in pixels")
+    args = parser.parse_args()
+
+    p.init()
+    p.display.set_mode((1, 1), p.HIDDEN)
+
+    start_time = time.perf_counter()
+    atlas = build_atlas(args.size)
+    build_time = time.perf_counter() - start_time
+    p.image.save(atlas, atlas_path(args.size))
+
+    start_time = time.perf_counter()
+    get_piece_images(args.size)
+    load_time = time.perf_counter() - start_time
+
+    print(f"Wrote {atlas_path(args.size)}: scaling the PNGs took {1000 * build_time:.1f}ms, loading the atlas {1000 * load_time:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+from typing import Dict, Iterator, List, Tuple
+
+# Squares are numbered row * 8 + column using the same orientation as the 8x8
+# board grid, so square 0 is a8, square 7 is h8 and square 63 is h1.
+PIECES: List[str] = ["wP", "wN", "wB", "wR", "wQ", "wK", "bP", "bN", "bB", "bR", "bQ", "bK"]
+COLOURS: List[str] = ["w", "b"]
+EMPTY = "--"
+
+FULL_BOARD = 0xFFFFFFFFFFFFFFFF
+FILE_A = 0x0101010101010101
+FILE_H = FILE_A << 7
+RANK_8 = 0xFF
+RANK_1 = RANK_8 << 56
+# a8 is a light square
+LIGHT_SQUARES = 0xAA55AA55AA55AA55
+DARK_SQUARES = LIGHT_SQUARES ^ FULL_BOARD
+
+
+def square_index(location: Tuple[int, int]) -> int:
+    """
+    Convert a (row, column) board location to a square index.
+
+    Parameters:
+    location (Tuple[int, int]): The (row, column) location on the board grid.
+
+    Returns:
+    int: The square index between 0 and 63.
+    """
+    return location[0] * 8 + location[1]
+
+
+def square_location(square: int) -> Tuple[int, int]:
+    """
+    Convert a square index to a (row, column) board location.
+
+    Parameters:
+    square (int): The square index between 0 and 63.
+
+    Returns:
+    Tuple[int, int]: The (row, column) location on the board grid.
+    """
+    return (square >> 3, square & 7)
+
+
+def lsb(bitboard: int) -> int:
+    """
+    Return the index of the least significant set bit of a non-empty bitboard.
+
+    Parameters:
+    bitboard (int): A non-empty bitboard.
+
+    Returns:
+    int: The square index of the lowest set bit.
+    """
+    return (bitboard & -bitboard).bit_length() - 1
+
+
+def iter_squares(bitboard: int) -> Iterator[int]:
+    """
+    Yield the square index of every set bit in a bitboard, lowest first.
+
+    Parameters:
+    bitboard (int): The bitboard to iterate over.
+
+    Returns:
+    Iterator[int]: The square indexes of the set bits.
+    """
+    while bitboard:
+        low_bit = bitboard & -bitboard
+        yield low_bit.bit_length() - 1
+        bitboard ^= low_bit
+
+
+class Bitboards:
+
+    def __init__(self) -> None:
+        self.pieces: Dict[str, int] = {piece: 0 for piece in PIECES}
+        self.occupancy: Dict[str, int] = {colour: 0 for colour in COLOURS}
+        self.occupied: int = 0
+
+    @classmethod
+    def from_board(cls, board: List[List[str]]) -> "Bitboards":
+        """
+        Build the bitboards for an 8x8 grid of two-character piece strings.
+
+        Parameters:
+        board (List[List[str]]): The board grid, "--" marking empty squares.
+
+        Returns:
+        Bitboards: The bitboard representation of the grid.
+        """
+        bitboards = cls()
+
+        for row in range(8):
+            for column in range(8):
+                piece = board[row][column]
+                if piece != EMPTY:
+                    bitboards.add_piece(piece, row * 8 + column)
+
+        return bitboards
+
+    def to_board(self) -> List[List[str]]:
+        """
+        Convert the bitboards back into an 8x8 grid of two-character piece strings.
+
+        Returns:
+        List[List[str]]: The board grid, "--" marking empty squares.
+        """
+        board = [[EMPTY] * 8 for _ in range(8)]
+
+        for piece, bitboard in self.pieces.items():
+            for square in iter_squares(bitboard):
+                board[square >> 3][square & 7] = piece
+
+        return board
+
+    def piece_at(self, square: int) -> str:
+        """
+        Return the piece standing on a square, or "--" if it is empty.
+
+        Parameters:
+        square (int): The square index to look up.
+
+        Returns:
+        str: The two-character piece string.
+        """
+        bit = 1 << square
+        if not self.occupied & bit:
+            return EMPTY
+
+        for piece, bitboard in self.pieces.items():
+            if bitboard & bit:
+                return piece
+
+        return EMPTY
+
+    def add_piece(self, piece: str, square: int) -> None:
+        bit = 1 << square
+        self.pieces[piece] |= bit
+        self.occupancy[piece[0]] |= bit
+        self.occupied |= bit
+
+    def remove_piece(self, piece: str, square: int) -> None:
+        bit = 1 << square
+        self.pieces[piece] &= ~bit
+        self.occupancy[piece[0]] &= ~bit
+        self.occupied &= ~bit
+
+    def move_piece(self, piece: str, start_square: int, end_square: int) -> None:
+        move_bits = (1 << start_square) | (1 << end_square)
+        self.pieces[piece] ^= move_bits
+        self.occupancy[piece[0]] ^= move_bits
+        self.occupied ^= move_bits
+
+    def copy(self) -> "Bitboards":
+        bitboards = Bitboards()
+        bitboards.pieces = dict(self.pieces)
+        bitboards.occupancy = dict(self.occupancy)
+        bitboards.occupied = self.occupied
+        return bitboards
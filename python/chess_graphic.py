@@ -1,7 +1,7 @@
 import pygame as p
-import pygame.mixer as pm
+from python.assets import SOUNDS, get_display, get_piece_images
 
-from typing import Tuple, List
+from typing import Tuple, List, Optional
 
 class Chess_Graphics:
 
@@ -15,14 +15,16 @@ class Chess_Graphics:
         self.load_images()
         self.SOUNDS = {}
         self.load_sounds()
+        self.board_surface: Optional[p.Surface] = None
+        # What each square was last drawn with, (piece, highlighted), or None when it must be redrawn
+        self.drawn_squares: List[Optional[Tuple[str, bool]]] = [None] * (self.DIMENSION * self.DIMENSION)
 
     def load_images(self) -> None:
         """
         Load all the piece images for pygame graphics and store them in the IMAGES dictionary.
 
-        This function iterates through a list of chess piece identifiers, loads each corresponding image 
-        from the file system, scales it to the appropriate size, and stores it in the IMAGES dictionary 
-        with the piece identifier as the key.
+        This function takes the images from the shared asset cache, which loads and scales
+        them once per process, from the pre-scaled sprite atlas when there is one.
 
         Parameters:
         None
@@ -30,18 +32,14 @@ class Chess_Graphics:
         Returns:
         None
         """
-        pieces = ["bR", "bN", "bB", "bQ", "bK", "bP", "wR", "wN", "wB", "wQ", "wK", "wP"]
-        for piece in pieces:
-            image_path = f"../../assets/images/{piece}.png"
-            image = p.image.load(image_path)
-            self.IMAGES[piece] = p.transform.scale(image, (int(self.SQUARE_SIZE), int(self.SQUARE_SIZE)))
+        self.IMAGES = get_piece_images(int(self.SQUARE_SIZE))
 
     def load_sounds(self) -> None:
         """
         Load all the all the player interaction game sounds.
 
-        This function stores .wav files in the SOUNDS dictionary with a sound identifier as the key. Finishing by
-        iterating through the dictionary changing the sound volume. 
+        This function uses the shared sound cache, which reads each .wav file the first time
+        the sound is played rather than when the graphics are created.
 
         Parameters:
         None
@@ -49,12 +47,7 @@ class Chess_Graphics:
         Returns:
         None
         """
-        pm.init()
-        self.SOUNDS['click'] = pm.Sound("../../assets/sounds/click1.wav")
-        self.SOUNDS['error'] = pm.Sound("../../assets/sounds/click2Error.wav")
-
-        for sound in self.SOUNDS.values():
-            sound.set_volume(0.3)
+        self.SOUNDS = SOUNDS
     
     def play_sound(self, sound: bool) -> None:
         """
@@ -75,8 +68,9 @@ class Chess_Graphics:
         """
         Initialize the pygame display and create the game screen.
 
-        This function initialises all imported pygame modules, sets up the display window with the specified
-        width and height, and sets the window caption to "Chess: The Game". The created screen is then returned.
+        This function reuses the window already open, such as the main menu's, and only initialises pygame and
+        opens a window of the specified width and height when there is none. The window caption is set to
+        "Chess: The Game" and the screen is returned.
 
         Parameters:
         None
@@ -84,10 +78,11 @@ class Chess_Graphics:
         Returns:
         pygame.Surface: The initialized game screen.
         """
+        screen = get_display((self.WIDTH, self.HEIGHT), "Chess: The Game")
 
-        p.init()
-        screen = p.display.set_mode((self.WIDTH, self.HEIGHT))
-        p.display.set_caption("Chess: The Game")
+        # Convert the piece images to the display format now that there is a display
+        self.load_images()
+        self.invalidate()
 
         return screen
     
@@ -108,35 +103,38 @@ class Chess_Graphics:
 
         return clock
 
-    def draw_board(self, screen: p.Surface) -> None:
+    def get_board_surface(self) -> p.Surface:
         """
-        Draw the chess board on the given screen.
+        Return the empty chess board, rendering it the first time it is needed.
 
-        This function iterates through each square of the board, determining the color 
-        based on the position, and draws it on the screen using pygame's drawing 
-        functions.
+        This function draws the 64 squares once onto an off-screen surface, so the board
+        can be drawn, or partly redrawn, with a single blit afterwards.
 
         Parameters:
-        screen (pygame.Surface): The screen to draw the board on.
+        None
 
         Returns:
-        None
+        pygame.Surface: The rendered empty board.
         """
-        white = (255, 253, 208)
-        black = (139, 69, 19)
-        colours = [p.Color(white), p.Color(black)]
+        if self.board_surface is None:
+            white = (255, 253, 208)
+            black = (139, 69, 19)
+            colours = [p.Color(white), p.Color(black)]
 
-        for row in range(self.DIMENSION):
-            for column in range(self.DIMENSION):
-                colour = colours[(row + column) % 2]
-                p.draw.rect(screen, colour, p.Rect(column * self.SQUARE_SIZE, row * self.SQUARE_SIZE, self.SQUARE_SIZE, self.SQUARE_SIZE))
+            self.board_surface = p.Surface((self.WIDTH, self.HEIGHT))
+            for row in range(self.DIMENSION):
+                for column in range(self.DIMENSION):
+                    colour = colours[(row + column) % 2]
+                    p.draw.rect(self.board_surface, colour, p.Rect(column * self.SQUARE_SIZE, row * self.SQUARE_SIZE, self.SQUARE_SIZE, self.SQUARE_SIZE))
+
+        return self.board_surface
 
     def draw_pieces(self, screen: p.Surface, board: List[List[str]]) -> None:
         """
         Draw all the chess pieces on the board.
 
-        This function iterates through each square of the board and draws the 
-        appropriate piece image if a piece is present.
+        This function goes through the dirty-rectangle renderer, so only the squares that
+        changed since they were last drawn are repainted, without move highlights.
 
         Parameters:
         screen (pygame.Surface): The screen to draw the pieces on.
@@ -145,30 +143,80 @@ class Chess_Graphics:
         Returns:
         None
         """
+        self.draw_changes(screen, board, [])
+
+    def invalidate(self) -> None:
+        """
+        Mark every square as needing to be redrawn, e.g. after the window has been uncovered.
+
+        Parameters:
+        None
+
+        Returns:
+        None
+        """
+        self.drawn_squares = [None] * (self.DIMENSION * self.DIMENSION)
+
+    def draw_changes(self, screen: p.Surface, board: List[List[str]], guideline_list: List[Tuple[int, int]]) -> List[p.Rect]:
+        """
+        Redraw only the squares whose piece or highlight changed since they were last drawn.
+
+        This function compares each square with what it was last drawn with and repaints
+        the changed ones from the cached board surface, adding the highlight and the piece.
+
+        Parameters:
+        screen (pygame.Surface): The screen to draw on.
+        board (List[List[str]]): The current state of the chess board.
+        guideline_list (List[Tuple[int, int]]): A list of (row, column) tuples representing valid moves.
+
+        Returns:
+        List[pygame.Rect]: The areas of the screen that were redrawn.
+        """
+        highlight_colour = (176, 196, 222, 0.5)
+        board_surface = self.get_board_surface()
+        guidelines = set(guideline_list)
+        dirty_rects = []
+
         for row in range(self.DIMENSION):
             for column in range(self.DIMENSION):
-                piece = board[row][column]
-                if piece != "--":
-                    screen.blit(self.IMAGES[piece], p.Rect(column * self.SQUARE_SIZE, row * self.SQUARE_SIZE, self.SQUARE_SIZE, self.SQUARE_SIZE))
+                state = (board[row][column], (row, column) in guidelines)
+                index = row * self.DIMENSION + column
+                if self.drawn_squares[index] == state:
+                    continue
+
+                self.drawn_squares[index] = state
+                rect = p.Rect(column * self.SQUARE_SIZE, row * self.SQUARE_SIZE, self.SQUARE_SIZE, self.SQUARE_SIZE)
+
+                screen.blit(board_surface, rect, rect)
+                if state[1]:
+                    p.draw.rect(screen, highlight_colour, rect)
+                if state[0] != "--":
+                    screen.blit(self.IMAGES[state[0]], rect)
+
+                dirty_rects.append(rect)
+
+        return dirty_rects
 
-    def draw_guidelines(self, screen: p.Surface, guideline_list: List[Tuple[int, int]]) -> None:
+    def update_screen(self, screen: p.Surface, board: List[List[str]], guideline_list: List[Tuple[int, int]]) -> bool:
         """
-        Draw guidelines on the chess board to highlight valid moves.
-        This function takes a list of valid move positions and draws rectangles
-        on the specified squares to visually indicate possible moves to the player.
+        Draw the changed squares and push only those areas to the display.
+
+        Together with p.event.wait in the game loops, an unchanged board costs no drawing
+        and no display update at all.
 
         Parameters:
-        screen (p.Surface): The Pygame surface to draw on.
+        screen (pygame.Surface): The screen to draw on.
+        board (List[List[str]]): The current state of the chess board.
         guideline_list (List[Tuple[int, int]]): A list of (row, column) tuples representing valid moves.
 
         Returns:
-        None
+        bool: Whether anything was redrawn.
         """
-        highlight_colour = (176, 196, 222, 0.5)
+        dirty_rects = self.draw_changes(screen, board, guideline_list)
+        if dirty_rects:
+            p.display.update(dirty_rects)
 
-        for position in guideline_list:
-            row, column = position
-            p.draw.rect(screen, highlight_colour, p.Rect(column * self.SQUARE_SIZE, row * self.SQUARE_SIZE, self.SQUARE_SIZE, self.SQUARE_SIZE))
+        return bool(dirty_rects)
 
     def get_sqr(self, location: Tuple[int, int]) -> Tuple[int, int]:
         """
@@ -0,0 +1,496 @@
+from python.bitboard import PIECES, iter_squares
+from python.game_rules import KING_ATTACKS, KNIGHT_ATTACKS, bishop_attacks, queen_attacks, rook_attacks
+
+from typing import Dict, List, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Simple piece values, used for move ordering and exchange decisions
+PIECE_VALUES: Dict[str, int] = {"P": 100, "N": 320, "B": 330, "R": 500, "Q": 900, "K": 0}
+
+MG_VALUES: Dict[str, int] = {"P": 82, "N": 337, "B": 365, "R": 477, "Q": 1025, "K": 0}
+EG_VALUES: Dict[str, int] = {"P": 94, "N": 281, "B": 297, "R": 512, "Q": 936, "K": 0}
+
+# Game phase runs from 24 with all minor and major pieces on the board down to 0
+PHASE_WEIGHTS: Dict[str, int] = {"P": 0, "N": 1, "B": 1, "R": 2, "Q": 4, "K": 0}
+MAX_PHASE = 24
+
+# Piece-square tables from White's point of view, laid out like the board: a8 first, h1 last
+PAWN_MG = [
+      0,   0,   0,   0,   0,   0,   0,   0,
+     50,  50,  50,  50,  50,  50,  50,  50,
+     10,  10,  20,  30,  30,  20,  10,  10,
+      5,   5,  10,  25,  25,  10,   5,   5,
+      0,   0,   0,  20,  20,   0,   0,   0,
+      5,  -5, -10,   0,   0, -10,  -5,   5,
+      5,  10,  10, -20, -20,  10,  10,   5,
+      0,   0,   0,   0,   0,   0,   0,   0,
+]
+PAWN_EG = [
+      0,   0,   0,   0,   0,   0,   0,   0,
+     80,  80,  80,  80,  80,  80,  80,  80,
+     50,  50,  50,  50,  50,  50,  50,  50,
+     30,  30,  30,  30,  30,  30,  30,  30,
+     15,  15,  15,  15,  15,  15,  15,  15,
+      5,   5,   5,   5,   5,   5,   5,   5,
+      0,   0,   0,   0,   0,   0,   0,   0,
+      0,   0,   0,   0,   0,   0,   0,   0,
+]
+KNIGHT = [
+    -50, -40, -30, -30, -30, -30, -40, -50,
+    -40, -20,   0,   0,   0,   0, -20, -40,
+    -30,   0,  10,  15,  15,  10,   0, -30,
+    -30,   5,  15,  20,  20,  15,   5, -30,
+    -30,   0,  15,  20,  20,  15,   0, -30,
+    -30,   5,  10,  15,  15,  10,   5, -30,
+    -40, -20,   0,   5,   5,   0, -20, -40,
+    -50, -40, -30, -30, -30, -30, -40, -50,
+]
+BISHOP = [
+    -20, -10, -10, -10, -10, -10, -10, -20,
+    -10,   0,   0,   0,   0,   0,   0, -10,
+    -10,   0,   5,  10,  10,   5,   0, -10,
+    -10,   5,   5,  10,  10,   5,   5, -10,
+    -10,   0,  10,  10,  10,  10,   0, -10,
+    -10,  10,  10,  10,  10,  10,  10, -10,
+    -10,   5,   0,   0,   0,   0,   5, -10,
+    -20, -10, -10, -10, -10, -10, -10, -20,
+]
+ROOK = [
+      0,   0,   0,   0,   0,   0,   0,   0,
+      5,  10,  10,  10,  10,  10,  10,   5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+      0,   0,   0,   5,   5,   0,   0,   0,
+]
+QUEEN = [
+    -20, -10, -10,  -5,  -5, -10, -10, -20,
+    -10,   0,   0,   0,   0,   0,   0, -10,
+    -10,   0,   5,   5,   5,   5,   0, -10,
+     -5,   0,   5,   5,   5,   5,   0,  -5,
+      0,   0,   5,   5,   5,   5,   0,  -5,
+    -10,   5,   5,   5,   5,   5,   0, -10,
+    -10,   0,   5,   0,   0,   0,   0, -10,
+    -20, -10, -10,  -5,  -5, -10, -10, -20,
+]
+KING_MG = [
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -20, -30, -30, -40, -40, -30, -30, -20,
+    -10, -20, -20, -20, -20, -20, -20, -10,
+     20,  20,   0,   0,   0,   0,  20,  20,
+     20,  30,  10,   0,   0,  10,  30,  20,
+]
+KING_EG = [
+    -50, -40, -30, -20, -20, -30, -40, -50,
+    -30, -20, -10,   0,   0, -10, -20, -30,
+    -30, -10,  20,  30,  30,  20, -10, -30,
+    -30, -10,  30,  40,  40,  30, -10, -30,
+    -30, -10,  30,  40,  40,  30, -10, -30,
+    -30, -10,  20,  30,  30,  20, -10, -30,
+    -30, -30,   0,   0,   0,   0, -30, -30,
+    -50, -30, -30, -30, -30, -30, -30, -50,
+]
+
+PIECE_SQUARE_MG: Dict[str, List[int]] = {"P": PAWN_MG, "N": KNIGHT, "B": BISHOP, "R": ROOK, "Q": QUEEN, "K": KING_MG}
+PIECE_SQUARE_EG: Dict[str, List[int]] = {"P": PAWN_EG, "N": KNIGHT, "B": BISHOP, "R": ROOK, "Q": QUEEN, "K": KING_EG}
+
+
+def _signed_tables(values: Dict[str, int], piece_square: Dict[str, List[int]]) -> Dict[str, List[int]]:
+    # Material plus placement for every piece and square, positive for White and negative
+    # for Black. Black reads the White table mirrored top to bottom (square ^ 56).
+    tables = {}
+
+    for piece in PIECES:
+        kind = piece[1]
+        if piece[0] == "w":
+            tables[piece] = [values[kind] + piece_square[kind][square] for square in range(64)]
+        else:
+            tables[piece] = [-(values[kind] + piece_square[kind][square ^ 56]) for square in range(64)]
+
+    return tables
+
+
+MG_TABLES: Dict[str, List[int]] = _signed_tables(MG_VALUES, PIECE_SQUARE_MG)
+EG_TABLES: Dict[str, List[int]] = _signed_tables(EG_VALUES, PIECE_SQUARE_EG)
+
+MOBILITY_MG: Dict[str, int] = {"N": 4, "B": 5, "R": 2, "Q": 1}
+MOBILITY_EG: Dict[str, int] = {"N": 4, "B": 5, "R": 4, "Q": 2}
+
+DOUBLED_PAWN_MG, DOUBLED_PAWN_EG = -10, -20
+ISOLATED_PAWN_MG, ISOLATED_PAWN_EG = -10, -15
+# Passed pawn bonus by rows advanced from the pawn's start row (index 0 is the start row)
+PASSED_PAWN_MG = [0, 5, 10, 20, 35, 60, 0]
+PASSED_PAWN_EG = [0, 10, 20, 40, 70, 110, 0]
+
+# King safety is a middlegame term: pawns sheltering the king earn a bonus and every
+# attack by an enemy piece on the squares around the king costs a penalty
+SHIELD_NEAR, SHIELD_FAR = 12, 6
+KING_ZONE_ATTACK_WEIGHTS: Dict[str, int] = {"N": 2, "B": 2, "R": 3, "Q": 5}
+KING_ZONE_PENALTY = 6
+
+FILE_MASKS: List[int] = [0x0101010101010101 << file for file in range(8)]
+ADJACENT_FILE_MASKS: List[int] = [
+    (FILE_MASKS[file - 1] if file > 0 else 0) | (FILE_MASKS[file + 1] if file < 7 else 0) for file in range(8)
+]
+
+
+def _passed_pawn_mask(colour: str, square: int) -> int:
+    row, file = square >> 3, square & 7
+    rows = range(row) if colour == "w" else range(row + 1, 8)
+    mask = 0
+
+    for r in rows:
+        for f in (file - 1, file, file + 1):
+            if 0 <= f < 8:
+                mask |= 1 << (r * 8 + f)
+
+    return mask
+
+
+def _shield_weights(colour: str, king_square: int) -> List[int]:
+    row, file = king_square >> 3, king_square & 7
+    forward = -1 if colour == "w" else 1
+    weights = [0] * 64
+
+    for distance, bonus in ((1, SHIELD_NEAR), (2, SHIELD_FAR)):
+        r = row + forward * distance
+        if 0 <= r < 8:
+            for f in (file - 1, file, file + 1):
+                if 0 <= f < 8:
+                    weights[r * 8 + f] = bonus
+
+    return weights
+
+
+PASSED_PAWN_MASKS: Dict[str, List[int]] = {colour: [_passed_pawn_mask(colour, square) for square in range(64)] for colour in "wb"}
+SHIELD_WEIGHTS: Dict[str, List[List[int]]] = {colour: [_shield_weights(colour, square) for square in range(64)] for colour in "wb"}
+KING_ZONES: List[int] = [KING_ATTACKS[square] | (1 << square) for square in range(64)]
+
+SLIDER_ATTACKS = {"B": bishop_attacks, "R": rook_attacks, "Q": queen_attacks}
+
+
+def _pawn_structure(colour: str, pawns: int, enemy_pawns: int):
+    mg = eg = 0
+
+    for file in range(8):
+        on_file = (pawns & FILE_MASKS[file]).bit_count()
+        if on_file:
+            if on_file > 1:
+                mg += DOUBLED_PAWN_MG * (on_file - 1)
+                eg += DOUBLED_PAWN_EG * (on_file - 1)
+            if not pawns & ADJACENT_FILE_MASKS[file]:
+                mg += ISOLATED_PAWN_MG * on_file
+                eg += ISOLATED_PAWN_EG * on_file
+
+    passed_masks = PASSED_PAWN_MASKS[colour]
+    for square in iter_squares(pawns):
+        if not passed_masks[square] & enemy_pawns:
+            advanced = 6 - (square >> 3) if colour == "w" else (square >> 3) - 1
+            mg += PASSED_PAWN_MG[advanced]
+            eg += PASSED_PAWN_EG[advanced]
+
+    return mg, eg
+
+
+def _piece_activity(colour: str, pieces: Dict[str, int], own: int, occupied: int, enemy_king_zone: int):
+    mg = eg = 0
+    zone_attacks = 0
+
+    for kind in "NBRQ":
+        mobility_mg, mobility_eg = MOBILITY_MG[kind], MOBILITY_EG[kind]
+        zone_weight = KING_ZONE_ATTACK_WEIGHTS[kind]
+
+        for square in iter_squares(pieces[colour + kind]):
+            attacks = KNIGHT_ATTACKS[square] if kind == "N" else SLIDER_ATTACKS[kind](square, occupied)
+            mobility = (attacks & ~own).bit_count()
+            mg += mobility_mg * mobility
+            eg += mobility_eg * mobility
+            zone_attacks += zone_weight * (attacks & enemy_king_zone).bit_count()
+
+    return mg, eg, zone_attacks
+
+
+def evaluate_terms(game_state) -> Dict[str, int]:
+    """
+    Break the evaluation of a position into its terms, each scored for White.
+
+    Parameters:
+    game_state (Game_State): The position to score.
+
+    Returns:
+    Dict[str, int]: The middlegame and endgame value of every term plus the game phase.
+    """
+    bitboards = game_state.bitboards
+    pieces = bitboards.pieces
+    occupied = bitboards.occupied
+
+    # Material and piece-square sums are maintained incrementally by Game_State.make_move
+    terms = {"material_mg": game_state.mg_score, "material_eg": game_state.eg_score}
+
+    white_king = pieces["wK"].bit_length() - 1
+    black_king = pieces["bK"].bit_length() - 1
+
+    white = _piece_activity("w", pieces, bitboards.occupancy["w"], occupied, KING_ZONES[black_king])
+    black = _piece_activity("b", pieces, bitboards.occupancy["b"], occupied, KING_ZONES[white_king])
+    terms["mobility_mg"] = white[0] - black[0]
+    terms["mobility_eg"] = white[1] - black[1]
+
+    white_pawns = _pawn_structure("w", pieces["wP"], pieces["bP"])
+    black_pawns = _pawn_structure("b", pieces["bP"], pieces["wP"])
+    terms["pawns_mg"] = white_pawns[0] - black_pawns[0]
+    terms["pawns_eg"] = white_pawns[1] - black_pawns[1]
+
+    white_shield = sum(SHIELD_WEIGHTS["w"][white_king][square] for square in iter_squares(pieces["wP"]))
+    black_shield = sum(SHIELD_WEIGHTS["b"][black_king][square] for square in iter_squares(pieces["bP"]))
+    terms["king_safety_mg"] = white_shield - black_shield - KING_ZONE_PENALTY * (black[2] - white[2])
+    terms["king_safety_eg"] = 0
+
+    terms["phase"] = min(game_state.phase, MAX_PHASE)
+
+    return terms
+
+
+def evaluate(game_state) -> int:
+    """
+    Score a position in centipawns from the point of view of the side to move.
+
+    Material and piece-square tables, mobility, pawn structure and king safety each
+    give a middlegame and an endgame score, blended by how much material is left.
+
+    Parameters:
+    game_state (Game_State): The position to score.
+
+    Returns:
+    int: The score, positive when the side to move is better.
+    """
+    terms = evaluate_terms(game_state)
+    phase = terms.pop("phase")
+
+    mg = sum(value for name, value in terms.items() if name.endswith("_mg"))
+    eg = sum(value for name, value in terms.items() if name.endswith("_eg"))
+    score = (mg * phase + eg * (MAX_PHASE - phase)) // MAX_PHASE
+
+    return score if game_state.player_colour == "w" else -score
+
+
+# Batched evaluation ---------------------------------------------------------------
+#
+# Positions are stacked as an (N, 64) int8 array of piece codes in board square order:
+# 0 for an empty square, 1-6 for White P N B R Q K and 7-12 for Black P N B R Q K.
+
+PIECE_CODES: Dict[str, int] = {piece: code for code, piece in enumerate(PIECES, start=1)}
+
+
+def encode_board(game_state) -> List[int]:
+    """
+    Encode a position as 64 piece codes for the batched evaluator.
+
+    Parameters:
+    game_state (Game_State): The position to encode.
+
+    Returns:
+    List[int]: The piece code of every square, a8 first.
+    """
+    codes = [0] * 64
+
+    for piece, bitboard in game_state.bitboards.pieces.items():
+        code = PIECE_CODES[piece]
+        for square in iter_squares(bitboard):
+            codes[square] = code
+
+    return codes
+
+
+def stack_boards(game_states: Sequence) -> "np.ndarray":
+    """
+    Stack several positions into the (N, 64) int8 array taken by evaluate_batch.
+
+    Parameters:
+    game_states (Sequence[Game_State]): The positions to stack.
+
+    Returns:
+    np.ndarray: The stacked piece codes.
+    """
+    _require_numpy()
+    return np.array([encode_board(game_state) for game_state in game_states], dtype=np.int8).reshape(-1, 64)
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError("Batched evaluation needs NumPy, install it with 'pip install numpy'")
+
+
+_batch_tables = None
+
+# Positions evaluated per pass, bounding the size of the temporary arrays
+BATCH_CHUNK = 2048
+
+
+def _build_batch_tables() -> dict:
+    # Target square of every step along a ray from every square, -1 once the ray leaves the board
+    def ray_targets(dr: int, dc: int, steps: int) -> "np.ndarray":
+        table = np.full((steps, 64), -1, dtype=np.intp)
+        for square in range(64):
+            for step in range(1, steps + 1):
+                r, c = (square >> 3) + dr * step, (square & 7) + dc * step
+                if not (0 <= r < 8 and 0 <= c < 8):
+                    break
+                table[step - 1, square] = r * 8 + c
+        return table
+
+    # Pawn terms are matrix products; float32 keeps them on the BLAS path and is exact for these counts
+    def bit_matrix(masks: List[int]) -> "np.ndarray":
+        return np.array([[(mask >> square) & 1 for square in range(64)] for mask in masks], dtype=np.float32)
+
+    code_tables = np.zeros((2, 13, 64), dtype=np.int32)
+    for piece, code in PIECE_CODES.items():
+        code_tables[0, code] = MG_TABLES[piece]
+        code_tables[1, code] = EG_TABLES[piece]
+
+    def piece_weights(weights: Dict[str, int], signed: bool = False) -> "np.ndarray":
+        table = np.zeros(13, dtype=np.int32)
+        for piece, code in PIECE_CODES.items():
+            sign = -1 if signed and piece[0] == "b" else 1
+            table[code] = sign * weights.get(piece[1], 0)
+        return table
+
+    return {
+        "code_tables": code_tables,
+        "phase": piece_weights(PHASE_WEIGHTS),
+        "mobility_mg": piece_weights(MOBILITY_MG, signed=True),
+        "mobility_eg": piece_weights(MOBILITY_EG, signed=True),
+        "zone_weight": piece_weights(KING_ZONE_ATTACK_WEIGHTS, signed=True),
+        "straight": [ray_targets(dr, dc, 7) for dr, dc in ((-1, 0), (0, 1), (1, 0), (0, -1))],
+        "diagonal": [ray_targets(dr, dc, 7) for dr, dc in ((-1, 1), (1, 1), (1, -1), (-1, -1))],
+        "knight": [ray_targets(dr, dc, 1) for dr, dc in ((-2, 1), (-2, -1), (2, 1), (2, -1), (1, 2), (-1, 2), (1, -2), (-1, -2))],
+        "king_zone": bit_matrix(KING_ZONES).astype(np.int8),
+        "passed": {colour: bit_matrix(PASSED_PAWN_MASKS[colour]).T for colour in "wb"},
+        "shield": {colour: np.array(SHIELD_WEIGHTS[colour], dtype=np.int32) for colour in "wb"},
+        "passed_mg": {colour: _passed_by_square(colour, PASSED_PAWN_MG) for colour in "wb"},
+        "passed_eg": {colour: _passed_by_square(colour, PASSED_PAWN_EG) for colour in "wb"},
+        "files": np.array([[1 if square & 7 == file else 0 for file in range(8)] for square in range(64)], dtype=np.float32),
+        "adjacent": np.array([[1 if abs(a - b) == 1 else 0 for b in range(8)] for a in range(8)], dtype=np.float32),
+        "colour_of_code": np.array([0] + [1] * 6 + [2] * 6, dtype=np.int8),
+        "kind_of_code": np.array([0] + list(range(6)) * 2, dtype=np.int8),
+    }
+
+
+def _passed_by_square(colour: str, bonus: List[int]) -> "np.ndarray":
+    table = np.zeros(64, dtype=np.int32)
+    for square in range(8, 56):
+        advanced = 6 - (square >> 3) if colour == "w" else (square >> 3) - 1
+        table[square] = bonus[advanced]
+    return table
+
+
+def evaluate_batch(boards: "np.ndarray", black_to_move: Optional["np.ndarray"] = None) -> "np.ndarray":
+    """
+    Score many positions at once with array operations, matching evaluate() exactly.
+
+    Parameters:
+    boards (np.ndarray): An (N, 64) array of piece codes, see encode_board and stack_boards.
+    black_to_move (Optional[np.ndarray]): N booleans; when given, scores are from the side
+    to move's point of view, otherwise from White's.
+
+    Returns:
+    np.ndarray: The N scores in centipawns.
+    """
+    _require_numpy()
+    global _batch_tables
+    if _batch_tables is None:
+        _batch_tables = _build_batch_tables()
+
+    boards = np.asarray(boards, dtype=np.int8).reshape(-1, 64)
+    scores = np.concatenate(
+        [_evaluate_chunk(boards[start:start + BATCH_CHUNK], _batch_tables) for start in range(0, len(boards), BATCH_CHUNK)]
+    ) if len(boards) else np.zeros(0, dtype=np.int64)
+
+    if black_to_move is not None:
+        scores = np.where(np.asarray(black_to_move, dtype=bool), -scores, scores)
+
+    return scores
+
+
+def _evaluate_chunk(boards: "np.ndarray", tables: dict) -> "np.ndarray":
+
+    count = len(boards)
+    codes = boards.astype(np.intp)
+    squares = np.arange(64)
+
+    mg = tables["code_tables"][0][codes, squares].sum(axis=1)
+    eg = tables["code_tables"][1][codes, squares].sum(axis=1)
+    phase = np.minimum(tables["phase"][codes].sum(axis=1), MAX_PHASE)
+
+    white_king = np.argmax(boards == PIECE_CODES["wK"], axis=1)
+    black_king = np.argmax(boards == PIECE_CODES["bK"], axis=1)
+
+    # Flattened per-square colour (0 empty, 1 White, 2 Black) and king zone membership
+    # (1 around the White king, 2 around the Black king) for every position
+    colours = tables["colour_of_code"][codes].reshape(-1)
+    zones = (tables["king_zone"][white_king] | (tables["king_zone"][black_king] << 1)).reshape(-1)
+    kinds = tables["kind_of_code"][codes].reshape(-1)
+
+    # Mobility and king zone attacks are walked per piece rather than per square, since
+    # only a handful of the 64 squares in each position hold a knight or slider
+    for directions, movers in (
+        (tables["straight"], (kinds == 3) | (kinds == 4)),
+        (tables["diagonal"], (kinds == 2) | (kinds == 4)),
+        (tables["knight"], kinds == 1),
+    ):
+        locations = np.flatnonzero(movers)
+        positions = locations >> 6
+        start_squares = locations & 63
+        base = locations - start_squares
+        mover_colours = colours[locations]
+        enemy_zone = 3 - mover_colours
+        mobility = np.zeros(len(locations), dtype=np.int32)
+        zone_hits = np.zeros(len(locations), dtype=np.int32)
+
+        for steps in directions:
+            open_ray = np.ones(len(locations), dtype=bool)
+            for step_targets in steps:
+                targets = step_targets[start_squares]
+                attacked = open_ray & (targets >= 0)
+                if not attacked.any():
+                    break
+                target_locations = base + np.maximum(targets, 0)
+                target_colours = colours[target_locations]
+                mobility += attacked & (target_colours != mover_colours)
+                zone_hits += attacked & ((zones[target_locations] & enemy_zone) != 0)
+                open_ray = attacked & (target_colours == 0)
+
+        mover_codes = codes.reshape(-1)[locations]
+        mg += np.bincount(positions, tables["mobility_mg"][mover_codes] * mobility, minlength=count).astype(np.int64)
+        eg += np.bincount(positions, tables["mobility_eg"][mover_codes] * mobility, minlength=count).astype(np.int64)
+        mg += KING_ZONE_PENALTY * np.bincount(positions, tables["zone_weight"][mover_codes] * zone_hits, minlength=count).astype(np.int64)
+
+    white_pawns = (boards == PIECE_CODES["wP"]).astype(np.float32)
+    black_pawns = (boards == PIECE_CODES["bP"]).astype(np.float32)
+
+    for colour, pawns, enemy_pawns, king, pawn_sign in (
+        ("w", white_pawns, black_pawns, white_king, 1),
+        ("b", black_pawns, white_pawns, black_king, -1),
+    ):
+        file_counts = pawns @ tables["files"]
+        doubled = np.maximum(file_counts - 1, 0).sum(axis=1).astype(np.int64)
+        isolated = (file_counts * ((file_counts @ tables["adjacent"]) == 0)).sum(axis=1).astype(np.int64)
+        passed = (pawns * ((enemy_pawns @ tables["passed"][colour]) == 0)).astype(np.int32)
+        shield = (pawns.astype(np.int32) * tables["shield"][colour][king]).sum(axis=1)
+
+        mg += pawn_sign * (
+            DOUBLED_PAWN_MG * doubled + ISOLATED_PAWN_MG * isolated + (passed * tables["passed_mg"][colour]).sum(axis=1) + shield
+        )
+        eg += pawn_sign * (
+            DOUBLED_PAWN_EG * doubled + ISOLATED_PAWN_EG * isolated + (passed * tables["passed_eg"][colour]).sum(axis=1)
+        )
+
+    return (mg * phase + eg * (MAX_PHASE - phase)) // MAX_PHASE
@@ -2,42 +2,91 @@ import os
 import pygame as p
 from python.chess_graphic import Chess_Graphics
 from python.game_state import Game_State
+from python.move_worker import MOVES_READY, SEARCH_DONE, SEARCH_INFO, Move_Worker
+from python.opening_book import DEFAULT_BOOK, Opening_Book
+from python.parallel_search import Parallel_Search
+from python.uci import format_score
 
-def one_player():
-    os.chdir(os.path.dirname(os.path.abspath(__file__)))
-    
-    graphics = Chess_Graphics()
-    screen = graphics.create_screen()
-    clock = graphics.create_clock()
-    
-    game_state = Game_State()
-    game_state.set_valid_moves()
-    move_made = False
-    
-    running = True
-    while running:
-
-        for e in p.event.get():
-
-            if move_made:
-                game_state.set_valid_moves()
-                game_state.remove_illegal_moves()
-                move_made = False
-
-            if e.type == p.QUIT:
-                running = False
-            
-            elif e.type == p.MOUSEBUTTONDOWN:
-                location = p.mouse.get_pos()
-                clicked_square = graphics.get_sqr(location)
-                move_made = game_state.validate_clicked_sqrs(clicked_square)
-                graphics.SOUNDS["click"].play()
- 
-        graphics.draw_board(screen)
-        graphics.draw_guidelines(screen, game_state.create_guidelines())
-        graphics.draw_pieces(screen, game_state.board)
-        
-        clock.tick(graphics.MAX_FPS)
-        p.display.flip()
-    
-    p.quit()
\ No newline at end of file
+CAPTION = "Chess: The Game"
+
+def one_player(computer_colour: str = "b", think_time: float = 1.0, threads: int = 1, book_path: str = DEFAULT_BOOK):
+    book = Opening_Book(book_path) if os.path.exists(book_path) else None
+
+    search = worker = None
+    try:
+        # Start the helper processes before the graphics; they only search and never touch the window
+        search = Parallel_Search(threads)
+
+        graphics = Chess_Graphics()
+        screen = graphics.create_screen()
+        clock = graphics.create_clock()
+
+        # Move generation and thinking run on the worker so the window keeps drawing meanwhile
+        worker = Move_Worker(search, book)
+
+        game_state = Game_State()
+
+        def next_turn() -> None:
+            if game_state.player_colour == computer_colour:
+                worker.request_search(game_state, think_time)
+                p.display.set_caption(f"{CAPTION} - thinking")
+            else:
+                worker.request_moves(game_state)
+                p.display.set_caption(CAPTION)
+
+        next_turn()
+
+        running = True
+        while running:
+
+            # Sleep until something happens; the worker's answers arrive as events too
+            for e in [p.event.wait()] + p.event.get():
+
+                if e.type == p.QUIT:
+                    running = False
+
+                elif e.type in (p.VIDEOEXPOSE, p.WINDOWEXPOSED):
+                    graphics.invalidate()
+
+                elif e.type == p.MOUSEBUTTONDOWN and game_state.player_colour != computer_colour:
+                    location = p.mouse.get_pos()
+                    clicked_square = graphics.get_sqr(location)
+                    graphics.SOUNDS["click"].play()
+                    if game_state.validate_clicked_sqrs(clicked_square):
+                        next_turn()
+
+                elif e.type == p.KEYDOWN and e.key == p.K_z:
+                    # Take back the computer's reply together with the player's move, abandoning any search
+                    worker.cancel()
+                    game_state.undo(refresh_moves=False)
+                    if game_state.player_colour == computer_colour:
+                        game_state.undo(refresh_moves=False)
+                    next_turn()
+
+                elif e.type == MOVES_READY and worker.is_current(e):
+                    game_state.apply_valid_moves(e.legal_moves, e.in_check, e.ending)
+                    if e.ending is not None:
+                        p.display.set_caption(f"{CAPTION} - {e.ending}, {game_state.game_result(e.ending)}")
+
+                elif e.type == SEARCH_INFO and worker.is_current(e):
+                    p.display.set_caption(f"{CAPTION} - thinking: depth {e.depth}, score {format_score(e.score)}, {e.nodes} nodes")
+
+                elif e.type == SEARCH_DONE and worker.is_current(e):
+                    if e.ending is not None:
+                        p.display.set_caption(f"{CAPTION} - {e.ending}, {game_state.game_result(e.ending)}")
+                    elif e.move is not None:
+                        game_state.make_move(e.move)
+                        next_turn()
+
+            # Only squares that changed are redrawn and pushed to the display
+            graphics.update_screen(screen, game_state.board, game_state.create_guidelines())
+
+            clock.tick(graphics.MAX_FPS)
+    finally:
+        # Errors return to the menu, so the helper processes and shared memory must not outlive the mode
+        if worker is not None:
+            worker.close()
+        if search is not None:
+            search.close()
+        if book is not None:
+            book.close()
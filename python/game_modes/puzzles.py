@@ -0,0 +1,107 @@
+import os
+import pygame as p
+from python.bitboard import square_location
+from python.chess_graphic import Chess_Graphics
+from python.game_state import Game_State
+from python.move import move_to_uci, square_from_name
+from python.pgn import move_from_uci
+from python.puzzle_db import DEFAULT_DATABASE, NULL_MOVE, Puzzle, Puzzle_Database
+
+from typing import Optional
+
+def start_puzzle(puzzle: Puzzle) -> Game_State:
+    # The stored position is before the opponent's move, which sets up the puzzle; a null
+    # move means the puzzle starts from the stored position itself
+    game_state = Game_State(puzzle.fen)
+    if puzzle.moves[0] != NULL_MOVE:
+        game_state.make_move(move_from_uci(game_state, puzzle.moves[0]))
+    game_state.set_valid_moves()
+
+    p.display.set_caption(f"Puzzle {puzzle.puzzle_id} ({puzzle.rating}) - {'White' if game_state.player_colour == 'w' else 'Black'} to move")
+
+    return game_state
+
+def puzzle_mode(min_rating: int = 0, max_rating: int = 4000, theme: Optional[str] = None, database_path: str = DEFAULT_DATABASE):
+    if not os.path.exists(database_path):
+        print(f"No puzzle database at {database_path}, create one with: python -m python.puzzle_db import lichess_db_puzzle.csv")
+        return
+
+    database = Puzzle_Database(database_path, read_only=True)
+    puzzle = database.random_puzzle(min_rating, max_rating, theme)
+    if puzzle is None:
+        print("No puzzles match the chosen rating and theme")
+        database.close()
+        return
+
+    graphics = Chess_Graphics()
+    screen = graphics.create_screen()
+    clock = graphics.create_clock()
+
+    game_state = start_puzzle(puzzle)
+    # Index of the next move of the solution to be played
+    solution_index = 1
+    move_made = False
+
+    running = True
+    while running:
+
+        # Sleep until something happens instead of redrawing at a fixed rate
+        for e in [p.event.wait()] + p.event.get():
+
+            if e.type == p.QUIT:
+                running = False
+
+            elif e.type in (p.VIDEOEXPOSE, p.WINDOWEXPOSED):
+                graphics.invalidate()
+
+            elif e.type == p.MOUSEBUTTONDOWN and solution_index < len(puzzle.moves):
+                location = p.mouse.get_pos()
+                clicked_square = graphics.get_sqr(location)
+                move_made = game_state.validate_clicked_sqrs(clicked_square)
+
+            elif e.type == p.KEYDOWN and e.key in (p.K_n, p.K_r):
+                # N moves on to a new puzzle, R starts the current one again
+                if e.key == p.K_n:
+                    puzzle = database.random_puzzle(min_rating, max_rating, theme) or puzzle
+                game_state = start_puzzle(puzzle)
+                solution_index = 1
+
+            elif e.type == p.KEYDOWN and e.key == p.K_h and solution_index < len(puzzle.moves):
+                # Select the piece the solution moves so its moves are highlighted
+                game_state.clicked_squares[:] = [square_location(square_from_name(puzzle.moves[solution_index][:2]))]
+
+        if move_made:
+            move_made = False
+            played = game_state.undo_stack[-1][0]
+            expected = puzzle.moves[solution_index]
+            game_state.set_valid_moves()
+            mated = game_state.checkmate
+
+            # Any mating move solves the puzzle, as does the expected move with the piece chosen by the board
+            if mated or move_to_uci(played)[:4] == expected[:4]:
+                if not mated and move_to_uci(played) != expected:
+                    game_state.unmake_move()
+                    game_state.make_move(move_from_uci(game_state, expected))
+
+                graphics.SOUNDS["click"].play()
+                solution_index += 1
+
+                if mated or solution_index >= len(puzzle.moves):
+                    solution_index = len(puzzle.moves)
+                    game_state.white_moves.clear()
+                    game_state.black_moves.clear()
+                    p.display.set_caption(f"Puzzle {puzzle.puzzle_id} ({puzzle.rating}) - solved, press N for the next one")
+                else:
+                    game_state.make_move(move_from_uci(game_state, puzzle.moves[solution_index]))
+                    solution_index += 1
+                    game_state.set_valid_moves()
+            else:
+                graphics.SOUNDS["error"].play()
+                game_state.undo()
+
+        # Only squares that changed are redrawn and pushed to the display
+        graphics.update_screen(screen, game_state.board, game_state.create_guidelines())
+
+        clock.tick(graphics.MAX_FPS)
+
+    database.close()
@@ -1,43 +1,56 @@
-import os
 import pygame as p
 from python.chess_graphic import Chess_Graphics
 from python.game_state import Game_State
+from python.move_worker import MOVES_READY, Move_Worker
+
+CAPTION = "Chess: The Game"
 
 def two_player():
-    os.chdir(os.path.dirname(os.path.abspath(__file__)))
-    
     graphics = Chess_Graphics()
     screen = graphics.create_screen()
     clock = graphics.create_clock()
     
+    # Legal moves are generated on the worker so the window keeps drawing meanwhile
+    worker = Move_Worker()
+
     game_state = Game_State()
-    game_state.set_valid_moves()
-    move_made = False
+    worker.request_moves(game_state)
     
     running = True
     while running:
 
-        for e in p.event.get():
-
-            if move_made:
-                game_state.set_valid_moves()
-                game_state.remove_illegal_moves()
-                move_made = False
+        # Sleep until something happens; the worker's answers arrive as events too
+        for e in [p.event.wait()] + p.event.get():
 
             if e.type == p.QUIT:
                 running = False
+
+            elif e.type in (p.VIDEOEXPOSE, p.WINDOWEXPOSED):
+                graphics.invalidate()
             
             elif e.type == p.MOUSEBUTTONDOWN:
                 location = p.mouse.get_pos()
                 clicked_square = graphics.get_sqr(location)
-                move_made = game_state.validate_clicked_sqrs(clicked_square)
                 graphics.SOUNDS["click"].play()
+                if game_state.validate_clicked_sqrs(clicked_square):
+                    worker.request_moves(game_state)
+
+            elif e.type == p.KEYDOWN and e.key == p.K_z:
+                worker.cancel()
+                game_state.undo(refresh_moves=False)
+                worker.request_moves(game_state)
+                p.display.set_caption(CAPTION)
+
+            elif e.type == MOVES_READY and worker.is_current(e):
+                game_state.apply_valid_moves(e.legal_moves, e.in_check, e.ending)
+                if e.ending is not None:
+                    p.display.set_caption(f"{CAPTION} - {e.ending}, {game_state.game_result(e.ending)}")
+                else:
+                    p.display.set_caption(CAPTION)
  
-        graphics.draw_board(screen)
-        graphics.draw_guidelines(screen, game_state.create_guidelines())
-        graphics.draw_pieces(screen, game_state.board)
+        # Only squares that changed are redrawn and pushed to the display
+        graphics.update_screen(screen, game_state.board, game_state.create_guidelines())
         
         clock.tick(graphics.MAX_FPS)
-        p.display.flip()
     
-    p.quit()
\ No newline at end of file
+    worker.close()
@@ -1,250 +1,416 @@
-from typing import Callable, Dict, Tuple, List, Union
+from python.bitboard import (
+    FILE_A, FILE_H, FULL_BOARD, RANK_1, RANK_8, Bitboards, iter_squares, lsb, square_index, square_location,
+)
+from python.move import CAPTURE, DOUBLE_PAWN_PUSH, EN_PASSANT, KING_CASTLE, PROMOTION, PROMOTION_CAPTURE, QUEEN_CASTLE
 
-class Game_Rules:
-
-    def __init__(self) -> None:  
-
-        self.directions: Dict[str, Tuple[int, int]] = {
-            "N": (-1, 0),
-            "NE": (-1, 1),
-            "E": (0, 1),
-            "SE": (1, 1),
-            "S": (1, 0),
-            "SW": (1, -1),
-            "W": (0, -1),
-            "NW": (-1, -1),
-        }
-        self.reverse_directions = {v: k for k, v in self.directions.items()}
-        self.piece_directions: Dict[str, List[str]] = {
-            "P": None,
-            "R": ["N", "E", "S", "W"],
-            "N": None,
-            "B": ["NE", "SE", "SW", "NW"],
-            "Q": ["N", "NE", "E", "SE", "S", "SW", "W", "NW"],
-            "K": ["N", "NE", "E", "SE", "S", "SW", "W", "NW"],
-        }
-
-    def get_piece_move(self, piece: str, start_sqr: Tuple[int, int], opponent_colour: str, board: List[List[str]]) -> List[Tuple[int, int]]:
-
-        valid_piece_moves = []
-
-        if piece == "K":
-            valid_piece_moves = self.get_king_moves(start_sqr, opponent_colour, board)
+from typing import Dict, Tuple, List, Optional
 
-        elif piece == "N":
-            valid_piece_moves = self.get_knight_moves(start_sqr, opponent_colour, board)
-        
-        elif piece == "P":
-            valid_piece_moves = self.get_pawn_moves(start_sqr, opponent_colour, board)
-        
-        else:
-            for dir in self.piece_directions[piece]:
-                valid_piece_moves.extend(self.get_direction_moves(dir, start_sqr, opponent_colour, board))
+ROOK_DIRECTIONS: List[Tuple[int, int]] = [(-1, 0), (0, 1), (1, 0), (0, -1)]
+BISHOP_DIRECTIONS: List[Tuple[int, int]] = [(-1, 1), (1, 1), (1, -1), (-1, -1)]
+KNIGHT_OFFSETS: List[Tuple[int, int]] = [(-2, 1), (-2, -1), (2, 1), (2, -1), (1, 2), (-1, 2), (1, -2), (-1, -2)]
+KING_OFFSETS: List[Tuple[int, int]] = ROOK_DIRECTIONS + BISHOP_DIRECTIONS
 
-        return valid_piece_moves
 
-    def get_direction_moves(self, dir: str, start_sqr: Tuple[int, int], opponent_colour: str, board: List[List[str]]) -> List[Tuple[int, int]]:
+def _offset_attacks(square: int, offsets: List[Tuple[int, int]]) -> int:
+    row, column = square >> 3, square & 7
+    attacks = 0
 
-        valid_direction_moves = []
+    for dr, dc in offsets:
+        r, c = row + dr, column + dc
+        if 0 <= r < 8 and 0 <= c < 8:
+            attacks |= 1 << (r * 8 + c)
 
-        r, c = start_sqr[0], start_sqr[1]
-        dr, dc = self.directions[dir]
+    return attacks
 
-        row, column = r + dr, c + dc
 
-        while 0 <= row < len(board) and 0 <= column < len(board):
-            if board[row][column] == "--":
-                end_sqr = (row, column)
-                valid_direction_moves.append(end_sqr)
+def _ray_attacks(square: int, occupied: int, directions: List[Tuple[int, int]]) -> int:
+    row, column = square >> 3, square & 7
+    attacks = 0
 
-            elif board[row][column][0] == opponent_colour:
-                end_sqr = (row, column)
-                valid_direction_moves.append(end_sqr)
-                self.pins(dir, end_sqr, opponent_colour, board)
-                break
-            else:
+    for dr, dc in directions:
+        r, c = row + dr, column + dc
+        while 0 <= r < 8 and 0 <= c < 8:
+            bit = 1 << (r * 8 + c)
+            attacks |= bit
+            if occupied & bit:
                 break
+            r += dr
+            c += dc
 
-            row += dr
-            column += dc
-        
-        return valid_direction_moves
+    return attacks
 
-    def get_king_moves(self, start_sqr: Tuple[int, int], opponent_colour: str, board: List[List[str]]) -> List[Tuple[int, int]]:
-        
-        #  ! King Location, Needs to be moved to Game State
-        if opponent_colour == "w":
-            self.white_king_location = start_sqr
-        else:
-            self.black_king_location = start_sqr
 
-        directions = self.piece_directions["K"]
-        r, c = start_sqr[0], start_sqr[1]
-        
-        valid_king_moves = []
+def _relevant_occupancy(square: int, directions: List[Tuple[int, int]]) -> int:
+    # The edge square of each ray never changes the attack set, so it is left out of the mask.
+    row, column = square >> 3, square & 7
+    mask = 0
 
-        for dir in directions:
-            dr, dc = self.directions[dir]
-            row, column = r + dr, c + dc
+    for dr, dc in directions:
+        r, c = row + dr, column + dc
+        while 0 <= r + dr < 8 and 0 <= c + dc < 8:
+            mask |= 1 << (r * 8 + c)
+            r += dr
+            c += dc
 
-            if 0 <= row < len(board) and 0 <= column < len(board):
-                if board[row][column] == "--" or board[row][column][0] == opponent_colour:
-                    
-                    end_sqr = (row, column)
-                    valid_king_moves.append(end_sqr)
-        
-        return valid_king_moves
+    return mask
 
-    def get_knight_moves(self, start_sqr: Tuple[int, int], opponent_colour: str, board: List[List[str]]) -> List[Tuple[int, int]]:
-        
-        directions = [(-2, 1), (-2, -1), (2, 1), (2, -1), (1, 2), (-1, 2), (1, -2), (-1, -2)]
-        r, c = start_sqr[0], start_sqr[1]
 
-        valid_knight_moves = []
+def _sliding_table(square: int, mask: int, directions: List[Tuple[int, int]]) -> Dict[int, int]:
+    # Enumerate every blocker subset of the mask (Carry-Rippler) and store its attack set,
+    # so a lookup is a single dict access keyed by the masked occupancy.
+    table = {}
+    subset = 0
 
-        for dr, dc in directions:
-            row, column = r + dr, c + dc
+    while True:
+        table[subset] = _ray_attacks(square, subset, directions)
+        subset = (subset - mask) & mask
+        if subset == 0:
+            break
 
-            if 0 <= row < len(board) and 0 <= column < len(board):
-                if board[row][column] == "--" or board[row][column][0] == opponent_colour:
-                    end_sqr = (row, column)
-                    valid_knight_moves.append(end_sqr)
+    return table
 
-        return valid_knight_moves
 
-    def get_pawn_moves(self, start_sqr: Tuple[int, int], opponent_colour: str, board: List[List[str]]) -> List[Tuple[int, int]]:
-        
-        r, c = start_sqr[0], start_sqr[1]
-        curr_turn = "b" if opponent_colour == "w" else "w"
+KNIGHT_ATTACKS: List[int] = [_offset_attacks(square, KNIGHT_OFFSETS) for square in range(64)]
+KING_ATTACKS: List[int] = [_offset_attacks(square, KING_OFFSETS) for square in range(64)]
+PAWN_ATTACKS: Dict[str, List[int]] = {
+    "w": [_offset_attacks(square, [(-1, -1), (-1, 1)]) for square in range(64)],
+    "b": [_offset_attacks(square, [(1, -1), (1, 1)]) for square in range(64)],
+}
 
-        valid_pawn_moves = []
+ROOK_MASKS: List[int] = [_relevant_occupancy(square, ROOK_DIRECTIONS) for square in range(64)]
+BISHOP_MASKS: List[int] = [_relevant_occupancy(square, BISHOP_DIRECTIONS) for square in range(64)]
+ROOK_TABLES: List[Dict[int, int]] = [_sliding_table(square, ROOK_MASKS[square], ROOK_DIRECTIONS) for square in range(64)]
+BISHOP_TABLES: List[Dict[int, int]] = [_sliding_table(square, BISHOP_MASKS[square], BISHOP_DIRECTIONS) for square in range(64)]
 
-        self.promote_pawn(start_sqr, opponent_colour, board)
 
-        if curr_turn == "w":
-            if board[r - 1][c] == "--":
-                valid_pawn_moves.append((r - 1, c))
+def rook_attacks(square: int, occupied: int) -> int:
+    return ROOK_TABLES[square][occupied & ROOK_MASKS[square]]
 
-                if r == 6 and board[r - 2][c] == "--":
-                    valid_pawn_moves.append((r - 2, c))
 
-            if c - 1 >= 0:
-                if board[r - 1][c - 1][0] == opponent_colour:
-                    valid_pawn_moves.append((r - 1, c - 1))
+def bishop_attacks(square: int, occupied: int) -> int:
+    return BISHOP_TABLES[square][occupied & BISHOP_MASKS[square]]
 
-            if c + 1 <= len(board) - 1:
-                if board[r - 1][c + 1][0] == opponent_colour:
-                    valid_pawn_moves.append((r - 1, c + 1))
 
-        elif r + 1 < 8:
-            if board[r + 1][c] == "--":
-                valid_pawn_moves.append((r + 1, c))
+def queen_attacks(square: int, occupied: int) -> int:
+    return ROOK_TABLES[square][occupied & ROOK_MASKS[square]] | BISHOP_TABLES[square][occupied & BISHOP_MASKS[square]]
 
-                if r == 1 and board[r + 2][c] == "--":
-                    valid_pawn_moves.append((r + 2, c))
+def _between(square_a: int, square_b: int) -> int:
+    bit_a, bit_b = 1 << square_a, 1 << square_b
 
-            if c - 1 >= 0:
-                if board[r + 1][c - 1][0] == opponent_colour:
-                    valid_pawn_moves.append((r + 1, c - 1))
+    if rook_attacks(square_a, 0) & bit_b:
+        return rook_attacks(square_a, bit_b) & rook_attacks(square_b, bit_a)
 
-            if c + 1 <= len(board) - 1:
-                if board[r + 1][c + 1][0] == opponent_colour:
-                    valid_pawn_moves.append((r + 1, c + 1))
+    if bishop_attacks(square_a, 0) & bit_b:
+        return bishop_attacks(square_a, bit_b) & bishop_attacks(square_b, bit_a)
 
-        return valid_pawn_moves
+    return 0
 
-    def promote_pawn(self, promote_sqr: Tuple[int, int], opponent_colour: str, board: List[List[str]]) -> None:
 
-        curr_turn = "b" if opponent_colour == "w" else "w"
-        r, c = promote_sqr[0], promote_sqr[1]
+def _line(square_a: int, square_b: int) -> int:
+    bit_a, bit_b = 1 << square_a, 1 << square_b
 
-        if curr_turn == "w" and r == 0:
-            board[r][c] = "wQ"
+    if rook_attacks(square_a, 0) & bit_b:
+        return (rook_attacks(square_a, 0) & rook_attacks(square_b, 0)) | bit_a | bit_b
 
-        elif curr_turn == "b" and r == 7:
-            board[r][c] = "bQ"
+    if bishop_attacks(square_a, 0) & bit_b:
+        return (bishop_attacks(square_a, 0) & bishop_attacks(square_b, 0)) | bit_a | bit_b
 
-    def square_under_attack_direction(self, sqr: Tuple[int, int], attacking_pieces: List[Tuple[int, int]], board: List[List[str]]) -> Tuple[int, int]:
-            
-        attacked_row, attacked_col = sqr
-        attack_row, attack_col = attacking_pieces[0]
-        attack_piece = board[attack_row][attack_col][1]
+    return 0
 
-        # Calculate the direction vector from the attacking piece to the king
-        dir_row = attacked_row - attack_row
-        dir_col = attacked_col - attack_col
 
-        # Handle knight separately
-        if attack_piece == 'N':
-            if (abs(dir_row), abs(dir_col)) in [(1,2), (2,1)]:
-                return (dir_row, dir_col)  # Return the non-normalized direction for knights
+# BETWEEN holds the squares strictly between two aligned squares and LINE the full
+# edge-to-edge line through them; both are empty for squares that do not share a line.
+BETWEEN: List[List[int]] = [[_between(a, b) for b in range(64)] for a in range(64)]
+LINE: List[List[int]] = [[_line(a, b) for b in range(64)] for a in range(64)]
+
+PIECE_NAMES: Dict[str, Tuple[str, str, str, str, str, str]] = {
+    "w": ("wP", "wN", "wB", "wR", "wQ", "wK"),
+    "b": ("bP", "bN", "bB", "bR", "bQ", "bK"),
+}
+
+WHITE_KINGSIDE = 1
+WHITE_QUEENSIDE = 2
+BLACK_KINGSIDE = 4
+BLACK_QUEENSIDE = 8
+
+# Per colour: king start square, then (right, squares that must be empty, squares the
+# king crosses, king end square, move flag) for the king side and queen side.
+CASTLING: Dict[str, Tuple[int, List[Tuple[int, int, int, int, int]]]] = {
+    "w": (60, [
+        (WHITE_KINGSIDE, (1 << 61) | (1 << 62), (1 << 61) | (1 << 62), 62, KING_CASTLE),
+        (WHITE_QUEENSIDE, (1 << 57) | (1 << 58) | (1 << 59), (1 << 58) | (1 << 59), 58, QUEEN_CASTLE),
+    ]),
+    "b": (4, [
+        (BLACK_KINGSIDE, (1 << 5) | (1 << 6), (1 << 5) | (1 << 6), 6, KING_CASTLE),
+        (BLACK_QUEENSIDE, (1 << 1) | (1 << 2) | (1 << 3), (1 << 2) | (1 << 3), 2, QUEEN_CASTLE),
+    ]),
+}
+# Castling rights kept after a move touches a square; moving a king or rook, or capturing
+# a rook on its start square, clears the matching rights.
+CASTLING_RIGHTS_MASK: List[int] = [15] * 64
+CASTLING_RIGHTS_MASK[60] &= ~(WHITE_KINGSIDE | WHITE_QUEENSIDE)
+CASTLING_RIGHTS_MASK[63] &= ~WHITE_KINGSIDE
+CASTLING_RIGHTS_MASK[56] &= ~WHITE_QUEENSIDE
+CASTLING_RIGHTS_MASK[4] &= ~(BLACK_KINGSIDE | BLACK_QUEENSIDE)
+CASTLING_RIGHTS_MASK[7] &= ~BLACK_KINGSIDE
+CASTLING_RIGHTS_MASK[0] &= ~BLACK_QUEENSIDE
+
+
+class Game_Rules:
+
+    def get_piece_move(self, piece: str, start_sqr: Tuple[int, int], opponent_colour: str, board: Bitboards) -> List[Tuple[int, int]]:
+        """
+        Return the squares one piece can move to, read from the attack tables.
+
+        Pins, checks, castling and en passant are not considered; get_legal_moves gives the
+        legal moves of a whole position.
+
+        Parameters:
+        piece (str): The piece kind, e.g. "N".
+        start_sqr (Tuple[int, int]): The (row, column) the piece stands on.
+        opponent_colour (str): The colour of the other side, "w" or "b".
+        board (Bitboards): The position.
+
+        Returns:
+        List[Tuple[int, int]]: The (row, column) of every reachable square.
+        """
+        square = square_index(start_sqr)
+        player_colour = "b" if opponent_colour == "w" else "w"
+        occupied = board.occupied
+
+        if piece == "P":
+            empty = ~occupied & FULL_BOARD
+            if player_colour == "w":
+                single_push = (1 << square >> 8) & empty
+                double_push = (single_push >> 8) & empty if 48 <= square < 56 else 0
+            else:
+                single_push = (1 << square << 8) & empty
+                double_push = (single_push << 8) & empty if 8 <= square < 16 else 0
+            targets = single_push | double_push | (PAWN_ATTACKS[player_colour][square] & board.occupancy[opponent_colour])
+        elif piece == "N":
+            targets = KNIGHT_ATTACKS[square]
+        elif piece == "K":
+            targets = KING_ATTACKS[square]
+        elif piece == "B":
+            targets = bishop_attacks(square, occupied)
+        elif piece == "R":
+            targets = rook_attacks(square, occupied)
         else:
-            # Normalize the direction vector for other pieces
-            length = max(abs(dir_row), abs(dir_col))
-            if length != 0:
-                dir_row = dir_row // length
-                dir_col = dir_col // length
-
-            direction_tuple = (dir_row, dir_col)
-
-            if direction_tuple in self.reverse_directions:
-                direction_str = self.reverse_directions[direction_tuple]
-
-                return direction_str
-
-        # If no valid attack direction is found
-        return None
-    
-    def square_under_attack(self, sqr: Tuple[int, int], opponent_moves: Dict[Tuple[int, int], List[Tuple[int, int]]]) -> List[Tuple[int, int]]:
-        
-        attacking_pieces = []
-
-        for piece, moves in opponent_moves.items():
-            if sqr in moves:
-                
-                attacking_pieces.append(piece)
-        
-        return attacking_pieces
-    
-    def single_check(self, king_location: Tuple[int, int], attack_piece: Tuple[int, int], attacked_sqrs: List[Tuple[int, int]], valid_moves: Dict[Tuple[int, int], List[Tuple[int, int]]], ) -> Dict[Tuple[int, int], List[Tuple[int, int]]]:
-
-        for piece, moves in valid_moves.items():
-            
-            new_valid_moves = []    
-
-            for move in moves:
-                if piece == king_location:
-                    if move not in attacked_sqrs or attack_piece == move:
-                        new_valid_moves.append(move)
+            targets = queen_attacks(square, occupied)
 
-                else:
-                    if move in attacked_sqrs or attack_piece == move:
-                        new_valid_moves.append(move)
+        targets &= ~board.occupancy[player_colour]
+
+        return [square_location(end_sqr) for end_sqr in iter_squares(targets)]
+
+    def attackers_to(self, square: int, colour: str, board: Bitboards, occupied: int) -> int:
 
-            valid_moves[piece] = new_valid_moves
+        pawn, knight, bishop, rook, queen, king = PIECE_NAMES[colour]
+        pieces = board.pieces
+        opponent_colour = "b" if colour == "w" else "w"
 
-    def pins(self, dir: str, start_sqr: Tuple[int, int], opponent_colour: str, board: List[List[str]]) -> None:
-        pass
-        
-        # opponent_king = "w" if opponent_colour == "b" else "b"
+        return (
+            (PAWN_ATTACKS[opponent_colour][square] & pieces[pawn])
+            | (KNIGHT_ATTACKS[square] & pieces[knight])
+            | (KING_ATTACKS[square] & pieces[king])
+            | (rook_attacks(square, occupied) & (pieces[rook] | pieces[queen]))
+            | (bishop_attacks(square, occupied) & (pieces[bishop] | pieces[queen]))
+        )
 
-        # r, c = start_sqr[0], start_sqr[1]
-        # dr, dc = self.directions[dir]
+    def attack_map(self, board: Bitboards, colour: str, occupied: int) -> int:
+        """
+        Find every square attacked by one side.
 
-        # row, column = r + dr, c + dc
+        Parameters:
+        board (Bitboards): The position.
+        colour (str): The attacking colour, "w" or "b".
+        occupied (int): The occupancy that blocks sliding pieces.
 
-        # while 0 <= row < len(board) and 0 <= column < len(board):
+        Returns:
+        int: A bitboard of the attacked squares, whether empty or occupied.
+        """
+        pawn, knight, bishop, rook, queen, king = PIECE_NAMES[colour]
+        pieces = board.pieces
 
-        #     if board[row][column] == "--":
+        # White pawns capture towards row 0, so their attacks are the pawns shifted down by 7 and 9
+        pawns = pieces[pawn]
+        if colour == "w":
+            attacks = ((pawns >> 9) & ~FILE_H) | ((pawns >> 7) & ~FILE_A)
+        else:
+            attacks = ((pawns << 7) & ~FILE_H) | ((pawns << 9) & ~FILE_A)
+        attacks |= KING_ATTACKS[lsb(pieces[king])]
+
+        for square in iter_squares(pieces[knight]):
+            attacks |= KNIGHT_ATTACKS[square]
+        for square in iter_squares(pieces[bishop] | pieces[queen]):
+            attacks |= bishop_attacks(square, occupied)
+        for square in iter_squares(pieces[rook] | pieces[queen]):
+            attacks |= rook_attacks(square, occupied)
+
+        return attacks & FULL_BOARD
+
+    def get_king_danger(self, board: Bitboards, player_colour: str) -> int:
+        """
+        Find the squares the opponent attacks, as seen by the king of one side.
+
+        The king is lifted off the board first, so a square behind it on a checking line
+        counts as attacked. That is where it cannot step, and its own square is attacked
+        exactly when it is in check.
+
+        Parameters:
+        board (Bitboards): The position.
+        player_colour (str): The colour of the king, "w" or "b".
+
+        Returns:
+        int: A bitboard of the squares attacked by the opponent.
+        """
+        opponent_colour = "b" if player_colour == "w" else "w"
+        king_square = lsb(board.pieces[PIECE_NAMES[player_colour][5]])
+
+        return self.attack_map(board, opponent_colour, board.occupied ^ (1 << king_square))
+
+    def get_legal_moves(
+        self, board: Bitboards, player_colour: str, castling_rights: int, en_passant: Optional[int], danger: Optional[int] = None,
+    ) -> List[int]:
+        """
+        Generate every legal move for the side to move.
+
+        Checkers, pinned pieces and their pin rays are computed once for the position, so
+        each candidate move is filtered with a mask instead of being played and tested.
+
+        Parameters:
+        board (Bitboards): The position to generate moves for.
+        player_colour (str): The colour of the side to move, "w" or "b".
+        castling_rights (int): The castling rights bit set.
+        en_passant (Optional[int]): The en passant target square, if any.
+        danger (Optional[int]): The squares from get_king_danger, if already known; otherwise
+        they are found when a king move or castling needs them.
+
+        Returns:
+        List[int]: The legal moves in packed form.
+        """
+        opponent_colour = "b" if player_colour == "w" else "w"
+        pawn, knight, bishop, rook, queen, king = PIECE_NAMES[player_colour]
+        enemy_pawn, enemy_knight, enemy_bishop, enemy_rook, enemy_queen, _ = PIECE_NAMES[opponent_colour]
+
+        pieces = board.pieces
+        own = board.occupancy[player_colour]
+        enemy = board.occupancy[opponent_colour]
+        occupied = board.occupied
+        empty = ~occupied & FULL_BOARD
+
+        king_square = lsb(pieces[king])
+        moves: List[int] = []
+        append = moves.append
+
+        # One map of the attacked squares answers every king move and castling test; a
+        # boxed-in king with no castling to try never needs it
+        king_targets = KING_ATTACKS[king_square] & ~own
+        if king_targets:
+            if danger is None:
+                danger = self.get_king_danger(board, player_colour)
+            king_targets &= ~danger
+
+        for end_sqr in iter_squares(king_targets):
+            append(king_square | (end_sqr << 6) | ((CAPTURE << 12) if enemy >> end_sqr & 1 else 0))
+
+        # Only a king on an attacked square needs its checkers identified
+        if danger is not None and not danger >> king_square & 1:
+            checkers = 0
+        else:
+            checkers = self.attackers_to(king_square, opponent_colour, board, occupied)
+
+        if checkers & (checkers - 1):
+            return moves
 
-        #         row += dr
-        #         column += dc
+        if checkers:
+            target_mask = checkers | BETWEEN[king_square][lsb(checkers)]
+        else:
+            target_mask = FULL_BOARD
+            castle_start, castle_sides = CASTLING[player_colour]
+
+            for right, must_be_empty, king_path, end_sqr, flag in castle_sides:
+                if castling_rights & right and not occupied & must_be_empty:
+                    if danger is None:
+                        danger = self.get_king_danger(board, player_colour)
+                    if not king_path & danger:
+                        append(castle_start | (end_sqr << 6) | (flag << 12))
+
+        pinned = 0
+        enemy_rooks = pieces[enemy_rook] | pieces[enemy_queen]
+        enemy_bishops = pieces[enemy_bishop] | pieces[enemy_queen]
+        snipers = (ROOK_TABLES[king_square][0] & enemy_rooks) | (BISHOP_TABLES[king_square][0] & enemy_bishops)
+
+        for sniper in iter_squares(snipers):
+            blockers = BETWEEN[king_square][sniper] & occupied
+            if blockers and not blockers & (blockers - 1) and blockers & own:
+                pinned |= blockers
+
+        king_lines = LINE[king_square]
+        targets_mask = ~own & target_mask
+
+        for start_sqr in iter_squares(pieces[knight] & ~pinned):
+            targets = KNIGHT_ATTACKS[start_sqr] & targets_mask
+            for end_sqr in iter_squares(targets & enemy):
+                append(start_sqr | (end_sqr << 6) | (CAPTURE << 12))
+            for end_sqr in iter_squares(targets & empty):
+                append(start_sqr | (end_sqr << 6))
+
+        for piece_bitboard, attacks in (
+            (pieces[bishop], bishop_attacks),
+            (pieces[rook], rook_attacks),
+            (pieces[queen], queen_attacks),
+        ):
+            for start_sqr in iter_squares(piece_bitboard):
+                targets = attacks(start_sqr, occupied) & targets_mask
+                if pinned >> start_sqr & 1:
+                    targets &= king_lines[start_sqr]
+                for end_sqr in iter_squares(targets & enemy):
+                    append(start_sqr | (end_sqr << 6) | (CAPTURE << 12))
+                for end_sqr in iter_squares(targets & empty):
+                    append(start_sqr | (end_sqr << 6))
+
+        if player_colour == "w":
+            push, double_push_rank, promotion_rank = -8, 0x00FF000000000000, RANK_8
+        else:
+            push, double_push_rank, promotion_rank = 8, 0x000000000000FF00, RANK_1
+
+        pawn_attacks = PAWN_ATTACKS[player_colour]
+
+        for start_sqr in iter_squares(pieces[pawn]):
+            allowed = target_mask
+            if pinned >> start_sqr & 1:
+                allowed &= king_lines[start_sqr]
+
+            single_sqr = start_sqr + push
+            if empty >> single_sqr & 1:
+                if allowed >> single_sqr & 1:
+                    if promotion_rank >> single_sqr & 1:
+                        for promotion in range(4):
+                            append(start_sqr | (single_sqr << 6) | ((PROMOTION | promotion) << 12))
+                    else:
+                        append(start_sqr | (single_sqr << 6))
+
+                double_sqr = single_sqr + push
+                if double_push_rank >> start_sqr & 1 and empty >> double_sqr & 1 and allowed >> double_sqr & 1:
+                    append(start_sqr | (double_sqr << 6) | (DOUBLE_PAWN_PUSH << 12))
+
+            for end_sqr in iter_squares(pawn_attacks[start_sqr] & enemy & allowed):
+                if promotion_rank >> end_sqr & 1:
+                    for promotion in range(4):
+                        append(start_sqr | (end_sqr << 6) | ((PROMOTION_CAPTURE | promotion) << 12))
+                else:
+                    append(start_sqr | (end_sqr << 6) | (CAPTURE << 12))
 
-        #     elif (row, column) != opponent_king:
+            if en_passant is not None and pawn_attacks[start_sqr] >> en_passant & 1:
+                # En passant removes two pawns from one rank, so test the resulting position directly
+                captured_sqr = en_passant - push
+                after = (occupied ^ (1 << start_sqr) ^ (1 << captured_sqr)) | (1 << en_passant)
+                other_checkers = checkers & ~(1 << captured_sqr) & (pieces[enemy_knight] | pieces[enemy_pawn])
 
-        #         break
-        
-        #     elif (row, column) == opponent_king:
+                if not other_checkers and not (
+                    (rook_attacks(king_square, after) & enemy_rooks)
+                    | (bishop_attacks(king_square, after) & enemy_bishops)
+                ):
+                    append(start_sqr | (en_passant << 6) | (EN_PASSANT << 12))
 
-        #         self.pinned_pieces.append(start_sqr)
-        #         break
\ No newline at end of file
+        return moves
@@ -1,10 +1,39 @@
-from python.game_rules import Game_Rules
+from python.bitboard import DARK_SQUARES, LIGHT_SQUARES, Bitboards, iter_squares, lsb, square_index
+from python.evaluation import EG_TABLES, MG_TABLES, PHASE_WEIGHTS, PIECE_VALUES
+from python.game_rules import (
+    BLACK_KINGSIDE, BLACK_QUEENSIDE, CASTLING_RIGHTS_MASK, PAWN_ATTACKS, WHITE_KINGSIDE, WHITE_QUEENSIDE, Game_Rules,
+)
+from python.move import (
+    CAPTURE, DOUBLE_PAWN_PUSH, EN_PASSANT, KING_CASTLE, PROMOTION, PROMOTION_PIECES, QUEEN_CASTLE,
+    is_promotion, move_end, move_start, moves_to_dict, pack_moves, promotion_piece, square_from_name,
+    square_name, unpack_moves,
+)
 
-from typing import Dict, Tuple, List
+from python.tablebase import Tablebase_Result, get_tablebase
+from python.zobrist import CASTLING_KEYS, EN_PASSANT_KEYS, PIECE_KEYS, SIDE_KEY, compute_key
+
+from typing import Dict, Tuple, List, Optional
+
+# FEN castling letter, right, then the (row, column, piece) of the king and the rook it needs
+CASTLING_HOMES = [
+    ("K", WHITE_KINGSIDE, (7, 4, "wK"), (7, 7, "wR")),
+    ("Q", WHITE_QUEENSIDE, (7, 4, "wK"), (7, 0, "wR")),
+    ("k", BLACK_KINGSIDE, (0, 4, "bK"), (0, 7, "bR")),
+    ("q", BLACK_QUEENSIDE, (0, 4, "bK"), (0, 0, "bR")),
+]
+
+# Reasons a game ends, as returned by Game_State.game_end
+CHECKMATE = "checkmate"
+STALEMATE = "stalemate"
+FIVEFOLD_REPETITION = "fivefold repetition"
+SEVENTY_FIVE_MOVE_RULE = "seventy-five-move rule"
+INSUFFICIENT_MATERIAL = "insufficient material"
+THREEFOLD_REPETITION = "threefold repetition"
+FIFTY_MOVE_RULE = "fifty-move rule"
 
 class Game_State:
 
-    def __init__(self) -> None:
+    def __init__(self, fen: Optional[str] = None) -> None:
         self.clicked_squares : List[Tuple[int, int], Tuple[int, int]] = []
 
         self.board = [
@@ -17,71 +46,627 @@ class Game_State:
         ["wP", "wP", "wP", "wP", "wP", "wP", "wP", "wP"],
         ["wR", "wN", "wB", "wQ", "wK", "wB", "wN", "wR"]
         ]
+        self.bitboards = Bitboards.from_board(self.board)
 
         self.player_colour : str = "w"
         self.white_king_location = (7, 4)
         self.black_king_location = (0, 4)
+        self.castling_rights : int = 15
+        self.en_passant : Optional[int] = None
+        self.halfmove_clock : int = 0
+        self.fullmove_number : int = 1
+
+        # (move, moving piece, captured piece, castling rights, en passant, halfmove clock, zobrist key,
+        #  middlegame score, endgame score, phase, white material, black material)
+        self.undo_stack : List[Tuple[int, str, str, int, Optional[int], int, int, int, int, int, int, int]] = []
+        self._zobrist_key : int = compute_key(self.bitboards.pieces, self.player_colour, self.castling_rights, self.en_passant)
+
+        # Material plus piece-square sums for White minus Black, kept up to date by make_move
+        self.mg_score : int = 0
+        self.eg_score : int = 0
+        self.phase : int = 0
+        self.white_material : int = 0
+        self.black_material : int = 0
+        self.refresh_scores()
 
         self.rules = Game_Rules()
+        # Squares attacked by each colour, and those the side to move's king may not step to,
+        # built on first use and kept until the position changes
+        self._attack_maps : Dict[str, int] = {}
+        self._king_danger : Optional[int] = None
+        self._attack_maps_key : Optional[int] = None
         self.white_moves : Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
         self.black_moves : Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+        self.legal_moves : List[int] = []
 
-        self.pinned_pieces = []
         self.in_check = False
         self.checkmate = False
         self.stalemate = False
-    
+
+        if fen is not None:
+            self.set_fen(fen)
+
+    def __getstate__(self) -> Dict:
+        # Positions are copied for every worker request, so send the legal moves two bytes
+        # each and leave out the board graphics' move dictionaries, rebuilt from them on arrival
+        state = self.__dict__.copy()
+        state["legal_moves"] = pack_moves(self.legal_moves)
+        state["white_moves"], state["black_moves"] = bool(self.white_moves), bool(self.black_moves)
+        return state
+
+    def __setstate__(self, state: Dict) -> None:
+        self.__dict__.update(state)
+        self.legal_moves = unpack_moves(state["legal_moves"])
+
+        # The flags say which side's dictionary was filled in when the position was sent
+        self.white_moves = self.create_valid_moves(self.legal_moves) if state["white_moves"] else {}
+        self.black_moves = self.create_valid_moves(self.legal_moves) if state["black_moves"] else {}
+
+    def set_fen(self, fen: str) -> None:
+        """
+        Set up the position described by a FEN string.
+
+        Parameters:
+        fen (str): The position in Forsyth-Edwards Notation. The halfmove clock and
+        fullmove number fields are optional.
+
+        Returns:
+        None
+        """
+        fields = fen.split()
+        if len(fields) < 4:
+            raise ValueError(f"Invalid FEN, expected at least 4 fields: {fen!r}")
+
+        rows = fields[0].split("/")
+        if len(rows) != 8:
+            raise ValueError(f"Invalid FEN, expected 8 ranks: {fen!r}")
+
+        board = []
+        for row in rows:
+            board_row = []
+            for char in row:
+                if char.isdigit():
+                    board_row.extend(["--"] * int(char))
+                elif char.upper() in "PNBRQK":
+                    board_row.append(("w" if char.isupper() else "b") + char.upper())
+                else:
+                    raise ValueError(f"Invalid FEN piece {char!r}: {fen!r}")
+
+            if len(board_row) != 8:
+                raise ValueError(f"Invalid FEN, rank {row!r} does not have 8 squares: {fen!r}")
+            board.append(board_row)
+
+        # Pawns never stand on the first or last rank; they promote on reaching it
+        if any(piece[1] == "P" for piece in board[0] + board[7]):
+            raise ValueError(f"Invalid FEN, pawn on the first or last rank: {fen!r}")
+
+        # Move generation assumes exactly one king per side
+        for king in ("wK", "bK"):
+            count = sum(row.count(king) for row in board)
+            if count != 1:
+                raise ValueError(f"Invalid FEN, expected one {'white' if king == 'wK' else 'black'} king, found {count}: {fen!r}")
+
+        if fields[1] not in ("w", "b"):
+            raise ValueError(f"Invalid FEN side to move {fields[1]!r}: {fen!r}")
+
+        self.board = board
+        self.bitboards = Bitboards.from_board(board)
+        self.player_colour = fields[1]
+
+        # A right only counts while its king and rook are still on their home squares
+        self.castling_rights = 0
+        for char, right, king, rook in CASTLING_HOMES:
+            if char in fields[2] and board[king[0]][king[1]] == king[2] and board[rook[0]][rook[1]] == rook[2]:
+                self.castling_rights |= right
+
+        # After a double push the target square is on rank 6 with White to move, rank 3 with Black
+        en_passant_rank = "6" if self.player_colour == "w" else "3"
+        if fields[3] != "-" and (len(fields[3]) != 2 or fields[3][0] not in "abcdefgh" or fields[3][1] != en_passant_rank):
+            raise ValueError(f"Invalid FEN en passant square {fields[3]!r}: {fen!r}")
+        self.en_passant = None if fields[3] == "-" else square_from_name(fields[3])
+        if self.en_passant is not None:
+            opponent_colour = "b" if self.player_colour == "w" else "w"
+            if not PAWN_ATTACKS[opponent_colour][self.en_passant] & self.bitboards.pieces[self.player_colour + "P"]:
+                self.en_passant = None
+
+        self.halfmove_clock = int(fields[4]) if len(fields) > 4 else 0
+        self.fullmove_number = int(fields[5]) if len(fields) > 5 else 1
+
+        for row in range(8):
+            for column in range(8):
+                if board[row][column] == "wK":
+                    self.white_king_location = (row, column)
+                elif board[row][column] == "bK":
+                    self.black_king_location = (row, column)
+
+        self._zobrist_key = compute_key(self.bitboards.pieces, self.player_colour, self.castling_rights, self.en_passant)
+        self.refresh_scores()
+        self.undo_stack.clear()
+        self.clicked_squares.clear()
+        self.white_moves, self.black_moves, self.legal_moves = {}, {}, []
+
+    def get_fen(self) -> str:
+        """
+        Describe the current position as a FEN string.
+
+        The en passant square is only written when a pawn can actually capture on it.
+
+        Returns:
+        str: The position in Forsyth-Edwards Notation.
+        """
+        rows = []
+        for board_row in self.board:
+            row = ""
+            empty = 0
+            for piece in board_row:
+                if piece == "--":
+                    empty += 1
+                    continue
+                if empty:
+                    row += str(empty)
+                    empty = 0
+                row += piece[1] if piece[0] == "w" else piece[1].lower()
+            rows.append(row + (str(empty) if empty else ""))
+
+        castling = "".join(
+            char for char, right in zip("KQkq", (WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE))
+            if self.castling_rights & right
+        )
+        en_passant = square_name(self.en_passant) if self.en_passant is not None else "-"
+
+        return f"{'/'.join(rows)} {self.player_colour} {castling or '-'} {en_passant} {self.halfmove_clock} {self.fullmove_number}"
+
+    def refresh_scores(self) -> None:
+        """
+        Recompute the material, piece-square sums and game phase from the bitboards.
+
+        Returns:
+        None
+        """
+        self.mg_score = self.eg_score = self.phase = 0
+        self.white_material = self.black_material = 0
+
+        for piece, bitboard in self.bitboards.pieces.items():
+            mg_table, eg_table = MG_TABLES[piece], EG_TABLES[piece]
+            count = bitboard.bit_count()
+            self.phase += PHASE_WEIGHTS[piece[1]] * count
+
+            if piece[0] == "w":
+                self.white_material += PIECE_VALUES[piece[1]] * count
+            else:
+                self.black_material += PIECE_VALUES[piece[1]] * count
+
+            for square in iter_squares(bitboard):
+                self.mg_score += mg_table[square]
+                self.eg_score += eg_table[square]
+
     def set_valid_moves(self) -> None:
-        self.white_moves = self.create_valid_moves("w")
-        self.black_moves = self.create_valid_moves("b")
+        self.apply_valid_moves(self.generate_legal_moves(), self.is_in_check())
+
+    def apply_valid_moves(self, legal_moves: List[int], in_check: bool, ending: Optional[str] = None) -> None:
+        """
+        Install legal moves generated elsewhere, such as by a Move_Worker thread.
+
+        Parameters:
+        legal_moves (List[int]): The legal moves of the current position.
+        in_check (bool): Whether the side to move is in check.
+        ending (Optional[str]): The reason the game is over, if it is, in which case the
+        board offers no moves.
+
+        Returns:
+        None
+        """
+        self.legal_moves = legal_moves
+        self.in_check = in_check
+        self.checkmate = not legal_moves and in_check
+        self.stalemate = not legal_moves and not in_check
+
+        valid_moves = self.create_valid_moves(self.legal_moves) if ending is None else {}
+
+        if self.player_colour == "w":
+            self.white_moves, self.black_moves = valid_moves, {}
+        else:
+            self.white_moves, self.black_moves = {}, valid_moves
+
+    def create_valid_moves(self, legal_moves: List[int]) -> Dict[Tuple[int, int], List[Tuple[int, int]]]:
+        return moves_to_dict(legal_moves)
+
+    def find_move(self, start_sqr: Tuple[int, int], end_sqr: Tuple[int, int]) -> Optional[int]:
+
+        start, end = square_index(start_sqr), square_index(end_sqr)
+        found = None
+
+        for move in self.legal_moves:
+            if move_start(move) == start and move_end(move) == end:
+                # Clicks cannot pick a promotion piece, so a queen is preferred
+                if found is None or (is_promotion(move) and promotion_piece(move) == "Q"):
+                    found = move
+
+        return found
+
+    def make_move(self, move: int) -> None:
+        """
+        Play a legal move, updating the position incrementally.
 
-    def create_valid_moves(self, player_colour: str) -> None:
-        valid_moves = {}
-        n = len(self.board)
+        The information needed to reverse the move is pushed onto the undo stack so
+        unmake_move can restore the position without copying the board.
+
+        Parameters:
+        move (int): The packed move to play.
+
+        Returns:
+        None
+        """
+        start, end, flag = move & 63, (move >> 6) & 63, move >> 12
+        player_colour = self.player_colour
         opponent_colour = "w" if player_colour == "b" else "b"
+        board = self.board
+        bitboards = self.bitboards
 
-        for i in range(n):
-            for j in range(n):
+        piece = board[start >> 3][start & 7]
+        captured_piece = board[end >> 3][end & 7]
 
-                if self.board[i][j] != "--" and self.board[i][j][0] == self.player_colour:
+        key = self._zobrist_key
+        mg_score, eg_score = self.mg_score, self.eg_score
+        self.undo_stack.append((
+            move, piece, captured_piece, self.castling_rights, self.en_passant, self.halfmove_clock, key,
+            mg_score, eg_score, self.phase, self.white_material, self.black_material,
+        ))
 
-                    piece = self.board[i][j][1]
-                    start_sqr = (i, j)
-                    
-                    valid_moves[start_sqr] = []
-                    valid_moves[start_sqr].extend(self.rules.get_piece_move(piece, start_sqr, opponent_colour, self.board))
-        
-        return valid_moves
+        if self.en_passant is not None:
+            key ^= EN_PASSANT_KEYS[self.en_passant & 7]
 
-    def remove_illegal_moves(self) -> None:
-        
-        player_king = self.white_king_location if self.player_colour == "w" else self.black_king_location
-        opponent_moves = self.black_moves if self.player_colour == "w" else self.white_moves
+        if flag == EN_PASSANT:
+            captured_sqr = end + (8 if player_colour == "w" else -8)
+            bitboards.remove_piece(opponent_colour + "P", captured_sqr)
+            board[captured_sqr >> 3][captured_sqr & 7] = "--"
+            captured_pawn = opponent_colour + "P"
+            key ^= PIECE_KEYS[captured_pawn][captured_sqr]
+            mg_score -= MG_TABLES[captured_pawn][captured_sqr]
+            eg_score -= EG_TABLES[captured_pawn][captured_sqr]
+            self.remove_material(captured_pawn)
+        elif captured_piece != "--":
+            bitboards.remove_piece(captured_piece, end)
+            key ^= PIECE_KEYS[captured_piece][end]
+            mg_score -= MG_TABLES[captured_piece][end]
+            eg_score -= EG_TABLES[captured_piece][end]
+            self.remove_material(captured_piece)
 
-        attacking_pieces = self.rules.square_under_attack(player_king, opponent_moves)
+        bitboards.move_piece(piece, start, end)
+        piece_keys = PIECE_KEYS[piece]
+        key ^= piece_keys[start] ^ piece_keys[end]
+        mg_table, eg_table = MG_TABLES[piece], EG_TABLES[piece]
+        mg_score += mg_table[end] - mg_table[start]
+        eg_score += eg_table[end] - eg_table[start]
+        board[start >> 3][start & 7] = "--"
+        board[end >> 3][end & 7] = piece
 
-        if len(attacking_pieces) == 1:
-            attack_piece = attacking_pieces[0]
-            attack_dir = self.rules.square_under_attack_direction(player_king, attacking_pieces, self.board)
+        if flag & PROMOTION:
+            promoted_piece = player_colour + PROMOTION_PIECES[flag & 3]
+            bitboards.remove_piece(piece, end)
+            bitboards.add_piece(promoted_piece, end)
+            board[end >> 3][end & 7] = promoted_piece
+            key ^= piece_keys[end] ^ PIECE_KEYS[promoted_piece][end]
+            mg_score += MG_TABLES[promoted_piece][end] - mg_table[end]
+            eg_score += EG_TABLES[promoted_piece][end] - eg_table[end]
+            self.remove_material(piece)
+            self.add_material(promoted_piece)
 
-            self.rules.single_check(player_king, attack_piece, attack_dir, self.valid_moves)
+        elif flag == KING_CASTLE or flag == QUEEN_CASTLE:
+            rook_start, rook_end = (end + 1, end - 1) if flag == KING_CASTLE else (end - 2, end + 1)
+            rook = player_colour + "R"
+            bitboards.move_piece(rook, rook_start, rook_end)
+            board[rook_start >> 3][rook_start & 7] = "--"
+            board[rook_end >> 3][rook_end & 7] = rook
+            key ^= PIECE_KEYS[rook][rook_start] ^ PIECE_KEYS[rook][rook_end]
+            mg_score += MG_TABLES[rook][rook_end] - MG_TABLES[rook][rook_start]
+            eg_score += EG_TABLES[rook][rook_end] - EG_TABLES[rook][rook_start]
 
-    def move(self) -> None:
-        
-        start_row = self.clicked_squares[0][0]
-        start_col = self.clicked_squares[0][1]
-        end_row = self.clicked_squares[1][0]
-        end_col = self.clicked_squares[1][1]
+        if piece[1] == "K":
+            if player_colour == "w":
+                self.white_king_location = (end >> 3, end & 7)
+            else:
+                self.black_king_location = (end >> 3, end & 7)
+
+        castling_rights = self.castling_rights & CASTLING_RIGHTS_MASK[start] & CASTLING_RIGHTS_MASK[end]
+        if castling_rights != self.castling_rights:
+            key ^= CASTLING_KEYS[self.castling_rights] ^ CASTLING_KEYS[castling_rights]
+            self.castling_rights = castling_rights
+
+        # Only record an en passant square when an enemy pawn can actually take on it
+        self.en_passant = None
+        if flag == DOUBLE_PAWN_PUSH:
+            passed_sqr = (start + end) >> 1
+            if PAWN_ATTACKS[player_colour][passed_sqr] & bitboards.pieces[opponent_colour + "P"]:
+                self.en_passant = passed_sqr
+                key ^= EN_PASSANT_KEYS[passed_sqr & 7]
+
+        if piece[1] == "P" or flag & CAPTURE:
+            self.halfmove_clock = 0
+        else:
+            self.halfmove_clock += 1
+
+        if player_colour == "b":
+            self.fullmove_number += 1
+
+        self.player_colour = opponent_colour
+        self._zobrist_key = key ^ SIDE_KEY
+        self.mg_score, self.eg_score = mg_score, eg_score
+
+    def unmake_move(self) -> None:
+        """
+        Take back the last move played with make_move, restoring the position from the undo stack.
+
+        Returns:
+        None
+        """
+        (
+            move, piece, captured_piece, castling_rights, en_passant, halfmove_clock, key,
+            self.mg_score, self.eg_score, self.phase, self.white_material, self.black_material,
+        ) = self.undo_stack.pop()
+        start, end, flag = move & 63, (move >> 6) & 63, move >> 12
+        player_colour = piece[0]
+        board = self.board
+        bitboards = self.bitboards
+
+        if flag & PROMOTION:
+            bitboards.remove_piece(board[end >> 3][end & 7], end)
+            bitboards.add_piece(piece, end)
 
-        piece_value = self.board[start_row][start_col]
+        elif flag == KING_CASTLE or flag == QUEEN_CASTLE:
+            rook_start, rook_end = (end + 1, end - 1) if flag == KING_CASTLE else (end - 2, end + 1)
+            rook = player_colour + "R"
+            bitboards.move_piece(rook, rook_end, rook_start)
+            board[rook_end >> 3][rook_end & 7] = "--"
+            board[rook_start >> 3][rook_start & 7] = rook
 
-        self.board[end_row][end_col] = piece_value
-        self.board[start_row][start_col] = "--"
+        bitboards.move_piece(piece, end, start)
+        board[start >> 3][start & 7] = piece
+        board[end >> 3][end & 7] = captured_piece
+
+        if flag == EN_PASSANT:
+            captured_sqr = end + (8 if player_colour == "w" else -8)
+            captured_pawn = ("b" if player_colour == "w" else "w") + "P"
+            bitboards.add_piece(captured_pawn, captured_sqr)
+            board[captured_sqr >> 3][captured_sqr & 7] = captured_pawn
+        elif captured_piece != "--":
+            bitboards.add_piece(captured_piece, end)
+
+        if piece[1] == "K":
+            if player_colour == "w":
+                self.white_king_location = (start >> 3, start & 7)
+            else:
+                self.black_king_location = (start >> 3, start & 7)
+
+        if player_colour == "b":
+            self.fullmove_number -= 1
+
+        self.castling_rights = castling_rights
+        self.en_passant = en_passant
+        self.halfmove_clock = halfmove_clock
+        self.player_colour = player_colour
+        self._zobrist_key = key
+
+    def add_material(self, piece: str) -> None:
+        self.phase += PHASE_WEIGHTS[piece[1]]
+        if piece[0] == "w":
+            self.white_material += PIECE_VALUES[piece[1]]
+        else:
+            self.black_material += PIECE_VALUES[piece[1]]
+
+    def remove_material(self, piece: str) -> None:
+        self.phase -= PHASE_WEIGHTS[piece[1]]
+        if piece[0] == "w":
+            self.white_material -= PIECE_VALUES[piece[1]]
+        else:
+            self.black_material -= PIECE_VALUES[piece[1]]
+
+    @property
+    def zobrist_key(self) -> int:
+        """The 64-bit Zobrist key of the position, maintained incrementally by make_move."""
+        return self._zobrist_key
+
+    def attack_map(self, colour: str) -> int:
+        """
+        Return the squares attacked by one colour in the current position.
+
+        The map is built once per position and colour, so any number of is_attacked
+        queries cost one pass over the attacking pieces. It is rebuilt lazily rather than
+        updated by make_move, which the search calls far more often than it asks for maps.
+
+        Parameters:
+        colour (str): The attacking colour, "w" or "b".
+
+        Returns:
+        int: A bitboard of the attacked squares.
+        """
+        self.check_attack_maps()
+
+        attacks = self._attack_maps.get(colour)
+        if attacks is None:
+            attacks = self.rules.attack_map(self.bitboards, colour, self.bitboards.occupied)
+            self._attack_maps[colour] = attacks
+
+        return attacks
+
+    def king_danger(self) -> int:
+        """
+        Return the squares the side to move's king may not step to.
+
+        Unlike attack_map, the king is lifted off the board first (see
+        Game_Rules.get_king_danger), so squares behind it on a checking line count too.
+
+        Parameters:
+        None
+
+        Returns:
+        int: A bitboard of the squares attacked by the opponent.
+        """
+        self.check_attack_maps()
+
+        if self._king_danger is None:
+            self._king_danger = self.rules.get_king_danger(self.bitboards, self.player_colour)
+
+        return self._king_danger
+
+    def check_attack_maps(self) -> None:
+        # The cached maps belong to the position they were built for
+        if self._attack_maps_key != self._zobrist_key:
+            self._attack_maps = {}
+            self._king_danger = None
+            self._attack_maps_key = self._zobrist_key
+
+    def is_attacked(self, square: int, colour: str) -> bool:
+        return bool(self.attack_map(colour) >> square & 1)
+
+    def is_in_check(self) -> bool:
+        # Lifting the king changes nothing about its own square, so the cached danger map answers this
+        king_square = lsb(self.bitboards.pieces[self.player_colour + "K"])
+        return bool(self.king_danger() >> king_square & 1)
+
+    def generate_legal_moves(self) -> List[int]:
+        # The king danger map settles king moves, castling and check, and stays cached for is_in_check
+        return self.rules.get_legal_moves(self.bitboards, self.player_colour, self.castling_rights, self.en_passant, self.king_danger())
+
+    def probe_tablebase(self, best_move: bool = True) -> Optional[Tablebase_Result]:
+        """
+        Look the position up in the endgame tablebases.
+
+        Parameters:
+        best_move (bool): Whether to also find the move that keeps the result, which probes every child.
+
+        Returns:
+        Optional[Tablebase_Result]: Win, draw or loss for the side to move, the plies to mate
+        and the best move, or None when no generated table covers the position.
+        """
+        tablebase = get_tablebase()
+        return tablebase.probe_best_move(self) if best_move else tablebase.probe(self)
+
+    def repetition_count(self) -> int:
+        """
+        Count the occurrences of the current position in the game, this one included.
+
+        Only positions since the last capture or pawn move can be repeated, and only those
+        with the same side to move, so every second undo entry back to the halfmove clock
+        is compared.
+
+        Returns:
+        int: 1 for a position that has not occurred before.
+        """
+        key = self._zobrist_key
+        count = 1
+        oldest = max(0, len(self.undo_stack) - self.halfmove_clock)
+
+        for index in range(len(self.undo_stack) - 2, oldest - 1, -2):
+            if self.undo_stack[index][6] == key:
+                count += 1
+
+        return count
+
+    def is_repetition(self) -> bool:
+        # The search scores a position as a draw as soon as it repeats once
+        key = self._zobrist_key
+        oldest = max(0, len(self.undo_stack) - self.halfmove_clock)
+
+        for index in range(len(self.undo_stack) - 2, oldest - 1, -2):
+            if self.undo_stack[index][6] == key:
+                return True
+
+        return False
+
+    def has_insufficient_material(self) -> bool:
+        pieces = self.bitboards.pieces
+        if any(pieces[colour + kind] for colour in "wb" for kind in "PRQ"):
+            return False
+
+        knights = pieces["wN"] | pieces["bN"]
+        bishops = pieces["wB"] | pieces["bB"]
+
+        # Bare kings, a single minor piece, or bishops that all stand on one colour of square
+        if (knights | bishops).bit_count() <= 1:
+            return True
+        return not knights and (not bishops & LIGHT_SQUARES or not bishops & DARK_SQUARES)
+
+    def game_end(self, legal_moves: Optional[List[int]] = None, claim_draws: bool = True) -> Optional[str]:
+        """
+        Decide whether the game is over, setting the checkmate and stalemate flags.
+
+        Parameters:
+        legal_moves (Optional[List[int]]): The legal moves of the position, if already generated.
+        claim_draws (bool): Whether threefold repetition and the fifty-move rule end the game, as
+        though the player to move claims the draw. Fivefold repetition and the seventy-five-move
+        rule always do.
+
+        Returns:
+        Optional[str]: The reason the game ended, such as CHECKMATE, or None while it goes on.
+        """
+        if legal_moves is None:
+            legal_moves = self.generate_legal_moves()
+
+        in_check = self.is_in_check()
+        self.checkmate = not legal_moves and in_check
+        self.stalemate = not legal_moves and not in_check
+
+        # Mate delivered on the last move counts, so it is checked before the move counts
+        if self.checkmate:
+            return CHECKMATE
+        if self.stalemate:
+            return STALEMATE
+
+        repetitions = self.repetition_count()
+
+        if repetitions >= 5:
+            return FIVEFOLD_REPETITION
+        if self.halfmove_clock >= 150:
+            return SEVENTY_FIVE_MOVE_RULE
+        if self.has_insufficient_material():
+            return INSUFFICIENT_MATERIAL
+
+        if claim_draws:
+            if repetitions >= 3:
+                return THREEFOLD_REPETITION
+            if self.halfmove_clock >= 100:
+                return FIFTY_MOVE_RULE
+
+        return None
+
+    def game_result(self, reason: str) -> str:
+        # After checkmate the side to move has lost, every other ending is a draw
+        if reason == CHECKMATE:
+            return "0-1" if self.player_colour == "w" else "1-0"
+        return "1/2-1/2"
+
+    def move(self) -> None:
+
+        move = self.find_move(self.clicked_squares[0], self.clicked_squares[1])
 
         valid_moves = self.white_moves if self.player_colour == "w" else self.black_moves
         valid_moves.clear()
 
-        self.player_colour = "w" if self.player_colour == "b" else "b" 
+        self.make_move(move)
+
+    def undo(self, refresh_moves: bool = True) -> None:
+        """
+        Take back the last move.
+
+        Parameters:
+        refresh_moves (bool): Whether to generate the new position's moves here. Game modes
+        with a Move_Worker pass False and request them from the worker instead, and the
+        board offers no moves until they arrive.
+
+        Returns:
+        None
+        """
+        if not self.undo_stack:
+            return
+
+        self.unmake_move()
+        self.clicked_squares.clear()
+
+        if refresh_moves:
+            self.set_valid_moves()
+        else:
+            self.white_moves, self.black_moves = {}, {}
 
     def get_valid_move(self, end_sqr) -> bool:
 
@@ -0,0 +1,132 @@
+from array import array
+
+from typing import Dict, Iterable, List, Tuple
+
+# Moves are packed into a single int: bits 0-5 hold the start square, bits 6-11 the
+# end square and bits 12-15 a flag describing the kind of move.
+QUIET = 0
+DOUBLE_PAWN_PUSH = 1
+KING_CASTLE = 2
+QUEEN_CASTLE = 3
+CAPTURE = 4
+EN_PASSANT = 5
+PROMOTION = 8
+PROMOTION_CAPTURE = 12
+
+# The two low flag bits of a promotion select the promoted piece.
+PROMOTION_PIECES = "NBRQ"
+
+FILES = "abcdefgh"
+
+# Packed moves fit in 16 bits, so Game_State copies and pickles its legal moves as unsigned shorts
+MOVE_TYPECODE = "H"
+
+
+def encode_move(start_square: int, end_square: int, flag: int = QUIET) -> int:
+    return start_square | (end_square << 6) | (flag << 12)
+
+
+def move_start(move: int) -> int:
+    return move & 63
+
+
+def move_end(move: int) -> int:
+    return (move >> 6) & 63
+
+
+def move_flag(move: int) -> int:
+    return move >> 12
+
+
+def is_capture(move: int) -> bool:
+    return bool((move >> 12) & CAPTURE)
+
+
+def is_promotion(move: int) -> bool:
+    return bool((move >> 12) & PROMOTION)
+
+
+def promotion_piece(move: int) -> str:
+    return PROMOTION_PIECES[(move >> 12) & 3]
+
+
+def move_squares(move: int) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+    """
+    Return the start and end squares of a move as (row, column) board locations.
+
+    Parameters:
+    move (int): The packed move.
+
+    Returns:
+    Tuple[Tuple[int, int], Tuple[int, int]]: The start and end locations.
+    """
+    start, end = move & 63, (move >> 6) & 63
+    return (start >> 3, start & 7), (end >> 3, end & 7)
+
+
+def pack_moves(moves: Iterable[int]) -> bytes:
+    """
+    Store moves in two bytes each, as Game_State does with its legal moves when it is copied or pickled.
+
+    Parameters:
+    moves (Iterable[int]): The packed moves.
+
+    Returns:
+    bytes: The moves as native-order unsigned 16-bit integers.
+    """
+    return array(MOVE_TYPECODE, moves).tobytes()
+
+
+def unpack_moves(data: bytes) -> List[int]:
+    moves = array(MOVE_TYPECODE)
+    moves.frombytes(data)
+    return moves.tolist()
+
+
+def moves_to_dict(moves: Iterable[int]) -> Dict[Tuple[int, int], List[Tuple[int, int]]]:
+    """
+    Group moves by start square in the (row, column) form used by the board graphics.
+
+    Parameters:
+    moves (Iterable[int]): The packed moves.
+
+    Returns:
+    Dict[Tuple[int, int], List[Tuple[int, int]]]: The end squares reachable from each start square.
+    """
+    valid_moves: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+
+    for move in moves:
+        start_sqr, end_sqr = move_squares(move)
+        end_sqrs = valid_moves.setdefault(start_sqr, [])
+
+        # The four promotion choices share an end square, keep it once for the guidelines
+        if end_sqr not in end_sqrs:
+            end_sqrs.append(end_sqr)
+
+    return valid_moves
+
+
+def square_name(square: int) -> str:
+    return FILES[square & 7] + str(8 - (square >> 3))
+
+
+def square_from_name(name: str) -> int:
+    return (8 - int(name[1])) * 8 + FILES.index(name[0])
+
+
+def move_to_uci(move: int) -> str:
+    """
+    Format a move in the long algebraic notation used by UCI, e.g. "e2e4" or "e7e8q".
+
+    Parameters:
+    move (int): The packed move.
+
+    Returns:
+    str: The move text.
+    """
+    text = square_name(move & 63) + square_name((move >> 6) & 63)
+
+    if (move >> 12) & PROMOTION:
+        text += PROMOTION_PIECES[(move >> 12) & 3].lower()
+
+    return text
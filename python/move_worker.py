@@ -0,0 +1,137 @@
+import copy
+import queue
+import threading
+
+import pygame as p
+
+from python.game_state import Game_State
+from python.opening_book import Opening_Book
+from python.parallel_search import Parallel_Search
+from python.search import Search_Result
+
+from typing import Optional
+
+# Events posted to the pygame queue; each carries the request_id it answers
+MOVES_READY = p.USEREVENT + 1
+SEARCH_INFO = p.USEREVENT + 2
+SEARCH_DONE = p.USEREVENT + 3
+
+
+class Move_Worker:
+    """
+    Background thread that generates legal moves and chooses computer moves for a game loop.
+
+    Requests are queued with request_moves and request_search, each working on a copy of
+    the position so the game loop can keep changing its own. Answers arrive as pygame
+    events: MOVES_READY with legal_moves, in_check and ending, SEARCH_INFO after every
+    search iteration with depth, score, nodes and pv, and SEARCH_DONE with the chosen move
+    and ending. ending is the reason the game is over, from Game_State.game_end, or None;
+    a finished game is never searched, so its SEARCH_DONE has no move. Only the latest
+    request is ever answered; cancel drops it and stops a running search.
+    """
+
+    def __init__(self, search: Optional[Parallel_Search] = None, book: Optional[Opening_Book] = None) -> None:
+        self.search = search
+        self.book = book
+
+        self.requests: "queue.Queue" = queue.Queue()
+        self.request_id = 0
+        self.lock = threading.Lock()
+
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def submit(self, kind: str, game_state: Game_State, think_time: Optional[float] = None) -> int:
+        self.cancel()
+        with self.lock:
+            request_id = self.request_id
+        self.requests.put((kind, request_id, copy.deepcopy(game_state), think_time))
+        return request_id
+
+    def request_moves(self, game_state: Game_State) -> int:
+        """
+        Ask for the legal moves of a position, answered with a MOVES_READY event.
+
+        Parameters:
+        game_state (Game_State): The position.
+
+        Returns:
+        int: The request id carried by the answer.
+        """
+        return self.submit("moves", game_state)
+
+    def request_search(self, game_state: Game_State, think_time: float) -> int:
+        """
+        Ask for a computer move, from the book when possible, answered with a SEARCH_DONE event.
+
+        Parameters:
+        game_state (Game_State): The position, computer to move.
+        think_time (float): The search time in seconds.
+
+        Returns:
+        int: The request id carried by the answers.
+        """
+        return self.submit("search", game_state, think_time)
+
+    def cancel(self) -> None:
+        # Outstanding answers become stale, and a running search ends at its next check
+        with self.lock:
+            self.request_id += 1
+        if self.search is not None:
+            self.search.stop()
+
+    def is_current(self, event) -> bool:
+        return event.request_id == self.request_id
+
+    def post(self, event_type: int, request_id: int, **attributes) -> None:
+        with self.lock:
+            if request_id != self.request_id:
+                return
+        p.event.post(p.event.Event(event_type, request_id=request_id, **attributes))
+
+    def run(self) -> None:
+        while True:
+            request = self.requests.get()
+            if request is None:
+                return
+
+            kind, request_id, game_state, think_time = request
+            if request_id != self.request_id:
+                continue
+
+            legal_moves = game_state.generate_legal_moves()
+            ending = game_state.game_end(legal_moves)
+
+            if kind == "moves":
+                in_check = game_state.is_in_check()
+                self.post(MOVES_READY, request_id, legal_moves=legal_moves, in_check=in_check, ending=ending)
+                continue
+
+            if ending is not None:
+                self.post(SEARCH_DONE, request_id, move=None, ending=ending)
+                continue
+
+            move = self.book.choose_move(game_state) if self.book is not None else None
+
+            if move is None and self.search is not None:
+
+                def report(result: Search_Result) -> None:
+                    # The search clears its stop flag when it starts, so stop again if cancelled meanwhile
+                    if request_id != self.request_id:
+                        self.search.stop()
+                    self.post(SEARCH_INFO, request_id, depth=result.depth, score=result.score, nodes=result.nodes, pv=result.pv)
+
+                move = self.search.search(game_state, time_limit=think_time, info_callback=report).move
+
+            self.post(SEARCH_DONE, request_id, move=move, ending=None)
+
+    def close(self) -> None:
+        """
+        Cancel any request and end the worker thread.
+
+        Returns:
+        None
+        """
+        self.cancel()
+        self.requests.put(None)
+        self.thread.join()
@@ -0,0 +1,229 @@
+import argparse
+import mmap
+import os
+import random
+import struct
+import time
+
+from python.game_state import Game_State
+from python.move import KING_CASTLE, PROMOTION, QUEEN_CASTLE, move_to_uci
+from python.pgn import START_FEN, move_from_san, open_pgn, read_games
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_BOOK = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets", "book.bin")
+
+# Polyglot entry: key, move, weight and learn data, all big-endian
+ENTRY = struct.Struct(">QHHI")
+KEY = struct.Struct(">Q")
+
+# Polyglot numbers promotions from 1 (knight) to 4 (queen); our flags number them 0 to 3
+POLYGLOT_PROMOTION_SHIFT = 12
+
+# Winning games score 2 for the winner's moves, draws 1, as in Polyglot's builder
+RESULT_POINTS = {"1-0": (2, 0), "0-1": (0, 2), "1/2-1/2": (1, 1)}
+
+
+def encode_book_move(move: int) -> int:
+    """
+    Convert a move to Polyglot's 16-bit encoding.
+
+    Polyglot counts ranks from White's side and writes castling as the king taking its own rook.
+
+    Parameters:
+    move (int): The packed move.
+
+    Returns:
+    int: The Polyglot move.
+    """
+    start = move & 63
+    end = (move >> 6) & 63
+    flag = move >> 12
+
+    if flag == KING_CASTLE:
+        end = start + 3
+    elif flag == QUEEN_CASTLE:
+        end = start - 4
+
+    book_move = (end & 7) | ((7 - (end >> 3)) << 3) | ((start & 7) << 6) | ((7 - (start >> 3)) << 9)
+
+    if flag & PROMOTION:
+        book_move |= ((flag & 3) + 1) << POLYGLOT_PROMOTION_SHIFT
+
+    return book_move
+
+
+class Opening_Book:
+    """
+    Opening book in the Polyglot file layout, read through a memory map.
+
+    Entries are 16 bytes sorted by position key, so the moves of a position are found
+    with a binary search over the mapped file and nothing is loaded up front. Keys are
+    this project's Zobrist keys (Game_State.zobrist_key), so books are built with
+    build_book rather than taken from other Polyglot tools.
+    """
+
+    def __init__(self, path: str = DEFAULT_BOOK) -> None:
+        self.file = open(path, "rb")
+        size = os.fstat(self.file.fileno()).st_size
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self.entry_count = size // ENTRY.size
+
+    def __enter__(self) -> "Opening_Book":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.file.close()
+
+    def find_first(self, key: int) -> int:
+        # Index of the first entry whose key is not less than key
+        low, high = 0, self.entry_count
+        while low < high:
+            middle = (low + high) // 2
+            if KEY.unpack_from(self.data, middle * ENTRY.size)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+
+        return low
+
+    def get_moves(self, game_state: Game_State) -> List[Tuple[int, int]]:
+        """
+        Look up the book moves of a position.
+
+        Parameters:
+        game_state (Game_State): The position.
+
+        Returns:
+        List[Tuple[int, int]]: Each legal book move with its weight, in file order.
+        """
+        key = game_state.zobrist_key
+        legal_moves = {encode_book_move(move): move for move in game_state.generate_legal_moves()}
+        moves = []
+
+        for index in range(self.find_first(key), self.entry_count):
+            entry_key, book_move, weight, _ = ENTRY.unpack_from(self.data, index * ENTRY.size)
+            if entry_key != key:
+                break
+            if book_move in legal_moves:
+                moves.append((legal_moves[book_move], weight))
+
+        return moves
+
+    def choose_move(self, game_state: Game_State, best: bool = False) -> Optional[int]:
+        """
+        Pick a book move, at random in proportion to the weights or the heaviest one.
+
+        Parameters:
+        game_state (Game_State): The position.
+        best (bool): Whether to always play the heaviest move.
+
+        Returns:
+        Optional[int]: The move, or None when the position is not in the book.
+        """
+        moves = [(move, weight) for move, weight in self.get_moves(game_state) if weight > 0]
+        if not moves:
+            return None
+
+        if best:
+            return max(moves, key=lambda entry: entry[1])[0]
+
+        return random.choices([move for move, _ in moves], weights=[weight for _, weight in moves])[0]
+
+
+def build_book(
+    pgn_paths: Iterable[str],
+    output_path: str,
+    max_ply: int = 16,
+    min_games: int = 2,
+) -> int:
+    """
+    Build an opening book from the first moves of PGN games.
+
+    Each move is weighted by the points its side scored in the games it was played in
+    (2 for a win, 1 for a draw), and moves seen in fewer than min_games games are left out.
+    Weights are scaled per position to fit Polyglot's 16-bit field.
+
+    Parameters:
+    pgn_paths (Iterable[str]): The PGN files to read.
+    output_path (str): The book file to write.
+    max_ply (int): How many plies of each game to add.
+    min_games (int): The fewest games a move must appear in.
+
+    Returns:
+    int: The number of entries written.
+    """
+    # (key, Polyglot move) -> [games, points]
+    counts: Dict[Tuple[int, int], List[int]] = {}
+
+    for path in pgn_paths:
+        with open_pgn(path) as stream:
+            for game in read_games(stream):
+                points = RESULT_POINTS.get(game.result, (0, 0))
+
+                try:
+                    game_state = Game_State(game.headers.get("FEN", START_FEN))
+                    for text in game.moves[:max_ply]:
+                        move = move_from_san(game_state, text)
+                        count = counts.setdefault((game_state.zobrist_key, encode_book_move(move)), [0, 0])
+                        count[0] += 1
+                        count[1] += points[0] if game_state.player_colour == "w" else points[1]
+                        game_state.make_move(move)
+                except ValueError:
+                    continue
+
+    entries = [(key, book_move, points) for (key, book_move), (games, points) in counts.items() if games >= min_games]
+
+    largest: Dict[int, int] = {}
+    for key, _, points in entries:
+        largest[key] = max(largest.get(key, 0), points)
+
+    entries.sort(key=lambda entry: (entry[0], -entry[2]))
+
+    with open(output_path, "wb") as file:
+        for key, book_move, points in entries:
+            scale = max(1, largest[key] / 0xFFFF)
+            file.write(ENTRY.pack(key, book_move, int(points / scale), 0))
+
+    return len(entries)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build or query an opening book.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = commands.add_parser("build", help="build a book from PGN files")
+    build_parser.add_argument("pgn", nargs="+", help="PGN files to read (.pgn, .pgn.gz or .pgn.bz2)")
+    build_parser.add_argument("--output", default=DEFAULT_BOOK, help="book file to write")
+    build_parser.add_argument("--max-ply", type=int, default=16, help="plies of each game to add")
+    build_parser.add_argument("--min-games", type=int, default=2, help="fewest games a move must appear in")
+
+    probe_parser = commands.add_parser("probe", help="list the book moves of a position")
+    probe_parser.add_argument("--book", default=DEFAULT_BOOK, help="book file to read")
+    probe_parser.add_argument("--fen", default=START_FEN, help="position to look up")
+
+    args = parser.parse_args()
+
+    if args.command == "build":
+        start_time = time.perf_counter()
+        count = build_book(args.pgn, args.output, args.max_ply, args.min_games)
+        print(f"Wrote {count} entries to {args.output} in {time.perf_counter() - start_time:.1f}s")
+        return
+
+    game_state = Game_State(args.fen)
+    with Opening_Book(args.book) as book:
+        moves = book.get_moves(game_state)
+        total = sum(weight for _, weight in moves) or 1
+        for move, weight in moves:
+            print(f"{move_to_uci(move):<6} {weight:>6}  {100 * weight / total:5.1f}%")
+        if not moves:
+            print("Position not in book")
+
+
+if __name__ == "__main__":
+    main()
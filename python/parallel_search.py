@@ -0,0 +1,172 @@
+import multiprocessing as mp
+import os
+from multiprocessing import shared_memory
+
+from python.search import MAX_PLY, Search, Search_Result
+from python.transposition import AGE_MASK, Transposition_Table, table_bytes
+
+from typing import Callable, List, Optional
+
+
+def attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    # Only the creating process may unlink the block, so keep workers out of the resource tracker
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+def search_worker(worker_id: int, memory_name: str, stop_event, connection) -> None:
+    """
+    Run helper searches in a worker process until it is sent None.
+
+    Each request is (game_state, age, max_depth, time_limit, node_limit) and is answered
+    with the worker's Search_Result. Odd workers start one ply deeper than the main
+    search so the helpers fill the shared table with different parts of the tree.
+
+    Parameters:
+    worker_id (int): The worker number, starting at 1.
+    memory_name (str): The name of the shared memory block holding the table.
+    stop_event (multiprocessing.Event): Set by the main process to end every search.
+    connection (multiprocessing.connection.Connection): The worker's end of its pipe.
+
+    Returns:
+    None
+    """
+    memory = attach_shared_memory(memory_name)
+    search = Search(Transposition_Table(buffer=memory.buf), stop_event=stop_event)
+
+    try:
+        while True:
+            request = connection.recv()
+            if request is None:
+                break
+
+            game_state, age, max_depth, time_limit, node_limit = request
+            # Search.search advances the age once more, bringing it level with the main process
+            search.tt.age = (age - 1) & AGE_MASK
+            connection.send(search.search(game_state, max_depth, time_limit, node_limit, start_depth=1 + worker_id % 2))
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        connection.close()
+        search.tt.table.release()
+        memory.close()
+
+
+class Parallel_Search:
+    """
+    Lazy SMP search: several processes search the same root and share one transposition table.
+
+    The main process runs an ordinary Search while the helper processes search the same
+    position from slightly different starting depths. They only cooperate through the
+    table, which lives in shared memory, so the helpers' results speed up the main search
+    by filling the table ahead of it. When the main search finishes the helpers are
+    stopped, and the result that completed the deepest iteration is returned.
+    """
+
+    def __init__(self, workers: Optional[int] = None, hash_size_mb: float = 16) -> None:
+        self.workers = max(1, workers if workers is not None else os.cpu_count() or 1)
+
+        self.memory = shared_memory.SharedMemory(create=True, size=table_bytes(hash_size_mb))
+        self.tt = Transposition_Table(buffer=self.memory.buf)
+        self.tt.clear()
+        self.stop_event = mp.Event()
+        self.search_main = Search(self.tt, stop_event=self.stop_event)
+
+        self.connections = []
+        self.processes = []
+        for worker_id in range(1, self.workers):
+            connection, worker_connection = mp.Pipe()
+            process = mp.Process(
+                target=search_worker,
+                args=(worker_id, self.memory.name, self.stop_event, worker_connection),
+                daemon=True,
+            )
+            process.start()
+            worker_connection.close()
+            self.connections.append(connection)
+            self.processes.append(process)
+
+    def __enter__(self) -> "Parallel_Search":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def stop(self) -> None:
+        self.stop_event.set()
+
+    def search(
+        self,
+        game_state,
+        max_depth: int = MAX_PLY,
+        time_limit: Optional[float] = None,
+        node_limit: Optional[int] = None,
+        info_callback: Optional[Callable[[Search_Result], None]] = None,
+    ) -> Search_Result:
+        """
+        Search the position with every worker and merge their results.
+
+        Parameters:
+        game_state (Game_State): The position to search, unchanged on return.
+        max_depth (int): The deepest iteration to run.
+        time_limit (Optional[float]): The search budget in seconds.
+        node_limit (Optional[int]): The search budget in nodes, per worker.
+        info_callback (Optional[Callable[[Search_Result], None]]): Called after every iteration of the main search.
+
+        Returns:
+        Search_Result: The deepest result, with the nodes of all workers added together.
+        """
+        self.stop_event.clear()
+        # The age the main search is about to move to, so all workers age entries alike
+        age = (self.tt.age + 1) & AGE_MASK
+
+        for connection in self.connections:
+            connection.send((game_state, age, max_depth, time_limit, node_limit))
+
+        result = self.search_main.search(game_state, max_depth, time_limit, node_limit, info_callback)
+        self.stop_event.set()
+
+        results: List[Search_Result] = [result]
+        for connection in self.connections:
+            results.append(connection.recv())
+
+        nodes = sum(worker_result.nodes for worker_result in results)
+        # max keeps the first of equal depths, so the main search wins ties
+        best = max(results, key=lambda worker_result: worker_result.depth)
+
+        return best._replace(nodes=nodes, elapsed=result.elapsed)
+
+    def close(self) -> None:
+        """
+        Shut down the worker processes and free the shared table.
+
+        Returns:
+        None
+        """
+        if self.memory is None:
+            return
+
+        self.stop_event.set()
+        for connection in self.connections:
+            try:
+                connection.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            connection.close()
+
+        for process in self.processes:
+            process.join(timeout=1.0)
+            if process.is_alive():
+                process.terminate()
+
+        self.connections.clear()
+        self.processes.clear()
+
+        self.search_main = None
+        self.tt.table.release()
+        self.tt = None
+        self.memory.close()
+        self.memory.unlink()
+        self.memory = None
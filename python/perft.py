@@ -0,0 +1,135 @@
+import argparse
+import time
+
+from python.game_state import Game_State
+from python.move import move_to_uci
+
+from typing import List, Tuple
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+# Standard perft reference positions with their known leaf counts for depth 1, 2, 3, ...
+REFERENCE_POSITIONS: List[Tuple[str, str, List[int]]] = [
+    ("start", START_FEN, [20, 400, 8902, 197281, 4865609]),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1", [48, 2039, 97862, 4085603]),
+    ("endgame", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", [14, 191, 2812, 43238, 674624]),
+    ("promotions", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1", [6, 264, 9467, 422333]),
+    ("talkchess", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8", [44, 1486, 62379, 2103487]),
+    ("symmetrical", "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10", [46, 2079, 89890, 3894594]),
+]
+
+
+def perft(game_state: Game_State, depth: int) -> int:
+    """
+    Count the leaf nodes of the legal move tree to the given depth.
+
+    Parameters:
+    game_state (Game_State): The position to count from, left unchanged on return.
+    depth (int): The number of plies to search.
+
+    Returns:
+    int: The number of leaf nodes.
+    """
+    moves = game_state.generate_legal_moves()
+
+    if depth <= 1:
+        return len(moves) if depth == 1 else 1
+
+    nodes = 0
+    for move in moves:
+        game_state.make_move(move)
+        nodes += perft(game_state, depth - 1)
+        game_state.unmake_move()
+
+    return nodes
+
+
+def divide(game_state: Game_State, depth: int) -> List[Tuple[str, int]]:
+    """
+    Count the leaf nodes below each root move, for comparing against another move generator.
+
+    Parameters:
+    game_state (Game_State): The position to count from, left unchanged on return.
+    depth (int): The number of plies to search, including the root move.
+
+    Returns:
+    List[Tuple[str, int]]: Each root move in UCI notation with its leaf node count.
+    """
+    results = []
+
+    for move in game_state.generate_legal_moves():
+        game_state.make_move(move)
+        results.append((move_to_uci(move), perft(game_state, depth - 1)))
+        game_state.unmake_move()
+
+    return results
+
+
+def run_suite(max_nodes: int) -> bool:
+    """
+    Run perft on every reference position, skipping depths with more than max_nodes leaves.
+
+    Parameters:
+    max_nodes (int): The largest expected node count to search.
+
+    Returns:
+    bool: True if every count matched its reference value.
+    """
+    passed = True
+    total_nodes = 0
+    total_time = 0.0
+
+    for name, fen, expected_counts in REFERENCE_POSITIONS:
+        game_state = Game_State()
+        game_state.set_fen(fen)
+
+        for depth, expected in enumerate(expected_counts, start=1):
+            if expected > max_nodes:
+                break
+
+            start_time = time.perf_counter()
+            nodes = perft(game_state, depth)
+            elapsed = time.perf_counter() - start_time
+
+            total_nodes += nodes
+            total_time += elapsed
+            status = "ok" if nodes == expected else f"FAIL (expected {expected})"
+            passed = passed and nodes == expected
+
+            print(f"{name:<12} depth {depth}  {nodes:>10} nodes  {elapsed:8.3f}s  {nodes / max(elapsed, 1e-9):>10.0f} nps  {status}")
+
+    print(f"total        {total_nodes} nodes in {total_time:.3f}s, {total_nodes / max(total_time, 1e-9):.0f} nps")
+
+    return passed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Count move generator leaf nodes (perft).")
+    parser.add_argument("--fen", default=START_FEN, help="position to search from")
+    parser.add_argument("--depth", type=int, default=4, help="search depth in plies")
+    parser.add_argument("--divide", action="store_true", help="print the node count below each root move")
+    parser.add_argument("--suite", action="store_true", help="check the standard reference positions")
+    parser.add_argument("--max-nodes", type=int, default=250000, help="largest reference count the suite searches")
+    args = parser.parse_args()
+
+    if args.suite:
+        raise SystemExit(0 if run_suite(args.max_nodes) else 1)
+
+    game_state = Game_State()
+    game_state.set_fen(args.fen)
+    start_time = time.perf_counter()
+
+    if args.divide:
+        results = divide(game_state, args.depth)
+        for move, nodes in results:
+            print(f"{move}: {nodes}")
+        nodes = sum(count for _, count in results)
+    else:
+        nodes = perft(game_state, args.depth)
+
+    elapsed = time.perf_counter() - start_time
+    print(f"nodes {nodes}  time {elapsed:.3f}s  nps {nodes / max(elapsed, 1e-9):.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,397 @@
+import bz2
+import gzip
+import re
+
+from python.game_state import Game_State
+from python.move import (
+    CAPTURE, KING_CASTLE, PROMOTION, PROMOTION_PIECES, QUEEN_CASTLE, move_to_uci, square_name,
+)
+
+from typing import Dict, Iterator, List, NamedTuple, Optional, TextIO, Tuple
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+RESULTS = ("1-0", "0-1", "1/2-1/2", "*")
+
+# The tags every PGN game starts with, in the order the standard requires
+SEVEN_TAG_ROSTER = ("Event", "Site", "Date", "Round", "White", "Black", "Result")
+
+LINE_LENGTH = 80
+
+TAG_PATTERN = re.compile(r'\[\s*(\w+)\s+"((?:[^"\\]|\\.)*)"\s*\]')
+SAN_PATTERN = re.compile(r"^([NBRQK])?([a-h])?([1-8])?x?([a-h][1-8])(?:=?([NBRQ]))?$")
+MOVE_NUMBER_PATTERN = re.compile(r"^\d+\.+")
+
+
+class Pgn_Game(NamedTuple):
+    headers: Dict[str, str]
+    moves: List[str]
+    result: str
+
+
+def move_to_san(game_state: Game_State, move: int, legal_moves: Optional[List[int]] = None) -> str:
+    """
+    Format a move in Standard Algebraic Notation, e.g. "Nbd7", "exd6", "O-O" or "e8=Q+".
+
+    Parameters:
+    game_state (Game_State): The position before the move, unchanged on return.
+    move (int): A legal move in that position.
+    legal_moves (Optional[List[int]]): The legal moves of the position, if already generated.
+
+    Returns:
+    str: The move text, including a check or mate suffix.
+    """
+    if legal_moves is None:
+        legal_moves = game_state.generate_legal_moves()
+
+    flag = move >> 12
+    start = move & 63
+    end = (move >> 6) & 63
+    piece = game_state.board[start >> 3][start & 7][1]
+
+    if flag == KING_CASTLE:
+        text = "O-O"
+    elif flag == QUEEN_CASTLE:
+        text = "O-O-O"
+    elif piece == "P":
+        text = square_name(start)[0] + "x" if flag & CAPTURE else ""
+        text += square_name(end)
+        if flag & PROMOTION:
+            text += "=" + PROMOTION_PIECES[flag & 3]
+    else:
+        # Name the start file, rank or square when another piece of the same kind can reach the square
+        rivals = [
+            other & 63 for other in legal_moves
+            if other != move and (other >> 6) & 63 == end and (other & 63) != start
+            and game_state.board[(other & 63) >> 3][other & 7][1] == piece
+        ]
+        disambiguation = ""
+        if rivals:
+            if all((rival & 7) != (start & 7) for rival in rivals):
+                disambiguation = square_name(start)[0]
+            elif all((rival >> 3) != (start >> 3) for rival in rivals):
+                disambiguation = square_name(start)[1]
+            else:
+                disambiguation = square_name(start)
+
+        text = piece + disambiguation + ("x" if flag & CAPTURE else "") + square_name(end)
+
+    game_state.make_move(move)
+    if game_state.is_in_check():
+        text += "#" if not game_state.generate_legal_moves() else "+"
+    game_state.unmake_move()
+
+    return text
+
+
+def move_from_san(game_state: Game_State, text: str, legal_moves: Optional[List[int]] = None) -> int:
+    """
+    Find the legal move described by a SAN string.
+
+    Check and annotation suffixes are ignored, and castling may be written with zeros.
+
+    Parameters:
+    game_state (Game_State): The position the move is played in.
+    text (str): The move in Standard Algebraic Notation.
+    legal_moves (Optional[List[int]]): The legal moves of the position, if already generated.
+
+    Returns:
+    int: The packed move.
+    """
+    if legal_moves is None:
+        legal_moves = game_state.generate_legal_moves()
+
+    san = text.rstrip("+#!?").replace("0", "O")
+
+    if san in ("O-O", "O-O-O"):
+        flag = KING_CASTLE if san == "O-O" else QUEEN_CASTLE
+        for move in legal_moves:
+            if move >> 12 == flag:
+                return move
+        raise ValueError(f"Illegal move {text!r} in {game_state.get_fen()}")
+
+    match = SAN_PATTERN.match(san)
+    if match is None:
+        raise ValueError(f"Invalid SAN move {text!r}")
+
+    piece, from_file, from_rank, destination, promotion = match.groups()
+    piece = piece or "P"
+    board = game_state.board
+    candidates = []
+
+    for move in legal_moves:
+        start = move & 63
+        if square_name((move >> 6) & 63) != destination or board[start >> 3][start & 7][1] != piece:
+            continue
+
+        name = square_name(start)
+        if (from_file and name[0] != from_file) or (from_rank and name[1] != from_rank):
+            continue
+
+        flag = move >> 12
+        if flag & PROMOTION:
+            if PROMOTION_PIECES[flag & 3] != (promotion or "Q"):
+                continue
+        elif promotion:
+            continue
+
+        candidates.append(move)
+
+    if len(candidates) != 1:
+        problem = "Illegal" if not candidates else "Ambiguous"
+        raise ValueError(f"{problem} move {text!r} in {game_state.get_fen()}")
+
+    return candidates[0]
+
+
+def move_from_uci(game_state: Game_State, text: str, legal_moves: Optional[List[int]] = None) -> int:
+    """
+    Find the legal move described by UCI long algebraic notation, e.g. "e2e4" or "e7e8q".
+
+    Parameters:
+    game_state (Game_State): The position the move is played in.
+    text (str): The move text.
+    legal_moves (Optional[List[int]]): The legal moves of the position, if already generated.
+
+    Returns:
+    int: The packed move.
+    """
+    if legal_moves is None:
+        legal_moves = game_state.generate_legal_moves()
+
+    for move in legal_moves:
+        if move_to_uci(move) == text:
+            return move
+
+    raise ValueError(f"Illegal move {text!r} in {game_state.get_fen()}")
+
+
+def open_pgn(path: str) -> TextIO:
+    """
+    Open a PGN file for reading, decompressing .gz and .bz2 archives on the fly.
+
+    Parameters:
+    path (str): The file to open.
+
+    Returns:
+    TextIO: A text stream over the file.
+    """
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    if path.endswith(".bz2"):
+        return bz2.open(path, "rt", encoding="utf-8", errors="replace")
+    return open(path, "r", encoding="utf-8", errors="replace")
+
+
+def tokenize_movetext(line: str, depth: Tuple[int, bool]) -> Tuple[List[str], Tuple[int, bool]]:
+    """
+    Split a line of movetext into move and result tokens.
+
+    Comments, variations, NAGs and move numbers are dropped. Brace comments and
+    variations can span lines, so the nesting state is passed from line to line.
+
+    Parameters:
+    line (str): One line of movetext.
+    depth (Tuple[int, bool]): The open variation depth and whether a brace comment is open.
+
+    Returns:
+    Tuple[List[str], Tuple[int, bool]]: The tokens and the state at the end of the line.
+    """
+    variation_depth, in_comment = depth
+    tokens = []
+    token = ""
+
+    for char in line:
+        if in_comment:
+            if char == "}":
+                in_comment = False
+            continue
+
+        if char in " \t\r\n{}();":
+            if token:
+                if not variation_depth:
+                    tokens.append(token)
+                token = ""
+
+            if char == "{":
+                in_comment = True
+            elif char == "(":
+                variation_depth += 1
+            elif char == ")":
+                variation_depth = max(0, variation_depth - 1)
+            elif char == ";":
+                break
+            continue
+
+        token += char
+
+    if token and not variation_depth:
+        tokens.append(token)
+
+    moves = []
+    for token in tokens:
+        if token[0] == "$":
+            continue
+        token = MOVE_NUMBER_PATTERN.sub("", token).rstrip("!?")
+        if token:
+            moves.append(token)
+
+    return moves, (variation_depth, in_comment)
+
+
+def read_games(stream: TextIO) -> Iterator[Pgn_Game]:
+    """
+    Read the games of a PGN stream one at a time.
+
+    Only one game is held in memory at once, so archives of any size can be read.
+    Moves are returned as SAN text; replay_game turns them into positions.
+
+    Parameters:
+    stream (TextIO): The PGN text, e.g. from open_pgn.
+
+    Returns:
+    Iterator[Pgn_Game]: Each game's tags, moves and result.
+    """
+    headers: Dict[str, str] = {}
+    moves: List[str] = []
+    state = (0, False)
+    in_movetext = False
+
+    for line in stream:
+        stripped = line.strip()
+
+        if not state[1] and not state[0] and stripped.startswith("["):
+            # A tag after movetext starts the next game, even without a result token
+            if in_movetext:
+                yield Pgn_Game(headers, moves, headers.get("Result", "*"))
+                headers, moves, in_movetext = {}, [], False
+
+            match = TAG_PATTERN.match(stripped)
+            if match:
+                headers[match.group(1)] = match.group(2).replace('\\"', '"').replace("\\\\", "\\")
+            continue
+
+        if not stripped or stripped.startswith("%"):
+            continue
+
+        tokens, state = tokenize_movetext(line, state)
+        in_movetext = True
+
+        for token in tokens:
+            if token in RESULTS:
+                yield Pgn_Game(headers, moves, token)
+                headers, moves, state, in_movetext = {}, [], (0, False), False
+                break
+            moves.append(token)
+
+    if in_movetext or headers:
+        yield Pgn_Game(headers, moves, headers.get("Result", "*"))
+
+
+def replay_game(game: Pgn_Game) -> Iterator[Tuple[Game_State, int]]:
+    """
+    Play through a game, yielding each position together with the move played from it.
+
+    The same Game_State is yielded every time and the move is made once the caller
+    resumes the iterator, so copy anything that has to outlive the step.
+
+    Parameters:
+    game (Pgn_Game): The game to replay.
+
+    Returns:
+    Iterator[Tuple[Game_State, int]]: The position before each move and the move.
+    """
+    game_state = Game_State(game.headers.get("FEN", START_FEN))
+
+    for text in game.moves:
+        move = move_from_san(game_state, text)
+        yield game_state, move
+        game_state.make_move(move)
+
+
+def escape_tag(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def format_game(headers: Dict[str, str], moves: List[str], result: str, start_fen: str = START_FEN) -> str:
+    """
+    Format a game as PGN text.
+
+    Parameters:
+    headers (Dict[str, str]): The game tags; missing roster tags are written as "?".
+    moves (List[str]): The moves in SAN.
+    result (str): "1-0", "0-1", "1/2-1/2" or "*".
+    start_fen (str): The starting position, written as a FEN tag when it is not the standard one.
+
+    Returns:
+    str: The game, ending with a blank line.
+    """
+    headers = dict(headers)
+    headers["Result"] = result
+    if start_fen != START_FEN:
+        headers["SetUp"] = "1"
+        headers["FEN"] = start_fen
+
+    lines = [f'[{tag} "{escape_tag(headers.get(tag, "?"))}"]' for tag in SEVEN_TAG_ROSTER]
+    lines += [f'[{tag} "{escape_tag(value)}"]' for tag, value in headers.items() if tag not in SEVEN_TAG_ROSTER]
+    lines.append("")
+
+    fields = start_fen.split()
+    move_number = int(fields[5]) if len(fields) > 5 else 1
+    black_first = fields[1] == "b"
+
+    words = []
+    for index, san in enumerate(moves):
+        white_to_move = (index % 2 == 0) != black_first
+        if white_to_move:
+            words.append(f"{move_number}. {san}")
+        else:
+            if index == 0:
+                words.append(f"{move_number}... {san}")
+            else:
+                words.append(san)
+            move_number += 1
+    words.append(result)
+
+    line = ""
+    for word in words:
+        if line and len(line) + 1 + len(word) > LINE_LENGTH:
+            lines.append(line)
+            line = word
+        else:
+            line = f"{line} {word}" if line else word
+    lines.append(line)
+
+    return "\n".join(lines) + "\n\n"
+
+
+def game_to_pgn(game_state: Game_State, headers: Optional[Dict[str, str]] = None, result: str = "*") -> str:
+    """
+    Record the moves made on a Game_State as a PGN game.
+
+    The moves are taken back to find the starting position and then replayed, so the
+    position is the same on return.
+
+    Parameters:
+    game_state (Game_State): The game to record.
+    headers (Optional[Dict[str, str]]): Extra tags for the game.
+    result (str): The game result.
+
+    Returns:
+    str: The game as PGN text.
+    """
+    moves = [entry[0] for entry in game_state.undo_stack]
+    for _ in moves:
+        game_state.unmake_move()
+
+    start_fen = game_state.get_fen()
+    san_moves = []
+    for move in moves:
+        san_moves.append(move_to_san(game_state, move))
+        game_state.make_move(move)
+
+    return format_game(headers or {}, san_moves, result, start_fen)
+
+
+def write_game(stream: TextIO, game_state: Game_State, headers: Optional[Dict[str, str]] = None, result: str = "*") -> None:
+    stream.write(game_to_pgn(game_state, headers, result))
@@ -0,0 +1,252 @@
+import argparse
+import csv
+import gzip
+import itertools
+import os
+import random
+import sqlite3
+import time
+
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+DEFAULT_DATABASE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "puzzles", "puzzles.db")
+
+# Written in place of the opponent's setup move for puzzles that start from the stored position
+NULL_MOVE = "0000"
+
+# Puzzles are inserted in batches of this many rows per transaction
+INSERT_BATCH = 10000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS puzzles (
+    id INTEGER PRIMARY KEY,
+    puzzle_id TEXT NOT NULL UNIQUE,
+    fen TEXT NOT NULL,
+    moves TEXT NOT NULL,
+    rating INTEGER NOT NULL,
+    popularity INTEGER NOT NULL DEFAULT 0,
+    piece_count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS puzzle_themes (
+    theme TEXT NOT NULL,
+    rating INTEGER NOT NULL,
+    puzzle INTEGER NOT NULL REFERENCES puzzles (id),
+    PRIMARY KEY (theme, rating, puzzle)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS puzzles_by_rating ON puzzles (rating);
+CREATE INDEX IF NOT EXISTS puzzles_by_piece_count ON puzzles (piece_count, rating);
+CREATE INDEX IF NOT EXISTS puzzle_themes_by_puzzle ON puzzle_themes (puzzle);
+"""
+
+
+class Puzzle(NamedTuple):
+    puzzle_id: str
+    fen: str
+    moves: List[str]
+    rating: int
+    themes: List[str]
+
+
+def count_pieces(fen: str) -> int:
+    return sum(char.isalpha() for char in fen.split(" ", 1)[0])
+
+
+class Puzzle_Database:
+    """
+    Puzzle collection stored in an SQLite file.
+
+    Puzzles are indexed by rating, by piece count and rating, and through a separate
+    theme table by theme and rating, so choosing a puzzle is an index lookup and opening
+    the database reads nothing up front however many puzzles it holds.
+
+    Each puzzle follows the Lichess layout: the FEN is the position before the
+    opponent's move, and moves holds that move followed by the solution in UCI notation.
+    The setup move is NULL_MOVE when the puzzle starts from the stored position.
+    """
+
+    def __init__(self, path: str = DEFAULT_DATABASE, read_only: bool = False) -> None:
+        if read_only:
+            self.connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self.connection = sqlite3.connect(path)
+            self.connection.executescript(SCHEMA)
+
+    def __enter__(self) -> "Puzzle_Database":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def count(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM puzzles").fetchone()[0]
+
+    def add_puzzles(self, puzzles: Iterable[Puzzle], popularity: int = 0) -> int:
+        """
+        Insert puzzles, replacing any stored puzzle with the same id.
+
+        Parameters:
+        puzzles (Iterable[Puzzle]): The puzzles to store.
+        popularity (int): The popularity given to every puzzle.
+
+        Returns:
+        int: The number of puzzles written.
+        """
+        return self.write((puzzle, popularity) for puzzle in puzzles)
+
+    def import_lichess_csv(self, path: str) -> int:
+        """
+        Import the Lichess puzzle database CSV (plain or .gz).
+
+        Parameters:
+        path (str): The CSV file, with the PuzzleId, FEN, Moves, Rating, Popularity and Themes columns.
+
+        Returns:
+        int: The number of puzzles imported.
+        """
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8", newline="") as file:
+            rows = csv.reader(file)
+            header = next(rows, None)
+            if header is None:
+                return 0
+
+            # Older exports have no header row, so fall back to the documented column order
+            if header[0] == "PuzzleId":
+                columns = {name: index for index, name in enumerate(header)}
+            else:
+                columns = {"PuzzleId": 0, "FEN": 1, "Moves": 2, "Rating": 3, "Popularity": 5, "Themes": 7}
+                rows = itertools.chain([header], rows)
+
+            return self.write(
+                (
+                    Puzzle(
+                        row[columns["PuzzleId"]], row[columns["FEN"]], row[columns["Moves"]].split(),
+                        int(row[columns["Rating"]]), row[columns["Themes"]].split(),
+                    ),
+                    int(row[columns["Popularity"]] or 0),
+                )
+                for row in rows
+            )
+
+    def write(self, entries: Iterable[Tuple[Puzzle, int]]) -> int:
+        written = 0
+        batch = []
+
+        for entry in entries:
+            batch.append(entry)
+            if len(batch) == INSERT_BATCH:
+                written += self.write_batch(batch)
+                batch = []
+
+        if batch:
+            written += self.write_batch(batch)
+
+        return written
+
+    def write_batch(self, batch: List[Tuple[Puzzle, int]]) -> int:
+        with self.connection:
+            cursor = self.connection.cursor()
+            for puzzle, popularity in batch:
+                values = (puzzle.fen, " ".join(puzzle.moves), puzzle.rating, popularity, count_pieces(puzzle.fen), puzzle.puzzle_id)
+                cursor.execute(
+                    "INSERT OR IGNORE INTO puzzles (fen, moves, rating, popularity, piece_count, puzzle_id) VALUES (?, ?, ?, ?, ?, ?)",
+                    values,
+                )
+
+                if cursor.rowcount:
+                    row_id = cursor.lastrowid
+                else:
+                    # Only a puzzle already in the database is replaced, keeping its row id
+                    (row_id,) = cursor.execute("SELECT id FROM puzzles WHERE puzzle_id = ?", (puzzle.puzzle_id,)).fetchone()
+                    cursor.execute("UPDATE puzzles SET fen = ?, moves = ?, rating = ?, popularity = ?, piece_count = ? WHERE puzzle_id = ?", values)
+                    cursor.execute("DELETE FROM puzzle_themes WHERE puzzle = ?", (row_id,))
+
+                cursor.executemany(
+                    "INSERT OR IGNORE INTO puzzle_themes (theme, rating, puzzle) VALUES (?, ?, ?)",
+                    [(theme, puzzle.rating, row_id) for theme in puzzle.themes],
+                )
+
+        return len(batch)
+
+    def get(self, puzzle_id: str) -> Optional[Puzzle]:
+        row = self.connection.execute("SELECT id, puzzle_id, fen, moves, rating FROM puzzles WHERE puzzle_id = ?", (puzzle_id,)).fetchone()
+        return self.make_puzzle(row) if row else None
+
+    def make_puzzle(self, row) -> Puzzle:
+        row_id, puzzle_id, fen, moves, rating = row
+        themes = [theme for (theme,) in self.connection.execute("SELECT theme FROM puzzle_themes WHERE puzzle = ?", (row_id,))]
+        return Puzzle(puzzle_id, fen, moves.split(), rating, themes)
+
+    def random_puzzle(
+        self,
+        min_rating: int = 0,
+        max_rating: int = 4000,
+        theme: Optional[str] = None,
+        max_pieces: Optional[int] = None,
+    ) -> Optional[Puzzle]:
+        """
+        Pick a puzzle at random from those matching the filters.
+
+        Every matching puzzle is equally likely: the matches are counted through the rating
+        index and the one at a random offset among them is read.
+
+        Parameters:
+        min_rating (int): The lowest puzzle rating.
+        max_rating (int): The highest puzzle rating.
+        theme (Optional[str]): A Lichess theme the puzzle must have, e.g. "mateIn2".
+        max_pieces (Optional[int]): The most pieces the position may have.
+
+        Returns:
+        Optional[Puzzle]: The puzzle, or None if nothing matches.
+        """
+        # Counting and skipping use only the covering indexes; just the chosen row is read
+        if theme is not None:
+            query = "SELECT {} FROM puzzle_themes t JOIN puzzles p ON p.id = t.puzzle WHERE t.theme = ? AND t.rating BETWEEN ? AND ?"
+            parameters = [theme]
+            row_id, rating_column = "t.puzzle", "t.rating"
+        else:
+            query = "SELECT {} FROM puzzles p WHERE p.rating BETWEEN ? AND ?"
+            parameters = []
+            row_id, rating_column = "p.id", "p.rating"
+
+        if max_pieces is not None:
+            query += " AND p.piece_count <= ?"
+
+        values = parameters + [min_rating, max_rating] + ([max_pieces] if max_pieces is not None else [])
+
+        (count,) = self.connection.execute(query.format("COUNT(*)"), values).fetchone()
+        if not count:
+            return None
+
+        (chosen,) = self.connection.execute(
+            query.format(row_id) + f" ORDER BY {rating_column} LIMIT 1 OFFSET ?", values + [random.randrange(count)]
+        ).fetchone()
+        row = self.connection.execute("SELECT id, puzzle_id, fen, moves, rating FROM puzzles WHERE id = ?", (chosen,)).fetchone()
+
+        return self.make_puzzle(row)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build and inspect the puzzle database.")
+    parser.add_argument("--db", default=DEFAULT_DATABASE, help="SQLite database file")
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_parser = commands.add_parser("import", help="import the Lichess puzzle CSV")
+    import_parser.add_argument("csv", help="lichess_db_puzzle.csv, optionally gzipped")
+    commands.add_parser("stats", help="print the number of puzzles")
+    args = parser.parse_args()
+
+    with Puzzle_Database(args.db) as database:
+        if args.command == "import":
+            start_time = time.perf_counter()
+            count = database.import_lichess_csv(args.csv)
+            print(f"Imported {count} puzzles in {time.perf_counter() - start_time:.1f}s")
+        else:
+            print(f"{database.count()} puzzles")
+
+
+if __name__ == "__main__":
+    main()
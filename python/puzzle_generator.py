@@ -0,0 +1,325 @@
+import argparse
+import hashlib
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from python.analysis import probe
+from python.game_state import Game_State
+from python.move import move_to_uci
+from python.pgn import Pgn_Game, START_FEN, move_from_san, open_pgn, read_games
+from python.puzzle_db import DEFAULT_DATABASE, NULL_MOVE, Puzzle, Puzzle_Database
+from python.search import MATE_SCORE, MAX_PLY, Search
+
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+# The solver's best move must score at least this much for a position to be a puzzle
+WINNING_SCORE = 250
+
+# Plies skipped at the start of each game, where blunders rarely make good puzzles
+MIN_GAME_PLY = 8
+
+# Hex digits of the position and solution hash kept as the puzzle id: 64 bits, so ids
+# of distinct puzzles do not collide even among millions
+PUZZLE_ID_DIGITS = 16
+
+# The per-process searcher, created once by init_worker
+worker_search: Optional[Search] = None
+
+
+class Generator_Settings(NamedTuple):
+    depth: int
+    margin: int
+    max_moves: int
+
+
+def init_worker(hash_size_mb: float) -> None:
+    global worker_search
+    worker_search = Search(hash_size_mb=hash_size_mb)
+
+
+def is_mate_score(score: int) -> bool:
+    return abs(score) >= MATE_SCORE - MAX_PLY
+
+
+def score_moves(search: Search, game_state: Game_State, depth: int) -> List[Tuple[int, int]]:
+    """
+    Score every legal move with a search of the position it leads to.
+
+    Parameters:
+    search (Search): The searcher to use.
+    game_state (Game_State): The position, unchanged on return.
+    depth (int): The search depth including the move itself.
+
+    Returns:
+    List[Tuple[int, int]]: (score, move) pairs from the side to move's point of view, best first.
+    """
+    scored = []
+
+    for move in game_state.generate_legal_moves():
+        game_state.make_move(move)
+        score, _ = probe(search, game_state, max(1, depth - 1))
+        game_state.unmake_move()
+        scored.append((-score, move))
+
+    scored.sort(reverse=True)
+
+    return scored
+
+
+def solve(search: Search, game_state: Game_State, settings: Generator_Settings) -> Optional[List[int]]:
+    """
+    Find the forced winning line of a position, if it has exactly one.
+
+    At every solver turn the best move must be a mate or win at least WINNING_SCORE, and
+    every other move must score at least settings.margin less, or not mate at all when
+    the best move mates. The final mating move is the exception: any mate solves it. The
+    defender answers with its best reply each time. The line ends at mate, when the
+    solver's best move is no longer unique, or after settings.max_moves solver moves, and
+    always ends with a solver move.
+
+    Parameters:
+    search (Search): The searcher to use.
+    game_state (Game_State): The puzzle position, solver to move; unchanged on return.
+    settings (Generator_Settings): The search depth, uniqueness margin and line length.
+
+    Returns:
+    Optional[List[int]]: The solution moves, alternating solver and defender, or None.
+    """
+    line: List[int] = []
+    solver_moves = 0
+
+    while solver_moves < settings.max_moves:
+        scored = score_moves(search, game_state, settings.depth)
+        if not scored:
+            break
+
+        best_score, best_move = scored[0]
+        second_score = scored[1][0] if len(scored) > 1 else -MATE_SCORE
+        mates_now = best_score == MATE_SCORE
+
+        if is_mate_score(best_score) and best_score > 0:
+            unique = mates_now or not (is_mate_score(second_score) and second_score > 0)
+        else:
+            unique = best_score >= WINNING_SCORE and second_score <= best_score - settings.margin
+
+        if not unique:
+            break
+
+        game_state.make_move(best_move)
+        line.append(best_move)
+        solver_moves += 1
+
+        if mates_now or solver_moves == settings.max_moves:
+            break
+
+        replies = score_moves(search, game_state, settings.depth)
+        if not replies:
+            break
+
+        game_state.make_move(replies[0][1])
+        line.append(replies[0][1])
+
+    for _ in line:
+        game_state.unmake_move()
+
+    # A line cut short after a defender's reply gives that reply back
+    if len(line) % 2 == 0:
+        line = line[:-1]
+
+    return line or None
+
+
+def make_puzzle(game_state: Game_State, setup_move: Optional[int], solution: List[int]) -> Puzzle:
+    """
+    Build the puzzle record for a solved position.
+
+    The rating is a rough estimate from the length of the solution and whether it mates.
+
+    Parameters:
+    game_state (Game_State): The position before the setup move, or the puzzle position when there is none.
+    setup_move (Optional[int]): The opponent's move that sets up the puzzle.
+    solution (List[int]): The solution line.
+
+    Returns:
+    Puzzle: The puzzle, with an id derived from its position and moves.
+    """
+    fen = game_state.get_fen()
+    moves = [move_to_uci(setup_move) if setup_move is not None else NULL_MOVE] + [move_to_uci(move) for move in solution]
+
+    if setup_move is not None:
+        game_state.make_move(setup_move)
+    for move in solution:
+        game_state.make_move(move)
+    mated = not game_state.generate_legal_moves() and game_state.is_in_check()
+    for _ in range(len(solution) + (setup_move is not None)):
+        game_state.unmake_move()
+
+    solver_moves = (len(solution) + 1) // 2
+    themes = ["mate", f"mateIn{solver_moves}"] if mated else ["advantage"]
+    themes.append("oneMove" if solver_moves == 1 else "short" if solver_moves == 2 else "long")
+    if game_state.phase <= 6:
+        themes.append("endgame")
+
+    rating = 800 + 250 * solver_moves + (0 if mated else 200)
+    puzzle_id = hashlib.sha1(f"{fen} {' '.join(moves)}".encode()).hexdigest()[:PUZZLE_ID_DIGITS]
+
+    return Puzzle(puzzle_id, fen, moves, rating, themes)
+
+
+def puzzles_from_game(game: Pgn_Game, settings: Generator_Settings) -> List[Puzzle]:
+    """
+    Find puzzles in a game: positions after a move that lost at least the margin.
+
+    Every position is scored with a shallow probe; the solver only runs on positions
+    reached by a blunder, where the player to move has a winning reply.
+
+    Parameters:
+    game (Pgn_Game): The game to search.
+    settings (Generator_Settings): The solver settings.
+
+    Returns:
+    List[Puzzle]: The puzzles found.
+    """
+    try:
+        game_state = Game_State(game.headers.get("FEN", START_FEN))
+    except ValueError:
+        return []
+
+    puzzles = []
+    score, legal_moves = probe(worker_search, game_state, 1)
+
+    for ply, text in enumerate(game.moves):
+        try:
+            move = move_from_san(game_state, text, legal_moves)
+        except ValueError:
+            break
+
+        game_state.make_move(move)
+        next_score, legal_moves = probe(worker_search, game_state, 1)
+
+        if ply >= MIN_GAME_PLY and score + next_score >= settings.margin and next_score >= WINNING_SCORE:
+            solution = solve(worker_search, game_state, settings)
+            if solution is not None:
+                game_state.unmake_move()
+                puzzles.append(make_puzzle(game_state, move, solution))
+                game_state.make_move(move)
+
+        score = next_score
+
+    return puzzles
+
+
+def puzzles_from_fen(fen: str, settings: Generator_Settings) -> List[Puzzle]:
+    try:
+        game_state = Game_State(fen)
+    except ValueError:
+        return []
+
+    solution = solve(worker_search, game_state, settings)
+
+    return [make_puzzle(game_state, None, solution)] if solution is not None else []
+
+
+def generate_chunk(candidates: List, settings: Generator_Settings) -> Tuple[List[Puzzle], int]:
+    puzzles = []
+    for candidate in candidates:
+        if isinstance(candidate, str):
+            puzzles += puzzles_from_fen(candidate, settings)
+        else:
+            puzzles += puzzles_from_game(candidate, settings)
+
+    return puzzles, len(candidates)
+
+
+def read_fens(path: str) -> Iterator[str]:
+    with open(path, "r") as file:
+        for line in file:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield line
+
+
+def chunk_candidates(candidates: Iterator, chunk_size: int) -> Iterator[List]:
+    chunk = []
+    for candidate in candidates:
+        chunk.append(candidate)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def generate_puzzles(
+    candidates: Iterator,
+    database_path: str,
+    workers: int,
+    settings: Generator_Settings,
+    chunk_size: int,
+    hash_size_mb: float = 4,
+) -> int:
+    """
+    Solve candidate games or positions in a process pool and store the puzzles found.
+
+    Parameters:
+    candidates (Iterator): Pgn_Game objects or FEN strings.
+    database_path (str): The puzzle database to write to.
+    workers (int): The number of worker processes.
+    settings (Generator_Settings): The solver settings.
+    chunk_size (int): The number of candidates sent to a worker at once.
+    hash_size_mb (float): The transposition table size of each worker.
+
+    Returns:
+    int: The number of puzzles written.
+    """
+    start_time = time.perf_counter()
+    checked = 0
+    written = 0
+    pending = deque()
+
+    with Puzzle_Database(database_path) as database, ProcessPoolExecutor(
+        max_workers=workers, initializer=init_worker, initargs=(hash_size_mb,)
+    ) as pool:
+
+        def store_next() -> None:
+            nonlocal checked, written
+            puzzles, count = pending.popleft().result()
+            written += database.add_puzzles(puzzles)
+            checked += count
+            print(f"checked {checked}  puzzles {written}  {checked / max(time.perf_counter() - start_time, 1e-9):.2f} candidates/s")
+
+        for chunk in chunk_candidates(candidates, chunk_size):
+            if len(pending) >= workers * 2:
+                store_next()
+            pending.append(pool.submit(generate_chunk, chunk, settings))
+
+        while pending:
+            store_next()
+
+    return written
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Find and verify puzzles with forced unique solutions.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--pgn", help="PGN games to search for blunders (.pgn, .pgn.gz or .pgn.bz2)")
+    source.add_argument("--fens", help="text file with one candidate FEN per line, solver to move")
+    parser.add_argument("--db", default=DEFAULT_DATABASE, help="puzzle database to write to")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="number of worker processes")
+    parser.add_argument("--depth", type=int, default=3, help="search depth used to score each move")
+    parser.add_argument("--margin", type=int, default=200, help="centipawns the best move must beat every other move by")
+    parser.add_argument("--max-moves", type=int, default=3, help="most solver moves in a solution")
+    parser.add_argument("--chunk-size", type=int, default=4, help="candidates sent to a worker at once")
+    args = parser.parse_args()
+
+    candidates = read_games(open_pgn(args.pgn)) if args.pgn else read_fens(args.fens)
+    settings = Generator_Settings(args.depth, args.margin, args.max_moves)
+    written = generate_puzzles(candidates, args.db, max(1, args.workers), settings, args.chunk_size)
+
+    print(f"Wrote {written} puzzles to {args.db}")
+
+
+if __name__ == "__main__":
+    main()
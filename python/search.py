@@ -0,0 +1,360 @@
+import threading
+import time
+
+from python.evaluation import PIECE_VALUES, evaluate
+from python.move import CAPTURE, EN_PASSANT, PROMOTION
+from python.tablebase import MAX_PIECES, Tablebase, Tablebase_Result, get_tablebase
+from python.transposition import EXACT, LOWER_BOUND, UPPER_BOUND, Transposition_Table
+
+from typing import Callable, List, NamedTuple, Optional
+
+MATE_SCORE = 30000
+MAX_PLY = 128
+INFINITY = 32000
+DRAW_SCORE = 0
+
+# Nodes searched between checks of the clock, node budget and stop flag; at a few
+# thousand nodes per second this keeps a stop request to a few milliseconds
+CHECK_INTERVAL = 32
+
+HASH_MOVE_SCORE = 1 << 30
+CAPTURE_SCORE = 1 << 24
+KILLER_SCORES = (1 << 22, 1 << 21)
+
+
+class Search_Result(NamedTuple):
+    move: Optional[int]
+    score: int
+    depth: int
+    nodes: int
+    elapsed: float
+    pv: List[int]
+
+
+class Search_Stopped(Exception):
+    pass
+
+
+def score_to_tt(score: int, ply: int) -> int:
+    # Mate scores are stored as distance from this node so they stay valid at any ply
+    if score >= MATE_SCORE - MAX_PLY:
+        return score + ply
+    if score <= -MATE_SCORE + MAX_PLY:
+        return score - ply
+    return score
+
+
+def tablebase_score(result: Tablebase_Result, ply: int) -> int:
+    # Tablebase distances count plies to mate from the probed node, like mate scores
+    if result.wdl > 0:
+        return MATE_SCORE - ply - result.distance
+    if result.wdl < 0:
+        return -MATE_SCORE + ply + result.distance
+    return DRAW_SCORE
+
+
+def score_from_tt(score: int, ply: int) -> int:
+    if score >= MATE_SCORE - MAX_PLY:
+        return score - ply
+    if score <= -MATE_SCORE + MAX_PLY:
+        return score + ply
+    return score
+
+
+class Search:
+    """
+    Iterative-deepening principal variation search over a Game_State.
+
+    Each iteration runs a negamax alpha-beta search with quiescence search at the
+    leaves. Results are cached in a transposition table, and moves are ordered by the
+    table's best move, MVV-LVA for captures, two killer moves per ply and the history
+    heuristic for quiet moves. Positions with few enough pieces are scored from the
+    endgame tablebases when their table has been generated.
+    """
+
+    def __init__(
+        self,
+        transposition_table: Optional[Transposition_Table] = None,
+        hash_size_mb: float = 16,
+        stop_event=None,
+        tablebase: Optional[Tablebase] = None,
+    ) -> None:
+        self.tt = transposition_table if transposition_table is not None else Transposition_Table(hash_size_mb)
+        # A stop event passed in is shared with other searchers and cleared by its owner
+        self._owns_stop_event = stop_event is None
+        self.stop_event = stop_event if stop_event is not None else threading.Event()
+        self.tablebase = tablebase if tablebase is not None else get_tablebase()
+        self.nodes = 0
+        self.killers: List[List[int]] = [[0, 0] for _ in range(MAX_PLY + 1)]
+        self.history: List[int] = [0] * 4096
+        self.pv_table: List[List[int]] = [[] for _ in range(MAX_PLY + 1)]
+        self.root_depth = 0
+        self.previous_pv: List[int] = []
+
+        self._deadline: Optional[float] = None
+        self._node_limit: Optional[int] = None
+        self._next_check = CHECK_INTERVAL
+
+    def stop(self) -> None:
+        self.stop_event.set()
+
+    def search(
+        self,
+        game_state,
+        max_depth: int = MAX_PLY,
+        time_limit: Optional[float] = None,
+        node_limit: Optional[int] = None,
+        info_callback: Optional[Callable[[Search_Result], None]] = None,
+        start_depth: int = 1,
+    ) -> Search_Result:
+        """
+        Search the position and return the best move found within the budget.
+
+        The search deepens one ply at a time until max_depth is reached or the time or
+        node budget runs out; the result of the last completed iteration is returned.
+        The position is restored before returning, even when the search is stopped.
+
+        Parameters:
+        game_state (Game_State): The position to search.
+        max_depth (int): The deepest iteration to run.
+        time_limit (Optional[float]): The search budget in seconds.
+        node_limit (Optional[int]): The search budget in nodes.
+        info_callback (Optional[Callable[[Search_Result], None]]): Called after every completed iteration.
+        start_depth (int): The first iteration to run; helper searchers start deeper.
+
+        Returns:
+        Search_Result: The best move, its score and the principal variation.
+        """
+        start_time = time.perf_counter()
+        self._deadline = start_time + time_limit if time_limit is not None else None
+        self._node_limit = node_limit
+        self._next_check = CHECK_INTERVAL
+        self.nodes = 0
+        if self._owns_stop_event:
+            self.stop_event.clear()
+        self.killers = [[0, 0] for _ in range(MAX_PLY + 1)]
+        self.history = [value >> 3 for value in self.history]
+        self.tt.new_search()
+
+        root_moves = game_state.generate_legal_moves()
+        result = Search_Result(root_moves[0] if root_moves else None, 0, 0, 0, 0.0, root_moves[:1])
+
+        if len(root_moves) <= 1:
+            return result
+
+        if game_state.bitboards.occupied.bit_count() <= MAX_PIECES:
+            tablebase_result = self.tablebase.probe_best_move(game_state)
+            if tablebase_result is not None and tablebase_result.move is not None:
+                score = tablebase_score(tablebase_result, 0)
+                return Search_Result(tablebase_result.move, score, 0, 0, time.perf_counter() - start_time, [tablebase_result.move])
+
+        undo_depth = len(game_state.undo_stack)
+        previous_pv: List[int] = []
+
+        for depth in range(min(start_depth, max_depth), max_depth + 1):
+            self.root_depth = depth
+            self.previous_pv = previous_pv
+
+            try:
+                score = self.negamax(game_state, depth, -INFINITY, INFINITY, 0)
+            except Search_Stopped:
+                while len(game_state.undo_stack) > undo_depth:
+                    game_state.unmake_move()
+                break
+
+            previous_pv = list(self.pv_table[0])
+            elapsed = time.perf_counter() - start_time
+            result = Search_Result(previous_pv[0], score, depth, self.nodes, elapsed, previous_pv)
+
+            if info_callback is not None:
+                info_callback(result)
+
+            if abs(score) >= MATE_SCORE - MAX_PLY:
+                break
+
+            # Another iteration costs several times the last one, so do not start it late
+            if self._deadline is not None and time.perf_counter() > start_time + time_limit * 0.5:
+                break
+
+        return result._replace(nodes=self.nodes, elapsed=time.perf_counter() - start_time)
+
+    def check_limits(self) -> None:
+
+        self._next_check = self.nodes + CHECK_INTERVAL
+
+        if self.stop_event.is_set():
+            raise Search_Stopped()
+
+        if self._deadline is not None and time.perf_counter() >= self._deadline:
+            raise Search_Stopped()
+
+        if self._node_limit is not None and self.nodes >= self._node_limit:
+            raise Search_Stopped()
+
+    def negamax(self, game_state, depth: int, alpha: int, beta: int, ply: int) -> int:
+
+        self.pv_table[ply] = []
+        alpha_original = alpha
+
+        in_check = game_state.is_in_check()
+        if in_check:
+            depth += 1
+
+        if depth <= 0:
+            return self.quiescence(game_state, alpha, beta, ply)
+
+        self.nodes += 1
+        if self.nodes >= self._next_check:
+            self.check_limits()
+
+        # Repeating a position or running out the fifty-move count draws whatever follows,
+        # which keeps the engine from shuffling in won positions and finds drawing lines when behind
+        if ply > 0:
+            if game_state.is_repetition():
+                return DRAW_SCORE
+            # Mate delivered on the hundredth halfmove still counts, as in Game_State.game_end
+            if game_state.halfmove_clock >= 100 and (not in_check or game_state.generate_legal_moves()):
+                return DRAW_SCORE
+
+        if ply > 0 and game_state.bitboards.occupied.bit_count() <= MAX_PIECES:
+            tablebase_result = self.tablebase.probe(game_state)
+            if tablebase_result is not None:
+                return tablebase_score(tablebase_result, ply)
+
+        key = game_state.zobrist_key
+        entry = self.tt.probe(key)
+        hash_move = 0
+
+        if entry is not None:
+            hash_move, tt_score, tt_depth, bound = entry
+
+            # Cut off only outside the principal variation so the PV stays complete
+            if tt_depth >= depth and ply > 0 and beta - alpha == 1:
+                tt_score = score_from_tt(tt_score, ply)
+                if bound == EXACT or (bound == LOWER_BOUND and tt_score >= beta) or (bound == UPPER_BOUND and tt_score <= alpha):
+                    return tt_score
+
+        moves = game_state.generate_legal_moves()
+
+        if not moves:
+            return -MATE_SCORE + ply if in_check else DRAW_SCORE
+
+        if ply >= MAX_PLY:
+            return evaluate(game_state)
+
+        if not hash_move and ply < len(self.previous_pv):
+            hash_move = self.previous_pv[ply]
+        moves = self.order_moves(game_state, moves, ply, hash_move)
+
+        best_score = -INFINITY
+        best_move = 0
+
+        for index, move in enumerate(moves):
+            game_state.make_move(move)
+
+            if index == 0:
+                score = -self.negamax(game_state, depth - 1, -beta, -alpha, ply + 1)
+            else:
+                # Later moves are expected to fail low, so prove it with a null window first
+                score = -self.negamax(game_state, depth - 1, -alpha - 1, -alpha, ply + 1)
+                if alpha < score < beta:
+                    score = -self.negamax(game_state, depth - 1, -beta, -alpha, ply + 1)
+
+            game_state.unmake_move()
+
+            if score > best_score:
+                best_score = score
+                best_move = move
+
+                if score > alpha:
+                    alpha = score
+                    self.pv_table[ply] = [move] + self.pv_table[ply + 1]
+
+                    if score >= beta:
+                        if not (move >> 12) & (CAPTURE | PROMOTION):
+                            self.store_quiet_cutoff(move, depth, ply)
+                        break
+
+        if best_score >= beta:
+            bound = LOWER_BOUND
+        elif best_score > alpha_original:
+            bound = EXACT
+        else:
+            bound = UPPER_BOUND
+            best_move = 0
+
+        self.tt.store(key, best_move, score_to_tt(best_score, ply), depth, bound)
+
+        return best_score
+
+    def quiescence(self, game_state, alpha: int, beta: int, ply: int) -> int:
+
+        self.nodes += 1
+        if self.nodes >= self._next_check:
+            self.check_limits()
+
+        moves = game_state.generate_legal_moves()
+
+        if not moves:
+            in_check = game_state.is_in_check()
+            return -MATE_SCORE + ply if in_check else DRAW_SCORE
+
+        stand_pat = evaluate(game_state)
+
+        if stand_pat >= beta or ply >= MAX_PLY:
+            return stand_pat
+        if stand_pat > alpha:
+            alpha = stand_pat
+
+        tactical_moves = [move for move in moves if (move >> 12) & (CAPTURE | PROMOTION)]
+
+        for move in self.order_moves(game_state, tactical_moves, ply, 0):
+            game_state.make_move(move)
+            score = -self.quiescence(game_state, -beta, -alpha, ply + 1)
+            game_state.unmake_move()
+
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+
+        return alpha
+
+    def order_moves(self, game_state, moves: List[int], ply: int, hash_move: int) -> List[int]:
+
+        board = game_state.board
+        killer_1, killer_2 = self.killers[ply]
+        history = self.history
+        scores = {}
+
+        for move in moves:
+            flag = move >> 12
+
+            if move == hash_move:
+                scores[move] = HASH_MOVE_SCORE
+            elif flag & (CAPTURE | PROMOTION):
+                end = (move >> 6) & 63
+                start = move & 63
+                victim = "P" if flag == EN_PASSANT else board[end >> 3][end & 7][1]
+                # MVV-LVA: the most valuable victim first, the least valuable attacker breaking ties
+                score = CAPTURE_SCORE + PIECE_VALUES.get(victim, 0) * 16 - PIECE_VALUES[board[start >> 3][start & 7][1]] // 16
+                if flag & PROMOTION:
+                    score += PIECE_VALUES["NBRQ"[flag & 3]] * 16
+                scores[move] = score
+            elif move == killer_1:
+                scores[move] = KILLER_SCORES[0]
+            elif move == killer_2:
+                scores[move] = KILLER_SCORES[1]
+            else:
+                scores[move] = history[move & 4095]
+
+        return sorted(moves, key=scores.__getitem__, reverse=True)
+
+    def store_quiet_cutoff(self, move: int, depth: int, ply: int) -> None:
+
+        killers = self.killers[ply]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+
+        self.history[move & 4095] += depth * depth
@@ -0,0 +1,792 @@
+import argparse
+import itertools
+import mmap
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from python.game_rules import KING_ATTACKS, KNIGHT_ATTACKS, PAWN_ATTACKS, bishop_attacks, queen_attacks, rook_attacks
+
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+DEFAULT_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tablebases")
+
+MAX_PIECES = 4
+
+# One byte per position, from the side to move's point of view: 0 is a draw, 1 to 127
+# a win in that many plies, 255 - n a loss in n plies (255 is checkmated). 128 marks
+# impossible positions and the duplicates removed by symmetry.
+DRAW = 0
+ILLEGAL = 128
+LOSS = 255
+
+# Pieces of a side are written strongest first, and the side with more or stronger pieces is White
+PIECE_ORDER = "KQRBNP"
+PROMOTIONS = "QRBN"
+
+
+def is_win(value: int) -> bool:
+    return 0 < value < ILLEGAL
+
+
+def is_loss(value: int) -> bool:
+    return value > ILLEGAL
+
+
+def distance(value: int) -> int:
+    return value if value < ILLEGAL else LOSS - value
+
+
+def _transform(square: int, transpose: bool, flip_rows: bool, flip_columns: bool) -> int:
+    row, column = square >> 3, square & 7
+    if transpose:
+        row, column = column, row
+    if flip_rows:
+        row = 7 - row
+    if flip_columns:
+        column = 7 - column
+    return row * 8 + column
+
+
+# The eight symmetries of the board; positions with pawns only keep the left-right mirror
+TRANSFORMS: List[List[int]] = [
+    [_transform(square, *flags) for square in range(64)] for flags in itertools.product((False, True), repeat=3)
+]
+PAWN_TRANSFORMS: List[List[int]] = [list(range(64)), [square ^ 7 for square in range(64)]]
+
+# The first king is moved into a 10-square triangle without pawns, or the left half of the board with them
+TRIANGLE: List[int] = [square for square in range(64) if (square & 7) <= (square >> 3) <= 3]
+LEFT_HALF: List[int] = [square for square in range(64) if (square & 7) <= 3]
+
+
+def normalise(white: str, black: str) -> Tuple[str, bool]:
+    """
+    Name the table holding a material balance, e.g. ("KR", "KQ") -> ("KQvKR", True).
+
+    Parameters:
+    white (str): White's pieces, including the king.
+    black (str): Black's pieces, including the king.
+
+    Returns:
+    Tuple[str, bool]: The table name and whether the colours are swapped in it.
+    """
+    white = "".join(sorted(white, key=PIECE_ORDER.index))
+    black = "".join(sorted(black, key=PIECE_ORDER.index))
+
+    def strength(side: str) -> Tuple:
+        return (len(side), [-PIECE_ORDER.index(piece) for piece in side])
+
+    if strength(black) > strength(white):
+        return f"{black}v{white}", True
+
+    return f"{white}v{black}", False
+
+
+def table_names(max_pieces: int) -> List[str]:
+    """
+    List every table with at most max_pieces pieces, smallest first.
+
+    Parameters:
+    max_pieces (int): The largest number of pieces, kings included.
+
+    Returns:
+    List[str]: The table names.
+    """
+    names = set()
+
+    for count in range(3, max_pieces + 1):
+        for extra in itertools.combinations_with_replacement(PIECE_ORDER[1:], count - 2):
+            for split in range(len(extra) + 1):
+                for white in itertools.combinations(extra, split):
+                    black = list(extra)
+                    for piece in white:
+                        black.remove(piece)
+                    names.add(normalise("K" + "".join(white), "K" + "".join(black))[0])
+
+    return sorted(names, key=lambda name: (len(name), name))
+
+
+class Table_Layout:
+    """
+    Maps the positions of one material balance to table indexes.
+
+    A position is the list of squares of the table's pieces, White's first, and the side
+    to move. Symmetric positions share one index: the board is turned so the first king
+    lies in TRIANGLE (LEFT_HALF with pawns), taking the smallest square list when several
+    turns do, and squares of identical pieces are sorted.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        white, black = name.split("v")
+        self.pieces: List[str] = ["w" + piece for piece in white] + ["b" + piece for piece in black]
+        self.has_pawns = "P" in name
+
+        self.transforms = PAWN_TRANSFORMS if self.has_pawns else TRANSFORMS
+        self.king_squares = LEFT_HALF if self.has_pawns else TRIANGLE
+        self.king_index = [-1] * 64
+        for index, square in enumerate(self.king_squares):
+            self.king_index[square] = index
+
+        self.groups: List[Tuple[int, int]] = [
+            (start, end) for start, end in self.runs() if end - start > 1
+        ]
+        self.positions = len(self.king_squares) * 64 ** (len(self.pieces) - 1)
+        self.size = self.positions * 2
+
+    def runs(self) -> Iterator[Tuple[int, int]]:
+        start = 0
+        for index in range(1, len(self.pieces) + 1):
+            if index == len(self.pieces) or self.pieces[index] != self.pieces[start]:
+                yield start, index
+                start = index
+
+    def canonical(self, squares: List[int]) -> List[int]:
+        best = None
+
+        for transform in self.transforms:
+            if self.king_index[transform[squares[0]]] < 0:
+                continue
+
+            image = [transform[square] for square in squares]
+            for start, end in self.groups:
+                image[start:end] = sorted(image[start:end])
+
+            if best is None or image < best:
+                best = image
+
+        return best
+
+    def index(self, squares: List[int], colour: str) -> int:
+        canonical = self.canonical(squares)
+        position = self.king_index[canonical[0]]
+        for square in canonical[1:]:
+            position = position * 64 + square
+
+        return position * 2 + (colour == "b")
+
+    def decode(self, index: int) -> Tuple[List[int], str]:
+        colour = "b" if index & 1 else "w"
+        position = index >> 1
+        squares = []
+
+        for _ in range(len(self.pieces) - 1):
+            position, square = divmod(position, 64)
+            squares.append(square)
+        squares.append(self.king_squares[position])
+        squares.reverse()
+
+        return squares, colour
+
+
+def attacks(piece: str, square: int, occupied: int) -> int:
+    kind = piece[1]
+    if kind == "P":
+        return PAWN_ATTACKS[piece[0]][square]
+    if kind == "N":
+        return KNIGHT_ATTACKS[square]
+    if kind == "B":
+        return bishop_attacks(square, occupied)
+    if kind == "R":
+        return rook_attacks(square, occupied)
+    if kind == "Q":
+        return queen_attacks(square, occupied)
+    return KING_ATTACKS[square]
+
+
+def is_attacked(pieces: List[str], squares: List[int], target: int, colour: str, occupied: int) -> bool:
+    bit = 1 << target
+    for piece, square in zip(pieces, squares):
+        if piece[0] == colour and attacks(piece, square, occupied) & bit:
+            return True
+    return False
+
+
+def king_in_check(pieces: List[str], squares: List[int], colour: str) -> bool:
+    occupied = 0
+    for square in squares:
+        occupied |= 1 << square
+
+    king = squares[pieces.index(colour + "K")]
+    return is_attacked(pieces, squares, king, "b" if colour == "w" else "w", occupied)
+
+
+def generate_moves(pieces: List[str], squares: List[int], colour: str) -> Iterator[Tuple[List[str], List[int], int, int, bool]]:
+    """
+    Generate the legal moves of a small position, ignoring castling and en passant.
+
+    Parameters:
+    pieces (List[str]): The piece on each square of squares.
+    squares (List[int]): The occupied squares.
+    colour (str): The side to move.
+
+    Returns:
+    Iterator[Tuple[List[str], List[int], int, int, bool]]: For each move the pieces and squares after it,
+    its start and end squares, and whether it captured or promoted.
+    """
+    occupied = own = 0
+    for piece, square in zip(pieces, squares):
+        occupied |= 1 << square
+        if piece[0] == colour:
+            own |= 1 << square
+
+    opponent = "b" if colour == "w" else "w"
+
+    for index, (piece, square) in enumerate(zip(pieces, squares)):
+        if piece[0] != colour:
+            continue
+
+        if piece[1] == "P":
+            step = -8 if colour == "w" else 8
+            targets = attacks(piece, square, occupied) & occupied & ~own
+            if not occupied >> (square + step) & 1:
+                targets |= 1 << (square + step)
+                start_row = 6 if colour == "w" else 1
+                if square >> 3 == start_row and not occupied >> (square + 2 * step) & 1:
+                    targets |= 1 << (square + 2 * step)
+        else:
+            targets = attacks(piece, square, occupied) & ~own
+
+        while targets:
+            bit = targets & -targets
+            targets ^= bit
+            target = bit.bit_length() - 1
+
+            new_pieces = list(pieces)
+            new_squares = list(squares)
+            new_squares[index] = target
+            changes_material = False
+
+            if occupied & bit:
+                captured = squares.index(target)
+                del new_pieces[captured], new_squares[captured]
+                changes_material = True
+
+            if not king_in_check(new_pieces, new_squares, colour):
+                if piece[1] == "P" and target >> 3 in (0, 7):
+                    piece_index = new_squares.index(target)
+                    for promotion in PROMOTIONS:
+                        promoted = list(new_pieces)
+                        promoted[piece_index] = colour + promotion
+                        yield promoted, new_squares, square, target, True
+                else:
+                    yield new_pieces, new_squares, square, target, changes_material
+
+
+class Tablebase_Result(NamedTuple):
+    wdl: int
+    distance: int
+    move: Optional[int]
+
+
+class Tablebase:
+    """
+    Reads generated tables from a directory, memory-mapping each one on first use.
+    """
+
+    def __init__(self, directory: str = DEFAULT_DIRECTORY) -> None:
+        self.directory = directory
+        self.tables: Dict[str, Optional[Tuple[Table_Layout, mmap.mmap]]] = {}
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}.tb")
+
+    def load(self, name: str) -> Optional[Tuple[Table_Layout, mmap.mmap]]:
+        if name not in self.tables:
+            path = self.path(name)
+            if os.path.exists(path):
+                with open(path, "rb") as file:
+                    self.tables[name] = (Table_Layout(name), mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+            else:
+                self.tables[name] = None
+
+        return self.tables[name]
+
+    def probe_pieces(self, pieces: List[str], squares: List[int], colour: str) -> Optional[int]:
+        """
+        Look up the table value of a position given as pieces and squares.
+
+        Parameters:
+        pieces (List[str]): The piece on each square, e.g. ["wK", "wQ", "bK"].
+        squares (List[int]): The square of each piece.
+        colour (str): The side to move.
+
+        Returns:
+        Optional[int]: The table byte from the side to move's point of view, or None without a table.
+        """
+        if len(pieces) == 2:
+            return DRAW
+
+        white = "".join(piece[1] for piece in pieces if piece[0] == "w")
+        black = "".join(piece[1] for piece in pieces if piece[0] == "b")
+        name, swapped = normalise(white, black)
+
+        table = self.load(name)
+        if table is None:
+            return None
+        layout, data = table
+
+        if swapped:
+            pieces = [("b" if piece[0] == "w" else "w") + piece[1] for piece in pieces]
+            squares = [square ^ 56 for square in squares]
+            colour = "b" if colour == "w" else "w"
+
+        by_piece: Dict[str, List[int]] = {}
+        for piece, square in zip(pieces, squares):
+            by_piece.setdefault(piece, []).append(square)
+
+        ordered = [by_piece[piece].pop() for piece in layout.pieces]
+
+        return data[layout.index(ordered, colour)]
+
+    def probe(self, game_state) -> Optional[Tablebase_Result]:
+        """
+        Look up a position with at most MAX_PIECES pieces.
+
+        Positions with castling rights or an en passant capture are not in the tables.
+
+        Parameters:
+        game_state (Game_State): The position.
+
+        Returns:
+        Optional[Tablebase_Result]: Win (1), draw (0) or loss (-1) for the side to move and
+        the distance to mate in plies, or None when the position is not covered.
+        """
+        bitboards = game_state.bitboards
+        if bitboards.occupied.bit_count() > MAX_PIECES or game_state.castling_rights or game_state.en_passant is not None:
+            return None
+
+        pieces, squares = [], []
+        for piece, bitboard in bitboards.pieces.items():
+            while bitboard:
+                bit = bitboard & -bitboard
+                bitboard ^= bit
+                pieces.append(piece)
+                squares.append(bit.bit_length() - 1)
+
+        value = self.probe_pieces(pieces, squares, game_state.player_colour)
+        if value is None or value == ILLEGAL:
+            return None
+
+        wdl = 1 if is_win(value) else -1 if is_loss(value) else 0
+
+        return Tablebase_Result(wdl, distance(value) if wdl else 0, None)
+
+    def probe_best_move(self, game_state) -> Optional[Tablebase_Result]:
+        """
+        Look up a position and the move that keeps its result: the fastest win, a drawing
+        move, or the longest defence.
+
+        Parameters:
+        game_state (Game_State): The position, unchanged on return.
+
+        Returns:
+        Optional[Tablebase_Result]: The result with its best move, or None when the position is not covered.
+        """
+        result = self.probe(game_state)
+        if result is None:
+            return None
+
+        best_move, best_rank = None, None
+        for move in game_state.generate_legal_moves():
+            game_state.make_move(move)
+            child = self.probe(game_state)
+            game_state.unmake_move()
+
+            if child is None:
+                continue
+
+            # Rank moves by the result they give us: quick wins, then draws, then slow losses
+            if child.wdl < 0:
+                rank = (2, -child.distance)
+            elif child.wdl == 0:
+                rank = (1, 0)
+            else:
+                rank = (0, child.distance)
+
+            if best_rank is None or rank > best_rank:
+                best_move, best_rank = move, rank
+
+        return result._replace(move=best_move)
+
+
+_default_tablebase: Optional[Tablebase] = None
+
+
+def get_tablebase() -> Tablebase:
+    global _default_tablebase
+    if _default_tablebase is None:
+        _default_tablebase = Tablebase()
+    return _default_tablebase
+
+
+def is_valid(layout: Table_Layout, squares: List[int], colour: str) -> bool:
+    if len(set(squares)) != len(squares):
+        return False
+
+    for piece, square in zip(layout.pieces, squares):
+        if piece[1] == "P" and square >> 3 in (0, 7):
+            return False
+
+    # The side that just moved cannot have left its king in check
+    opponent = "b" if colour == "w" else "w"
+    return not king_in_check(layout.pieces, squares, opponent)
+
+
+def initial_pass(name: str, directory: str, start: int, stop: int) -> Tuple[bytes, List[Tuple[int, int]]]:
+    """
+    Classify a slice of a table's indexes before the retrograde search.
+
+    Impossible and duplicate positions are marked ILLEGAL and checkmates LOSS. Moves that
+    capture or promote lead into smaller tables, which are already complete: a position
+    that can win through one is recorded as a seed, and so is one whose moves all leave
+    the table, since its result is then known.
+
+    Parameters:
+    name (str): The table name.
+    directory (str): The directory holding the smaller tables.
+    start (int): The first index of the slice.
+    stop (int): The index after the slice.
+
+    Returns:
+    Tuple[bytes, List[Tuple[int, int]]]: The slice's values and the (index, value) seeds.
+    """
+    layout = Table_Layout(name)
+    tablebase = Tablebase(directory)
+    values = bytearray(stop - start)
+    seeds = []
+
+    for index in range(start, stop):
+        squares, colour = layout.decode(index)
+
+        if not is_valid(layout, squares, colour) or layout.index(squares, colour) != index:
+            values[index - start] = ILLEGAL
+            continue
+
+        has_moves = in_table = escape = False
+        fastest_win = None
+        slowest_loss = 0
+
+        for pieces, child_squares, _, _, changes_material in generate_moves(layout.pieces, squares, colour):
+            has_moves = True
+            if not changes_material:
+                in_table = True
+                continue
+
+            value = tablebase.probe_pieces(pieces, child_squares, "b" if colour == "w" else "w")
+            if value is None:
+                raise FileNotFoundError(f"Table {name} needs a missing smaller table, generate it first")
+
+            if is_loss(value):
+                win = distance(value) + 1
+                fastest_win = win if fastest_win is None else min(fastest_win, win)
+            elif is_win(value):
+                slowest_loss = max(slowest_loss, distance(value) + 1)
+            else:
+                escape = True
+
+        if not has_moves:
+            values[index - start] = LOSS if king_in_check(layout.pieces, squares, colour) else DRAW
+        elif fastest_win is not None:
+            seeds.append((index, fastest_win))
+        elif not in_table and not escape:
+            seeds.append((index, LOSS - slowest_loss))
+
+    return bytes(values), seeds
+
+
+def predecessors(layout: Table_Layout, squares: List[int], colour: str) -> Iterator[int]:
+    """
+    Generate the positions that reach this one with a move that neither captures nor promotes.
+
+    Parameters:
+    layout (Table_Layout): The table layout.
+    squares (List[int]): The position's squares.
+    colour (str): The side to move in the position.
+
+    Returns:
+    Iterator[int]: The table index of each earlier position, with the other side to move.
+    """
+    mover = "b" if colour == "w" else "w"
+    occupied = 0
+    for square in squares:
+        occupied |= 1 << square
+
+    for index, (piece, square) in enumerate(zip(layout.pieces, squares)):
+        if piece[0] != mover:
+            continue
+
+        if piece[1] == "P":
+            step = 8 if mover == "w" else -8
+            origins = []
+            back = square + step
+            if 1 <= back >> 3 <= 6 and not occupied >> back & 1:
+                origins.append(back)
+                double_row = 4 if mover == "w" else 3
+                if square >> 3 == double_row and not occupied >> (back + step) & 1:
+                    origins.append(back + step)
+        else:
+            targets = attacks(piece, square, occupied) & ~occupied
+            origins = []
+            while targets:
+                bit = targets & -targets
+                targets ^= bit
+                origins.append(bit.bit_length() - 1)
+
+        for origin in origins:
+            earlier = list(squares)
+            earlier[index] = origin
+            # The side to move after the move must not have been in check before it
+            if not king_in_check(layout.pieces, earlier, colour):
+                yield layout.index(earlier, mover)
+
+
+def verify_loss(layout: Table_Layout, tablebase: Tablebase, values: mmap.mmap, index: int) -> Optional[int]:
+    squares, colour = layout.decode(index)
+    opponent = "b" if colour == "w" else "w"
+    longest = None
+
+    for pieces, child_squares, _, _, changes_material in generate_moves(layout.pieces, squares, colour):
+        if changes_material:
+            value = tablebase.probe_pieces(pieces, child_squares, opponent)
+        else:
+            value = values[layout.index(child_squares, opponent)]
+
+        if not is_win(value):
+            return None
+        longest = value if longest is None else max(longest, value)
+
+    return None if longest is None else longest + 1
+
+
+def level_predecessors(layout: Table_Layout, values: mmap.mmap, frontier: List[int]) -> Tuple[List[int], List[int]]:
+    """
+    Find the undecided positions one move before a slice of the frontier.
+
+    Parameters:
+    layout (Table_Layout): The table layout.
+    values (mmap.mmap): The table values decided so far.
+    frontier (List[int]): Positions decided in the last level.
+
+    Returns:
+    Tuple[List[int], List[int]]: The positions that move into a loss, which are wins, and
+    those that move into a win, which may be losses.
+    """
+    wins, candidates = [], []
+
+    for index in frontier:
+        found = wins if is_loss(values[index]) else candidates
+        squares, colour = layout.decode(index)
+        for earlier in predecessors(layout, squares, colour):
+            if values[earlier] == DRAW:
+                found.append(earlier)
+
+    return wins, candidates
+
+
+def level_losses(layout: Table_Layout, tablebase: Tablebase, values: mmap.mmap, candidates: List[int]) -> List[Tuple[int, int]]:
+    """
+    Check which candidates lose whatever they play.
+
+    Parameters:
+    layout (Table_Layout): The table layout.
+    tablebase (Tablebase): The smaller tables.
+    values (mmap.mmap): The table values decided so far.
+    candidates (List[int]): Undecided positions with a move into a win for the opponent.
+
+    Returns:
+    List[Tuple[int, int]]: The (index, distance) of each position whose moves all lose.
+    """
+    losses = []
+
+    for index in candidates:
+        loss_distance = verify_loss(layout, tablebase, values, index)
+        if loss_distance is not None:
+            losses.append((index, loss_distance))
+
+    return losses
+
+
+# The layout, smaller tables and shared values of the table a pool worker is generating
+_generation: Optional[Tuple[Table_Layout, Tablebase, mmap.mmap]] = None
+
+
+def start_generation_worker(name: str, directory: str, path: str) -> None:
+    global _generation
+    with open(path, "rb") as file:
+        _generation = (Table_Layout(name), Tablebase(directory), mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+
+
+def worker_predecessors(frontier: List[int]) -> Tuple[List[int], List[int]]:
+    layout, _, values = _generation
+    return level_predecessors(layout, values, frontier)
+
+
+def worker_losses(candidates: List[int]) -> List[Tuple[int, int]]:
+    return level_losses(*_generation, candidates)
+
+
+def generate_table(name: str, directory: str = DEFAULT_DIRECTORY, workers: int = 1) -> None:
+    """
+    Generate one table by retrograde analysis and write it to the directory.
+
+    Smaller tables reached by captures and promotions must already exist. The values are
+    built in the table's temporary file, which the pool's workers map read-only. The
+    initial pass is split over the pool, and so is each level of the retrograde search,
+    one distance at a time: every position that can move into a loss is a win, and a
+    position is a loss once every move leads to a win for the opponent. Only this process
+    writes values, between the steps of a level.
+
+    Parameters:
+    name (str): The table name, e.g. "KRvK".
+    directory (str): The directory to read smaller tables from and write to.
+    workers (int): The number of processes.
+
+    Returns:
+    None
+    """
+    layout = Table_Layout(name)
+    tablebase = Tablebase(directory)
+    seeds_by_distance: Dict[int, List[Tuple[int, int]]] = {}
+
+    os.makedirs(directory, exist_ok=True)
+    temporary_path = tablebase.path(name) + ".tmp"
+    file = open(temporary_path, "w+b")
+    file.truncate(layout.size)
+    values = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_WRITE)
+
+    chunk = max(2, layout.size // (workers * 8)) & ~1
+    slices = [(start, min(start + chunk, layout.size)) for start in range(0, layout.size, chunk)]
+
+    def split(indexes: List[int]) -> List[List[int]]:
+        size = max(1, -(-len(indexes) // (workers * 4)))
+        return [indexes[start:start + size] for start in range(0, len(indexes), size)]
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=start_generation_worker, initargs=(name, directory, temporary_path)) as pool:
+            futures = [pool.submit(initial_pass, name, directory, start, stop) for start, stop in slices]
+            for (start, stop), future in zip(slices, futures):
+                chunk_values, seeds = future.result()
+                values[start:stop] = chunk_values
+                for index, value in seeds:
+                    seeds_by_distance.setdefault(distance(value), []).append((index, value))
+
+            # A single worker gains nothing from the pool, so its levels run here without the transfers
+            def find_predecessors(frontier: List[int]) -> Iterator[Tuple[List[int], List[int]]]:
+                if workers == 1:
+                    return iter([level_predecessors(layout, values, frontier)])
+                return pool.map(worker_predecessors, split(frontier))
+
+            def find_losses(candidates: List[int]) -> Iterator[List[Tuple[int, int]]]:
+                if workers == 1:
+                    return iter([level_losses(layout, tablebase, values, candidates)])
+                return pool.map(worker_losses, split(candidates))
+
+            frontier = [index for index, value in enumerate(values[:]) if value == LOSS]
+            level = 0
+
+            while frontier or seeds_by_distance:
+                if level + 1 >= ILLEGAL:
+                    raise ValueError(f"Table {name} has mates longer than {ILLEGAL - 1} plies")
+
+                next_frontier = []
+                candidates = set()
+
+                for wins, found in find_predecessors(frontier):
+                    for index in wins:
+                        if values[index] == DRAW:
+                            values[index] = level + 1
+                            next_frontier.append(index)
+                    candidates.update(found)
+
+                candidates = [index for index in candidates if values[index] == DRAW]
+                for losses in find_losses(candidates):
+                    for index, loss_distance in losses:
+                        if loss_distance == level + 1:
+                            values[index] = LOSS - loss_distance
+                            next_frontier.append(index)
+                        else:
+                            seeds_by_distance.setdefault(loss_distance, []).append((index, LOSS - loss_distance))
+
+                level += 1
+                for index, value in seeds_by_distance.pop(level, []):
+                    if values[index] == DRAW:
+                        values[index] = value
+                        next_frontier.append(index)
+
+                frontier = next_frontier
+    finally:
+        values.close()
+        file.close()
+
+    os.replace(temporary_path, tablebase.path(name))
+
+
+def required_tables(name: str) -> List[str]:
+    # The tables reached from this one by a capture or a promotion
+    white, black = name.split("v")
+    required = set()
+
+    for side, other, is_white in ((white, black, True), (black, white, False)):
+        for index, piece in enumerate(side):
+            if piece == "K":
+                continue
+            rest = side[:index] + side[index + 1:]
+            if len(rest) + len(other) > 2:
+                required.add(normalise(rest, other)[0] if is_white else normalise(other, rest)[0])
+            if piece == "P":
+                for promotion in PROMOTIONS:
+                    promoted = rest + promotion
+                    required.add(normalise(promoted, other)[0] if is_white else normalise(other, promoted)[0])
+
+    return sorted(required, key=lambda table: (len(table), table))
+
+
+def generate(names: List[str], directory: str = DEFAULT_DIRECTORY, workers: int = 1, force: bool = False) -> None:
+    """
+    Generate tables and, first, any smaller tables they depend on.
+
+    Parameters:
+    names (List[str]): The tables to generate.
+    directory (str): The tablebase directory.
+    workers (int): The number of processes generating each table.
+    force (bool): Whether to rebuild the named tables when they already exist.
+
+    Returns:
+    None
+    """
+    for name in names:
+        for required in required_tables(name):
+            generate([required], directory, workers, False)
+
+        if not force and os.path.exists(os.path.join(directory, f"{name}.tb")):
+            continue
+
+        start_time = time.perf_counter()
+        generate_table(name, directory, workers)
+        print(f"{name:<8} {Table_Layout(name).size:>10} positions  {time.perf_counter() - start_time:7.1f}s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Generate endgame tablebases. Three-piece tables take seconds; four-piece tables "
+        "hold millions of positions and take a long time in pure Python, so give them several workers."
+    )
+    parser.add_argument("tables", nargs="*", help="tables to generate, e.g. KQvK KRvK KPvK")
+    parser.add_argument("--max-pieces", type=int, choices=(3, 4), help="generate every table with up to this many pieces")
+    parser.add_argument("--directory", default=DEFAULT_DIRECTORY, help="tablebase directory")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processes generating each table")
+    parser.add_argument("--force", action="store_true", help="rebuild tables that already exist")
+    args = parser.parse_args()
+
+    names = [normalise(*name.upper().split("V"))[0] for name in args.tables]
+    if args.max_pieces:
+        names += table_names(args.max_pieces)
+    if not names:
+        parser.error("name tables to generate or use --max-pieces")
+
+    generate(names, args.directory, max(1, args.workers), args.force)
+
+
+if __name__ == "__main__":
+    main()
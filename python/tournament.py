@@ -0,0 +1,450 @@
+import argparse
+import itertools
+import math
+import os
+import random
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from python.evaluation import evaluate
+from python.game_state import Game_State
+from python.pgn import START_FEN, format_game, move_from_san, move_to_san, open_pgn, read_games
+from python.search import MAX_PLY, Search
+
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+PLAYER_KINDS = ("random", "greedy", "search")
+
+# Search options written in a player spec, e.g. "search:depth=4,time=0.1", and their types
+SEARCH_OPTIONS = {"depth": int, "time": float, "nodes": int, "hash": float}
+
+# Games longer than this many plies are adjudicated as draws
+DEFAULT_MAX_PLIES = 400
+
+# The z-value of a two-sided 95% confidence interval
+CONFIDENCE_Z = 1.959964
+
+Player = Callable[[Game_State], int]
+
+# The players of this process, created on first use by get_player
+worker_players: Dict[str, Player] = {}
+
+
+class Game_Record(NamedTuple):
+    round: int
+    white: str
+    black: str
+    result: str
+    termination: str
+    start_fen: str
+    moves: List[str]
+    # Seconds spent choosing moves by White and by Black
+    times: Tuple[float, float]
+
+
+def parse_player(text: str) -> Tuple[str, Dict[str, float]]:
+    """
+    Parse a player spec such as "random", "greedy" or "search:depth=4,time=0.1".
+
+    Parameters:
+    text (str): The spec.
+
+    Returns:
+    Tuple[str, Dict[str, float]]: The player kind and its options.
+    """
+    kind, _, option_text = text.partition(":")
+    if kind not in PLAYER_KINDS:
+        raise ValueError(f"Unknown player {kind!r}, expected one of {', '.join(PLAYER_KINDS)}")
+
+    options = {}
+    for item in filter(None, option_text.split(",")):
+        name, _, value = item.partition("=")
+        if kind != "search" or name not in SEARCH_OPTIONS:
+            raise ValueError(f"Unknown option {name!r} for player {kind!r}")
+        options[name] = SEARCH_OPTIONS[name](value)
+
+    if kind == "search" and not options.keys() & {"depth", "time", "nodes"}:
+        raise ValueError(f"Search player {text!r} needs a depth, time or nodes limit")
+
+    return kind, options
+
+
+def random_player(game_state: Game_State) -> int:
+    return random.choice(game_state.generate_legal_moves())
+
+
+def greedy_player(game_state: Game_State) -> int:
+    # The move leading to the best static evaluation, ties broken at random
+    best_moves, best_score = [], None
+
+    for move in game_state.generate_legal_moves():
+        game_state.make_move(move)
+        score = -evaluate(game_state)
+        game_state.unmake_move()
+
+        if best_score is None or score > best_score:
+            best_moves, best_score = [move], score
+        elif score == best_score:
+            best_moves.append(move)
+
+    return random.choice(best_moves)
+
+
+def make_player(text: str) -> Player:
+    """
+    Create the move-selection function described by a player spec.
+
+    Parameters:
+    text (str): The spec, see parse_player.
+
+    Returns:
+    Player: A function from a position to the move to play in it.
+    """
+    kind, options = parse_player(text)
+
+    if kind == "random":
+        return random_player
+    if kind == "greedy":
+        return greedy_player
+
+    search = Search(hash_size_mb=options.get("hash", 8))
+    max_depth = int(options.get("depth", MAX_PLY))
+    time_limit = options.get("time")
+    node_limit = options.get("nodes")
+
+    def search_player(game_state: Game_State) -> int:
+        return search.search(game_state, max_depth, time_limit, node_limit).move
+
+    return search_player
+
+
+def get_player(text: str) -> Player:
+    if text not in worker_players:
+        worker_players[text] = make_player(text)
+    return worker_players[text]
+
+
+def game_result(game_state: Game_State, legal_moves: List[int]) -> Optional[Tuple[str, str]]:
+    """
+    Decide whether a game has ended, adjudicating won tablebase positions.
+
+    Parameters:
+    game_state (Game_State): The current position.
+    legal_moves (List[int]): Its legal moves.
+
+    Returns:
+    Optional[Tuple[str, str]]: The result and the reason for it, or None while the game goes on.
+    """
+    reason = game_state.game_end(legal_moves)
+    if reason is not None:
+        return game_state.game_result(reason), reason
+
+    tablebase_result = game_state.probe_tablebase(best_move=False)
+    if tablebase_result is not None:
+        if tablebase_result.wdl == 0:
+            return "1/2-1/2", "tablebase"
+        white_wins = (tablebase_result.wdl > 0) == (game_state.player_colour == "w")
+        return ("1-0" if white_wins else "0-1"), "tablebase"
+
+    return None
+
+
+def play_game(round_number: int, white: str, black: str, start_fen: str, max_plies: int) -> Game_Record:
+    """
+    Play one game between two players without a window.
+
+    Parameters:
+    round_number (int): The game's round, written to the PGN.
+    white (str): White's player spec.
+    black (str): Black's player spec.
+    start_fen (str): The opening position.
+    max_plies (int): The length after which the game is adjudicated as a draw.
+
+    Returns:
+    Game_Record: The finished game.
+    """
+    game_state = Game_State(start_fen)
+    players = {"w": get_player(white), "b": get_player(black)}
+    times = {"w": 0.0, "b": 0.0}
+    moves = []
+
+    while True:
+        legal_moves = game_state.generate_legal_moves()
+        ending = game_result(game_state, legal_moves)
+        if ending is not None:
+            break
+        if len(moves) >= max_plies:
+            ending = "1/2-1/2", "move limit"
+            break
+
+        colour = game_state.player_colour
+        start_time = time.perf_counter()
+        move = players[colour](game_state)
+        times[colour] += time.perf_counter() - start_time
+
+        if move not in legal_moves:
+            ending = ("0-1" if colour == "w" else "1-0"), "illegal move"
+            break
+
+        moves.append(move_to_san(game_state, move, legal_moves))
+        game_state.make_move(move)
+
+    return Game_Record(round_number, white, black, ending[0], ending[1], start_fen, moves, (times["w"], times["b"]))
+
+
+def read_openings(path: Optional[str], plies: int) -> List[str]:
+    """
+    Read opening positions from a file of FEN or EPD lines, or from the games of a PGN file.
+
+    Parameters:
+    path (Optional[str]): The file, or None for the standard starting position alone.
+    plies (int): How many plies of each PGN game make its opening.
+
+    Returns:
+    List[str]: The opening FENs.
+    """
+    if path is None:
+        return [START_FEN]
+
+    openings = []
+
+    if path.endswith((".pgn", ".pgn.gz", ".pgn.bz2")):
+        with open_pgn(path) as stream:
+            for game in read_games(stream):
+                try:
+                    game_state = Game_State(game.headers.get("FEN", START_FEN))
+                    for text in game.moves[:plies]:
+                        game_state.make_move(move_from_san(game_state, text))
+                except ValueError:
+                    continue
+                openings.append(game_state.get_fen())
+    else:
+        with open(path, "r") as file:
+            for line in file:
+                fields = line.split(";", 1)[0].split()
+                if len(fields) >= 4 and not line.startswith("#"):
+                    # EPD lines stop after the en passant square
+                    openings.append(" ".join(fields[:6] if len(fields) >= 6 else fields[:4] + ["0", "1"]))
+
+    return openings
+
+
+def schedule(players: List[str], openings: List[str], rounds: int) -> Iterator[Tuple[int, str, str, str]]:
+    # Every pair plays every opening twice, once with each colour, in every round
+    round_number = 1
+    for _ in range(rounds):
+        for opening in openings:
+            for first, second in itertools.combinations(players, 2):
+                yield round_number, first, second, opening
+                yield round_number, second, first, opening
+            round_number += 1
+
+
+def score_to_elo(score: float) -> float:
+    score = min(max(score, 1e-6), 1 - 1e-6)
+    return -400 * math.log10(1 / score - 1)
+
+
+def elo_to_score(elo: float) -> float:
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+def score_statistics(wins: int, draws: int, losses: int) -> Tuple[float, float]:
+    # Mean and per-game variance of the score
+    games = wins + draws + losses
+    score = (wins + draws / 2) / games
+    variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / games
+    return score, variance
+
+
+def elo_difference(wins: int, draws: int, losses: int) -> Tuple[float, float]:
+    """
+    Estimate the Elo difference shown by a match, with a 95% confidence interval.
+
+    Parameters:
+    wins (int): The first player's wins.
+    draws (int): The draws.
+    losses (int): The first player's losses.
+
+    Returns:
+    Tuple[float, float]: The Elo difference in the first player's favour and the half-width of its interval.
+    """
+    games = wins + draws + losses
+    if games == 0:
+        return 0.0, math.inf
+
+    score, variance = score_statistics(wins, draws, losses)
+    margin = CONFIDENCE_Z * math.sqrt(variance / games)
+
+    return score_to_elo(score), (score_to_elo(score + margin) - score_to_elo(score - margin)) / 2
+
+
+def sprt_llr(wins: int, draws: int, losses: int, elo0: float, elo1: float) -> float:
+    """
+    The log-likelihood ratio of the Elo difference being elo1 rather than elo0.
+
+    Uses the normal approximation of the game scores, as most engine testing does.
+
+    Parameters:
+    wins (int): The first player's wins.
+    draws (int): The draws.
+    losses (int): The first player's losses.
+    elo0 (float): The Elo difference of the null hypothesis.
+    elo1 (float): The Elo difference of the alternative hypothesis.
+
+    Returns:
+    float: The log-likelihood ratio.
+    """
+    games = wins + draws + losses
+    if games == 0:
+        return 0.0
+
+    score, variance = score_statistics(wins, draws, losses)
+    if variance == 0:
+        return 0.0
+
+    score0, score1 = elo_to_score(elo0), elo_to_score(elo1)
+
+    return games * (score1 - score0) * (2 * score - score0 - score1) / (2 * variance)
+
+
+class Tournament_Settings(NamedTuple):
+    rounds: int
+    max_plies: int
+    workers: int
+    # (elo0, elo1, alpha, beta), or None to play every game
+    sprt: Optional[Tuple[float, float, float, float]]
+
+
+def run_tournament(players: List[str], openings: List[str], settings: Tournament_Settings, pgn_path: Optional[str]) -> Dict[Tuple[str, str], List[int]]:
+    """
+    Play a round robin between players in a process pool.
+
+    Every pair plays each opening with both colours, every round. Games are written to
+    the PGN file in schedule order as they finish. With two players and SPRT settings
+    the match stops as soon as the test accepts either hypothesis.
+
+    Parameters:
+    players (List[str]): The player specs.
+    openings (List[str]): The opening FENs.
+    settings (Tournament_Settings): The rounds, move limit, worker count and SPRT bounds.
+    pgn_path (Optional[str]): The PGN file to write, or None.
+
+    Returns:
+    Dict[Tuple[str, str], List[int]]: For each pair, the first player's wins, draws and losses.
+    """
+    results = {pair: [0, 0, 0] for pair in itertools.combinations(players, 2)}
+    scores = {player: 0.0 for player in players}
+    think_times = {player: [0.0, 0] for player in players}
+
+    if settings.sprt is not None:
+        elo0, elo1, alpha, beta = settings.sprt
+        lower, upper = math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+
+    output = open(pgn_path, "w") if pgn_path else None
+    start_time = time.perf_counter()
+    games_played = 0
+    finished = False
+    pending = deque()
+
+    def record_next() -> None:
+        nonlocal games_played, finished
+        game = pending.popleft().result()
+        games_played += 1
+
+        points = {"1-0": 1.0, "0-1": 0.0}.get(game.result, 0.5)
+        scores[game.white] += points
+        scores[game.black] += 1 - points
+        for player, seconds, moves in ((game.white, game.times[0], (len(game.moves) + 1) // 2), (game.black, game.times[1], len(game.moves) // 2)):
+            think_times[player][0] += seconds
+            think_times[player][1] += moves
+
+        pair, first_points = ((game.white, game.black), points) if (game.white, game.black) in results else ((game.black, game.white), 1 - points)
+        results[pair][0 if first_points == 1 else 1 if first_points == 0.5 else 2] += 1
+
+        if output is not None:
+            headers = {
+                "Event": "Tournament", "Site": "?", "Date": time.strftime("%Y.%m.%d"), "Round": str(game.round),
+                "White": game.white, "Black": game.black, "Termination": game.termination, "PlyCount": str(len(game.moves)),
+            }
+            output.write(format_game(headers, game.moves, game.result, game.start_fen))
+            output.flush()
+
+        line = f"game {games_played}  {game.white} - {game.black}  {game.result} ({game.termination})"
+        if settings.sprt is not None and len(players) == 2:
+            llr = sprt_llr(*results[(players[0], players[1])], elo0, elo1)
+            line += f"  LLR {llr:.2f} [{lower:.2f}, {upper:.2f}]"
+            if not finished and not lower < llr < upper:
+                finished = True
+                accepted = f"H1 (elo {elo1:+g})" if llr >= upper else f"H0 (elo {elo0:+g})"
+                print(f"SPRT accepts {accepted}, stopping")
+        print(line)
+
+    with ProcessPoolExecutor(max_workers=settings.workers) as pool:
+        for game in schedule(players, openings, settings.rounds):
+            if len(pending) >= settings.workers * 2:
+                record_next()
+            if finished:
+                break
+            pending.append(pool.submit(play_game, *game, settings.max_plies))
+
+        while pending:
+            record_next()
+
+    if output is not None:
+        output.close()
+
+    elapsed = time.perf_counter() - start_time
+    print(f"\n{games_played} games in {elapsed:.1f}s")
+    for player in sorted(players, key=lambda player: -scores[player]):
+        seconds, moves = think_times[player]
+        print(f"{player:<32} {scores[player]:6.1f} points  {1000 * seconds / max(moves, 1):8.1f} ms/move")
+
+    for (first, second), (wins, draws, losses) in results.items():
+        elo, error = elo_difference(wins, draws, losses)
+        print(f"{first} vs {second}: +{wins} ={draws} -{losses}  elo {elo:+.1f} +/- {error:.1f}")
+
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Play headless matches between move-selection players. A player is random, greedy or "
+        "search with options, e.g. search:depth=3 or search:time=0.1,hash=16."
+    )
+    parser.add_argument("players", nargs="+", help="two or more player specs")
+    parser.add_argument("--openings", help="FEN/EPD file, or PGN file whose first plies give the openings")
+    parser.add_argument("--opening-plies", type=int, default=8, help="plies of each PGN game used as its opening")
+    parser.add_argument("--rounds", type=int, default=1, help="times every pair plays every opening with both colours")
+    parser.add_argument("--max-plies", type=int, default=DEFAULT_MAX_PLIES, help="plies after which a game is drawn")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="games played at once; timed players need a core each")
+    parser.add_argument("--pgn", help="PGN file to write the games to")
+    parser.add_argument("--sprt", nargs=2, type=float, metavar=("ELO0", "ELO1"), help="stop a two-player match once an SPRT decides")
+    parser.add_argument("--alpha", type=float, default=0.05, help="SPRT false positive rate")
+    parser.add_argument("--beta", type=float, default=0.05, help="SPRT false negative rate")
+    args = parser.parse_args()
+
+    if len(args.players) < 2:
+        parser.error("give at least two players")
+    if len(set(args.players)) != len(args.players):
+        parser.error("player specs must differ")
+    if args.sprt and len(args.players) != 2:
+        parser.error("--sprt needs exactly two players")
+    for player in args.players:
+        try:
+            parse_player(player)
+        except ValueError as error:
+            parser.error(str(error))
+
+    openings = read_openings(args.openings, args.opening_plies)
+    if not openings:
+        parser.error(f"no openings found in {args.openings}")
+
+    sprt = (args.sprt[0], args.sprt[1], args.alpha, args.beta) if args.sprt else None
+    settings = Tournament_Settings(args.rounds, args.max_plies, max(1, args.workers), sprt)
+    run_tournament(args.players, openings, settings, args.pgn)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+from typing import Optional, Tuple
+
+EMPTY = 0
+EXACT = 1
+LOWER_BOUND = 2
+UPPER_BOUND = 3
+
+# Every bucket holds two slots of two 64-bit words (key ^ data, data): the first slot keeps
+# the deepest result for its index, the second is overwritten by every other store. Storing
+# the key XOR the data lets processes share one table without locks: a slot torn by two
+# concurrent writers no longer matches any key and reads as a miss.
+SLOT_WORDS = 2
+BUCKET_WORDS = 4
+BUCKET_BYTES = BUCKET_WORDS * 8
+
+# The data word packs the move (16 bits), score + 32768 (16 bits), depth (8 bits),
+# bound (2 bits) and the age of the search that stored it (6 bits).
+SCORE_OFFSET = 32768
+AGE_MASK = 63
+
+
+def table_bytes(size_mb: float) -> int:
+    """
+    Return the buffer size used for a table of at most size_mb megabytes.
+
+    The bucket count is rounded down to a power of two so the index is a mask of the key.
+
+    Parameters:
+    size_mb (float): The memory budget in megabytes.
+
+    Returns:
+    int: The buffer size in bytes.
+    """
+    buckets = max(1, int(size_mb * 1024 * 1024) // BUCKET_BYTES)
+    return (1 << (buckets.bit_length() - 1)) * BUCKET_BYTES
+
+
+class Transposition_Table:
+    """
+    Fixed-size cache of search results keyed by the 64-bit Zobrist key of a position.
+
+    Entries live in one preallocated buffer of unsigned 64-bit words, so memory use is
+    set by size_mb and never grows. A buffer can be passed in to place the table in
+    memory owned by someone else.
+    """
+
+    def __init__(self, size_mb: float = 16, buffer=None) -> None:
+        if buffer is None:
+            buffer = bytearray(table_bytes(size_mb))
+
+        self._buffer = buffer
+        self.table = memoryview(buffer).cast("B").cast("Q")
+        self.bucket_count = len(self.table) // BUCKET_WORDS
+        self.mask = self.bucket_count - 1
+        self.age = 0
+
+    @property
+    def size_bytes(self) -> int:
+        return self.bucket_count * BUCKET_BYTES
+
+    def new_search(self) -> None:
+        self.age = (self.age + 1) & AGE_MASK
+
+    def clear(self) -> None:
+        raw = self.table.cast("B")
+        raw[:] = bytes(len(raw))
+        self.age = 0
+
+    def probe(self, key: int) -> Optional[Tuple[int, int, int, int]]:
+        """
+        Look up a position.
+
+        Parameters:
+        key (int): The Zobrist key of the position.
+
+        Returns:
+        Optional[Tuple[int, int, int, int]]: The stored (move, score, depth, bound), or None.
+        """
+        table = self.table
+        index = (key & self.mask) * BUCKET_WORDS
+
+        data = table[index + 1]
+        if table[index] ^ data != key:
+            data = table[index + 3]
+            if table[index + 2] ^ data != key:
+                return None
+
+        if not (data >> 40) & 3:
+            return None
+
+        return (data & 0xFFFF, ((data >> 16) & 0xFFFF) - SCORE_OFFSET, (data >> 32) & 0xFF, (data >> 40) & 3)
+
+    def store(self, key: int, move: int, score: int, depth: int, bound: int) -> None:
+        """
+        Store a search result, choosing the slot by depth and age.
+
+        The depth-preferred slot is replaced when it holds the same position, an entry
+        from an earlier search, or a shallower result; otherwise the always-replace slot is used.
+
+        Parameters:
+        key (int): The Zobrist key of the position.
+        move (int): The best move found, or 0 if there is none.
+        score (int): The score of the position.
+        depth (int): The remaining depth the score was searched to.
+        bound (int): EXACT, LOWER_BOUND or UPPER_BOUND.
+
+        Returns:
+        None
+        """
+        table = self.table
+        index = (key & self.mask) * BUCKET_WORDS
+        depth = 0 if depth < 0 else 255 if depth > 255 else depth
+
+        data = table[index + 1]
+        if table[index] ^ data != key and data and (data >> 42) == self.age and (data >> 32) & 0xFF > depth:
+            index += SLOT_WORDS
+            data = table[index + 1]
+
+        # Keep the old best move when this result has none for the same position
+        if not move and table[index] ^ data == key:
+            move = data & 0xFFFF
+
+        data = move | ((score + SCORE_OFFSET) << 16) | (depth << 32) | (bound << 40) | (self.age << 42)
+        table[index] = key ^ data
+        table[index + 1] = data
+
+    def hashfull(self) -> int:
+        """
+        Estimate how full the table is, in permille, from the first thousand slots.
+
+        Returns:
+        int: The number of sampled slots used by the current search, per thousand.
+        """
+        table = self.table
+        samples = min(1000, self.bucket_count * 2)
+        used = 0
+
+        for slot in range(samples):
+            data = table[slot * SLOT_WORDS + 1]
+            if data and (data >> 42) == self.age:
+                used += 1
+
+        return used * 1000 // samples
@@ -0,0 +1,270 @@
+import os
+import sys
+import threading
+
+from python.game_state import Game_State
+from python.move import move_to_uci
+from python.parallel_search import Parallel_Search
+from python.pgn import START_FEN, move_from_uci
+from python.search import MATE_SCORE, MAX_PLY, Search_Result
+
+from typing import Dict, List, Optional, TextIO
+
+ENGINE_NAME = "chess-ai"
+ENGINE_AUTHOR = "hd-marshall"
+
+DEFAULT_HASH_MB = 16
+MAX_HASH_MB = 1024
+MAX_THREADS = max(1, os.cpu_count() or 1) * 4
+
+# Seconds kept back from every move for I/O and process latency
+MOVE_OVERHEAD = 0.05
+
+# Moves assumed to be left in the game when the GUI does not send movestogo
+DEFAULT_MOVES_TO_GO = 30
+
+
+def format_score(score: int) -> str:
+    # UCI reports mates in moves, negative when the engine is being mated
+    if score >= MATE_SCORE - MAX_PLY:
+        return f"mate {(MATE_SCORE - score + 1) // 2}"
+    if score <= -MATE_SCORE + MAX_PLY:
+        return f"mate -{(MATE_SCORE + score) // 2}"
+    return f"cp {score}"
+
+
+def format_info(result: Search_Result) -> str:
+    nps = int(result.nodes / result.elapsed) if result.elapsed > 0 else 0
+    pv = " ".join(move_to_uci(move) for move in result.pv)
+    return (
+        f"info depth {result.depth} score {format_score(result.score)} nodes {result.nodes} "
+        f"nps {nps} time {int(result.elapsed * 1000)} pv {pv}"
+    )
+
+
+def time_budget(parameters: Dict[str, int], colour: str) -> Optional[float]:
+    """
+    Decide how long to think from the parameters of a go command.
+
+    Parameters:
+    parameters (Dict[str, int]): The numeric go parameters, times in milliseconds.
+    colour (str): The side to move.
+
+    Returns:
+    Optional[float]: The search time in seconds, or None to search without a clock.
+    """
+    if "movetime" in parameters:
+        return max(0.01, parameters["movetime"] / 1000 - MOVE_OVERHEAD)
+
+    remaining = parameters.get("wtime" if colour == "w" else "btime")
+    if remaining is None:
+        return None
+
+    increment = parameters.get("winc" if colour == "w" else "binc", 0)
+    moves_to_go = parameters.get("movestogo", DEFAULT_MOVES_TO_GO)
+    budget = remaining / moves_to_go + increment * 0.8
+
+    # Never plan to use more than half of what is left on the clock
+    return max(0.01, min(budget, remaining / 2) / 1000 - MOVE_OVERHEAD)
+
+
+class Uci_Engine:
+    """
+    Universal Chess Interface front end over a Game_State and a Parallel_Search.
+
+    Commands are read on the calling thread while searches run on a background thread,
+    so stop, isready and quit are answered while the engine is thinking. Output from
+    both threads goes through send, which writes whole lines under a lock.
+    """
+
+    def __init__(self, output: TextIO = sys.stdout) -> None:
+        self.output = output
+        self.output_lock = threading.Lock()
+
+        self.hash_size_mb = DEFAULT_HASH_MB
+        self.threads = 1
+        self.search: Optional[Parallel_Search] = None
+
+        self.game_state = Game_State()
+        self.search_thread: Optional[threading.Thread] = None
+        # Set by stop, so an infinite search holds its bestmove until asked for it
+        self.stop_requested = threading.Event()
+
+    def send(self, line: str) -> None:
+        with self.output_lock:
+            self.output.write(line + "\n")
+            self.output.flush()
+
+    def get_search(self) -> Parallel_Search:
+        # Created on first use, so setoption before the first go does not build a table twice
+        if self.search is None:
+            self.search = Parallel_Search(self.threads, self.hash_size_mb)
+        return self.search
+
+    def close_search(self) -> None:
+        if self.search is not None:
+            self.search.close()
+            self.search = None
+
+    def handle(self, line: str) -> bool:
+        """
+        Carry out one command.
+
+        Parameters:
+        line (str): The command line from the GUI.
+
+        Returns:
+        bool: False once the engine should exit.
+        """
+        tokens = line.split()
+        if not tokens:
+            return True
+
+        command, arguments = tokens[0], tokens[1:]
+
+        if command == "uci":
+            self.send(f"id name {ENGINE_NAME}")
+            self.send(f"id author {ENGINE_AUTHOR}")
+            self.send(f"option name Hash type spin default {DEFAULT_HASH_MB} min 1 max {MAX_HASH_MB}")
+            self.send(f"option name Threads type spin default 1 min 1 max {MAX_THREADS}")
+            self.send("uciok")
+        elif command == "isready":
+            self.send("readyok")
+        elif command == "setoption":
+            self.stop()
+            self.set_option(arguments)
+        elif command == "ucinewgame":
+            self.stop()
+            if self.search is not None:
+                self.search.tt.clear()
+            self.game_state = Game_State()
+        elif command == "position":
+            self.stop()
+            self.set_position(arguments)
+        elif command == "go":
+            self.stop()
+            self.go(arguments)
+        elif command == "stop":
+            self.stop()
+        elif command == "quit":
+            self.stop()
+            self.close_search()
+            return False
+
+        return True
+
+    def set_option(self, arguments: List[str]) -> None:
+        # setoption name <id> [value <x>]; option names may contain spaces
+        text = " ".join(arguments)
+        name, _, value = text.partition(" value ")
+        name = name.replace("name", "", 1).strip().lower()
+
+        try:
+            if name == "hash":
+                self.hash_size_mb = min(max(1, int(value)), MAX_HASH_MB)
+            elif name == "threads":
+                self.threads = min(max(1, int(value)), MAX_THREADS)
+            else:
+                return
+        except ValueError:
+            return
+
+        self.close_search()
+
+    def set_position(self, arguments: List[str]) -> None:
+        if "moves" in arguments:
+            index = arguments.index("moves")
+            setup, moves = arguments[:index], arguments[index + 1:]
+        else:
+            setup, moves = arguments, []
+
+        if setup and setup[0] == "fen":
+            fen = " ".join(setup[1:])
+        else:
+            fen = START_FEN
+
+        try:
+            game_state = Game_State(fen)
+            for text in moves:
+                game_state.make_move(move_from_uci(game_state, text))
+        except ValueError as error:
+            self.send(f"info string invalid position: {error}")
+            return
+
+        self.game_state = game_state
+
+    def go(self, arguments: List[str]) -> None:
+        parameters: Dict[str, int] = {}
+        infinite = "infinite" in arguments
+
+        for name, value in zip(arguments, arguments[1:]):
+            if name in ("depth", "nodes", "movetime", "wtime", "btime", "winc", "binc", "movestogo"):
+                try:
+                    parameters[name] = int(value)
+                except ValueError:
+                    pass
+
+        max_depth = min(parameters.get("depth", MAX_PLY), MAX_PLY)
+        node_limit = parameters.get("nodes")
+        time_limit = None if infinite else time_budget(parameters, self.game_state.player_colour)
+
+        self.stop_requested.clear()
+        self.search_thread = threading.Thread(
+            target=self.run_search,
+            args=(self.get_search(), self.game_state, max_depth, time_limit, node_limit, infinite),
+            daemon=True,
+        )
+        self.search_thread.start()
+
+    def run_search(
+        self,
+        search: Parallel_Search,
+        game_state: Game_State,
+        max_depth: int,
+        time_limit: Optional[float],
+        node_limit: Optional[int],
+        infinite: bool,
+    ) -> None:
+        result = search.search(
+            game_state, max_depth, time_limit, node_limit, info_callback=lambda result: self.send(format_info(result))
+        )
+
+        # UCI forbids bestmove during an infinite search until the GUI sends stop
+        if infinite:
+            self.stop_requested.wait()
+
+        self.send(f"bestmove {move_to_uci(result.move) if result.move is not None else '0000'}")
+
+    def stop(self) -> None:
+        """
+        End the running search, if any, and wait for its bestmove to be sent.
+
+        Returns:
+        None
+        """
+        if self.search_thread is None:
+            return
+
+        self.stop_requested.set()
+        # A search that has not started yet clears the stop flag, so keep setting it until the thread ends
+        while self.search_thread.is_alive():
+            self.search.stop()
+            self.search_thread.join(0.01)
+        self.search_thread = None
+
+    def run(self, stream: TextIO = sys.stdin) -> None:
+        for line in stream:
+            if not self.handle(line):
+                return
+
+        # The GUI closed our input without quit
+        self.stop()
+        self.close_search()
+
+
+def main() -> None:
+    Uci_Engine().run()
+
+
+if __name__ == "__main__":
+    main()
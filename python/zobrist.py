@@ -0,0 +1,45 @@
+import random
+
+from python.bitboard import PIECES, iter_squares
+
+from typing import Dict, List, Optional
+
+# A fixed seed keeps keys identical between runs and processes, so hashes can be
+# stored on disk (opening books, caches) and compared across worker processes.
+_random = random.Random(0x5EED_C4E55)
+
+PIECE_KEYS: Dict[str, List[int]] = {piece: [_random.getrandbits(64) for _ in range(64)] for piece in PIECES}
+SIDE_KEY: int = _random.getrandbits(64)
+CASTLING_KEYS: List[int] = [_random.getrandbits(64) for _ in range(16)]
+EN_PASSANT_KEYS: List[int] = [_random.getrandbits(64) for _ in range(8)]
+
+
+def compute_key(pieces: Dict[str, int], player_colour: str, castling_rights: int, en_passant: Optional[int]) -> int:
+    """
+    Compute the Zobrist key of a position from scratch.
+
+    Parameters:
+    pieces (Dict[str, int]): The piece bitboards of the position.
+    player_colour (str): The colour of the side to move, "w" or "b".
+    castling_rights (int): The castling rights bit set.
+    en_passant (Optional[int]): The en passant target square, if any.
+
+    Returns:
+    int: The 64-bit position key.
+    """
+    key = 0
+
+    for piece, bitboard in pieces.items():
+        piece_keys = PIECE_KEYS[piece]
+        for square in iter_squares(bitboard):
+            key ^= piece_keys[square]
+
+    if player_colour == "b":
+        key ^= SIDE_KEY
+
+    key ^= CASTLING_KEYS[castling_rights]
+
+    if en_passant is not None:
+        key ^= EN_PASSANT_KEYS[en_passant & 7]
+
+    return key
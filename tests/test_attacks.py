@@ -0,0 +1,16 @@
+from python.game_state import Game_State
+from python.move import move_to_uci
+
+# Squares as row * 8 + column, row 0 being rank 8
+E2, E3 = 52, 44
+
+
+def test_attack_map_stops_at_the_king_but_king_danger_does_not():
+    # The rook on e1 checks the king on e2, which shields e3 yet cannot step there
+    game_state = Game_State("k7/8/8/8/8/8/4K3/4r3 w - - 0 1")
+
+    assert game_state.is_in_check()
+    assert game_state.is_attacked(E2, "b")
+    assert not game_state.is_attacked(E3, "b")
+    assert game_state.king_danger() >> E3 & 1
+    assert "e2e3" not in {move_to_uci(move) for move in game_state.generate_legal_moves()}
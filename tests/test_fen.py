@@ -0,0 +1,36 @@
+import pytest
+
+from python.game_state import Game_State
+from python.move import move_to_uci
+
+
+def test_castling_rights_need_king_and_rook_at_home():
+    game_state = Game_State("4k3/8/8/8/8/8/8/4K3 w KQkq - 0 1")
+
+    assert game_state.castling_rights == 0
+    assert {"e1g1", "e1c1"}.isdisjoint(move_to_uci(move) for move in game_state.generate_legal_moves())
+    assert game_state.get_fen() == "4k3/8/8/8/8/8/8/4K3 w - - 0 1"
+
+
+def test_castling_rights_kept_for_rooks_at_home():
+    game_state = Game_State("r3k3/8/8/8/8/8/8/4K2R w KQkq - 0 1")
+
+    assert game_state.get_fen().split()[2] == "Kq"
+
+
+@pytest.mark.parametrize("fen", ["k7/8/8/8/8/8/8/K6p b - - 0 1", "P6k/8/8/8/8/8/8/K7 w - - 0 1"])
+def test_pawn_on_first_or_last_rank_is_rejected(fen):
+    with pytest.raises(ValueError, match="pawn"):
+        Game_State(fen)
+
+
+@pytest.mark.parametrize("field", ["e", "e4", "i6", "e66", "e3"])
+def test_malformed_en_passant_square_is_rejected(field):
+    with pytest.raises(ValueError, match="en passant"):
+        Game_State(f"4k3/8/8/3pP3/8/8/8/4K3 w - {field} 0 1")
+
+
+def test_en_passant_square_is_read():
+    game_state = Game_State("4k3/8/8/3pP3/8/8/8/4K3 w - d6 0 1")
+
+    assert "e5d6" in [move_to_uci(move) for move in game_state.generate_legal_moves()]